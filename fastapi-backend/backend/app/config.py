@@ -11,3 +11,92 @@ YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
 # Validate required environment variables
 if not YOUTUBE_API_KEY:
     raise ValueError("YOUTUBE_API_KEY environment variable is required but not set")
+
+# YouTube Data API client (base URL can point at a local stand-in server)
+YOUTUBE_API_BASE_URL = os.getenv("YOUTUBE_API_BASE_URL", "https://www.googleapis.com/youtube/v3")
+YOUTUBE_HTTP_POOL_SIZE = int(os.getenv("YOUTUBE_HTTP_POOL_SIZE", "32"))
+YOUTUBE_HTTP_MAX_RETRIES = int(os.getenv("YOUTUBE_HTTP_MAX_RETRIES", "3"))
+YOUTUBE_HTTP_BACKOFF_BASE = float(os.getenv("YOUTUBE_HTTP_BACKOFF_BASE", "0.25"))
+YOUTUBE_HTTP_BACKOFF_MAX = float(os.getenv("YOUTUBE_HTTP_BACKOFF_MAX", "4.0"))
+YOUTUBE_ETAG_CACHE_SIZE = int(os.getenv("YOUTUBE_ETAG_CACHE_SIZE", "2048"))
+
+# NLP pipeline tuning
+NER_BATCH_SIZE = int(os.getenv("NER_BATCH_SIZE", "16"))
+NER_MAX_BATCH_CHARS = int(os.getenv("NER_MAX_BATCH_CHARS", "16000"))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+
+# Topic scoring engine: "embedding" (MiniLM label similarity), "nli" (bart-large-mnli zero-shot)
+# or "cascade" (embedding prefilter to a shortlist, then NLI on the shortlist only)
+TOPIC_ENGINE = os.getenv("TOPIC_ENGINE", "embedding").strip().lower()
+TOPIC_CASCADE_TOP_K = int(os.getenv("TOPIC_CASCADE_TOP_K", "20"))
+# Fraction of cascade-scored videos also run through the full NLI pass (in the background) to track agreement
+TOPIC_CASCADE_AUDIT_RATE = float(os.getenv("TOPIC_CASCADE_AUDIT_RATE", "0.02"))
+NLI_BATCH_SIZE = int(os.getenv("NLI_BATCH_SIZE", "32"))
+NLI_MAX_BATCH_CHARS = int(os.getenv("NLI_MAX_BATCH_CHARS", "32000"))
+
+# Persistent per-video feature cache (entities, topics, embeddings)
+FEATURE_CACHE_ENABLED = os.getenv("FEATURE_CACHE_ENABLED", "true").strip().lower() in ("1", "true", "yes")
+FEATURE_CACHE_PATH = os.getenv("FEATURE_CACHE_PATH", str(Path(__file__).parent.parent / "feature_cache.sqlite3"))
+FEATURE_CACHE_MAX_ENTRIES = int(os.getenv("FEATURE_CACHE_MAX_ENTRIES", "50000"))
+
+# In-process channel profile/embedding cache
+CHANNEL_CACHE_TTL_SECONDS = float(os.getenv("CHANNEL_CACHE_TTL_SECONDS", "900"))
+CHANNEL_CACHE_MAX_ENTRIES = int(os.getenv("CHANNEL_CACHE_MAX_ENTRIES", "1024"))
+
+# Worker threads for CPU-bound model work dispatched from async routes
+CPU_EXECUTOR_WORKERS = int(os.getenv("CPU_EXECUTOR_WORKERS", str(max(1, os.cpu_count() or 1))))
+
+# Bulk channel profiling
+BULK_MAX_CHANNELS = int(os.getenv("BULK_MAX_CHANNELS", "1000"))
+BULK_CHUNK_CHANNELS = int(os.getenv("BULK_CHUNK_CHANNELS", "50"))
+
+# VidTower (video embedding) client: "gradio" (hosted Space) or "fake" (deterministic stand-in)
+VIDTOWER_BACKEND = os.getenv("VIDTOWER_BACKEND", "gradio").strip().lower()
+VIDTOWER_SPACE = os.getenv("VIDTOWER_SPACE", "MeshMax/VidTower")
+VIDTOWER_TIMEOUT_SECONDS = float(os.getenv("VIDTOWER_TIMEOUT_SECONDS", "30"))
+VIDTOWER_MAX_CONCURRENCY = int(os.getenv("VIDTOWER_MAX_CONCURRENCY", "8"))
+VIDTOWER_FAKE_LATENCY_MS = float(os.getenv("VIDTOWER_FAKE_LATENCY_MS", "0"))
+# Experimental in-process tower, only used by its parity tooling (app/services/local_video_tower.py)
+LOCAL_VIDTOWER_WEIGHTS = os.getenv("LOCAL_VIDTOWER_WEIGHTS", str(Path(__file__).parent.parent / "video_tower.pth"))
+LOCAL_VIDTOWER_THUMB_TIMEOUT = float(os.getenv("LOCAL_VIDTOWER_THUMB_TIMEOUT", "5"))
+
+# VidTower embedding cache: in-memory LRU, optionally persisted to a SQLite file (empty path = memory only)
+VIDEO_EMB_CACHE_ENABLED = os.getenv("VIDEO_EMB_CACHE_ENABLED", "true").strip().lower() in ("1", "true", "yes")
+VIDEO_EMB_CACHE_MAX_ENTRIES = int(os.getenv("VIDEO_EMB_CACHE_MAX_ENTRIES", "4096"))
+VIDEO_EMB_CACHE_PATH = os.getenv("VIDEO_EMB_CACHE_PATH", "")
+VIDEO_EMB_CACHE_DISK_MAX_ENTRIES = int(os.getenv("VIDEO_EMB_CACHE_DISK_MAX_ENTRIES", "100000"))
+
+# Dynamic micro-batching in front of the bi-cross-attention fusion model
+FUSION_BATCHING_ENABLED = os.getenv("FUSION_BATCHING_ENABLED", "true").strip().lower() in ("1", "true", "yes")
+FUSION_MAX_BATCH_SIZE = int(os.getenv("FUSION_MAX_BATCH_SIZE", "32"))
+FUSION_MAX_WAIT_MS = float(os.getenv("FUSION_MAX_WAIT_MS", "2"))
+
+# Batch scoring endpoints (/bicross-fusion/..., /cross-attention-fusion-model/... /batch)
+FUSION_BATCH_MAX_ITEMS = int(os.getenv("FUSION_BATCH_MAX_ITEMS", "10000"))
+FUSION_BATCH_CHUNK_SIZE = int(os.getenv("FUSION_BATCH_CHUNK_SIZE", "256"))
+# Candidate scoring (/channel-id-and-video-data/prediction-heatmap/candidates): videos per request
+FUSION_MAX_CANDIDATES = int(os.getenv("FUSION_MAX_CANDIDATES", "50"))
+
+# Fusion head runtime: "torch" (eager) or "onnx" (ONNX Runtime; graphs exported on first start if missing)
+FUSION_RUNTIME = os.getenv("FUSION_RUNTIME", "torch").strip().lower()
+BICROSS_ONNX_PATH = os.getenv("BICROSS_ONNX_PATH", str(Path(__file__).parent.parent / "bidirectional_fusion_model.onnx"))
+CROSS_ATTENTION_ONNX_PATH = os.getenv("CROSS_ATTENTION_ONNX_PATH", str(Path(__file__).parent.parent / "fusion_model.onnx"))
+# ONNX Runtime intra-op threads per session (0 = ORT default)
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))
+
+# Int8 dynamic quantization of the NLP models and fusion heads at load time: "none" or "int8"
+MODEL_QUANTIZATION = os.getenv("MODEL_QUANTIZATION", "none").strip().lower()
+
+# Prometheus metrics on GET /metrics (stage / model latency histograms, cache and batcher stats)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").strip().lower() in ("1", "true", "yes")
+
+# Background model warm-up at startup (load + one dummy batch per model); gates GET /health/ready
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").strip().lower() in ("1", "true", "yes")
+WARMUP_BATCH_SIZE = int(os.getenv("WARMUP_BATCH_SIZE", "8"))
+# A required model whose warm-up fails is retried with exponential backoff between these bounds
+WARMUP_RETRY_INITIAL_SECONDS = float(os.getenv("WARMUP_RETRY_INITIAL_SECONDS", "5"))
+WARMUP_RETRY_MAX_SECONDS = float(os.getenv("WARMUP_RETRY_MAX_SECONDS", "300"))
+
+# Routers to mount, by module name in app/routers (comma-separated, or "all"); modules that are
+# not listed are never imported, so their models are neither loaded nor warmed up
+ENABLED_ROUTERS = [r.strip().lower() for r in os.getenv("ENABLED_ROUTERS", "all").split(",") if r.strip()]
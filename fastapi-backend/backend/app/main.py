@@ -1,11 +1,54 @@
+import importlib
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from app.routers import user_profiling, test_youtube, heatmap,heatmap_cross_attention,heatmap_cross_attention_at_2
-from app.routers import profile_embedding,video_embedding
-from app.routers import combined_channel_video_heatmap,combined_channel_emb_video
-from app.routers import predictions
+from app.config import ENABLED_ROUTERS
+from app.routers import metrics, health
+from app.services.metrics import instrument_app
+from app.services.http_client import close_clients
+from app.services.warmup import start_warmup
+from app.services.wire_format import add_body_schemas
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI(title="YouTube Optimal Time Backend")
+# Optional routers (module names in app.routers), in registration order. Only the ones enabled by
+# ENABLED_ROUTERS are imported, so a deployment never loads or warms models it does not serve.
+ROUTERS = (
+    "test_youtube",
+    "user_profiling",
+    "profile_embedding",
+    "heatmap",
+    "heatmap_cross_attention",
+    "heatmap_cross_attention_at_2",
+    "video_embedding",
+    "combined_channel_video_heatmap",
+    "combined_channel_emb_video",
+    "predictions",
+)
+
+
+def _enabled_routers():
+    if "all" in ENABLED_ROUTERS:
+        return list(ROUTERS)
+    unknown = [name for name in ENABLED_ROUTERS if name not in ROUTERS]
+    if unknown:
+        raise ValueError(f"Unknown router(s) {unknown} in ENABLED_ROUTERS, expected names from {ROUTERS}")
+    return [name for name in ROUTERS if name in ENABLED_ROUTERS]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Models warm up in the background; /health/ready reports when they are done
+    start_warmup()
+    yield
+    await close_clients()
+
+
+app = FastAPI(title="YouTube Optimal Time Backend", lifespan=lifespan)
+instrument_app(app)
+
+# Routes that read their body through wire_format document it by reference to these models
+_default_openapi = app.openapi
+app.openapi = lambda: add_body_schemas(_default_openapi())
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,13 +59,7 @@ app.add_middleware(
 )
 
 # Register routers
-app.include_router(test_youtube.router)
-app.include_router(user_profiling.router)
-app.include_router(profile_embedding.router)
-app.include_router(heatmap.router)
-app.include_router(heatmap_cross_attention.router)
-app.include_router(heatmap_cross_attention_at_2.router)
-app.include_router(video_embedding.router)
-app.include_router(combined_channel_video_heatmap.router)
-app.include_router(combined_channel_emb_video.router)
-app.include_router(predictions.router)
\ No newline at end of file
+for name in _enabled_routers():
+    app.include_router(importlib.import_module(f"app.routers.{name}").router)
+app.include_router(metrics.router)
+app.include_router(health.router)
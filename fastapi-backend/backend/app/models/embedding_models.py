@@ -24,7 +24,21 @@ class EmbeddingRequest(BaseModel):
 class BidirectionalModelInput(BaseModel):
     user_embedding: list[float]
     video_embedding: list[float]
-    
+
+
+class EmbeddingBatchRequest(BaseModel):
+    # Row i of each list belongs to item i
+    metadata_embeddings: List[List[float]]
+    content_embeddings: List[List[float]]
+    user_embeddings: List[List[float]]
+
+
+class BidirectionalBatchInput(BaseModel):
+    # Row i of each list belongs to item i
+    user_embeddings: List[List[float]]
+    video_embeddings: List[List[float]]
+
+
 
 
 class VideoIn(BaseModel):
@@ -44,3 +58,6 @@ class EmbeddingOut(BaseModel):
     dim: int
     videos_processed: int
     channel_title: str
+
+class BulkChannelEmbeddingRequest(BaseModel):
+    channel_ids: List[str]
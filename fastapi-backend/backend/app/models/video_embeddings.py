@@ -9,4 +9,8 @@ class CombinedHeatmapRequest(BaseModel):
 
 class CombinedHeatmapRequestAsEmb(BaseModel):
     channel_embedding: List[float]
-    video: VideoInput
\ No newline at end of file
+    video: VideoInput
+
+class CandidateHeatmapRequest(BaseModel):
+    channel_id: str
+    videos: List[VideoInput]  # draft variants (titles/thumbnails) to compare for the channel
@@ -0,0 +1,22 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.services.warmup import is_ready, model_states
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+
+@router.get("/live")
+def live():
+    """Liveness: the process is up and serving requests (models may still be loading)."""
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+def ready():
+    """Readiness: 200 once every required model is loaded and warmed up, 503 until then."""
+    models = model_states()
+    if is_ready():
+        return {"status": "ready", "models": models}
+    failed = any(m["state"] == "failed" and m["required"] for m in models.values())
+    return JSONResponse(status_code=503, content={"status": "failed" if failed else "warming", "models": models})
@@ -1,13 +1,16 @@
 import io
+from threading import Lock
+
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
-import matplotlib.pyplot as plt
 import numpy as np
 from app.models.embedding_models import EmbeddingRequest, HeatmapResponse
 
 from fastapi.responses import JSONResponse
 from fastapi import APIRouter, HTTPException
+from app.config import WARMUP_BATCH_SIZE
+from app.services.warmup import register_model
 
 # -------------------------
 # Model definition
@@ -41,8 +44,29 @@ router = APIRouter(prefix="/mlp-fusion-model", tags=["Fusion Model"])
 metadata_dim = 384
 content_dim = 384
 user_dim = 384
-model = EarlyFusionModel(metadata_dim, content_dim, user_dim)
-model.eval()
+# Built on first use (first request or the startup warm-up), not at import
+_model = None
+_model_lock = Lock()
+
+
+def get_model() -> EarlyFusionModel:
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                model = EarlyFusionModel(metadata_dim, content_dim, user_dim)
+                model.eval()
+                _model = model
+    return _model
+
+
+def _warm_up():
+    n = max(1, WARMUP_BATCH_SIZE)
+    with torch.no_grad():
+        get_model()(torch.zeros(n, metadata_dim), torch.zeros(n, content_dim), torch.zeros(n, user_dim))
+
+
+register_model("mlp", _warm_up)
 
 # -------------------------
 # Request schema
@@ -61,7 +85,7 @@ def predict_heatmap(payload: EmbeddingRequest):
 
         # Run model
         with torch.no_grad():
-            heatmap = model(metadata_emb, content_emb, user_emb).cpu().numpy()[0]
+            heatmap = get_model()(metadata_emb, content_emb, user_emb).cpu().numpy()[0]
 
         # Build JSON response: {slotId: value}
         slot_values = {f"slot_{i}": float(val) for i, val in enumerate(heatmap)}
@@ -1,10 +1,27 @@
 
+from threading import Lock
+
+import numpy as np
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
-from app.models.embedding_models import EmbeddingRequest
+from fastapi import APIRouter, HTTPException, Request
+from app.models.embedding_models import EmbeddingRequest, EmbeddingBatchRequest
+from app.config import (
+    FUSION_BATCH_MAX_ITEMS,
+    FUSION_BATCH_CHUNK_SIZE,
+    FUSION_RUNTIME,
+    CROSS_ATTENTION_ONNX_PATH,
+    WARMUP_BATCH_SIZE,
+)
+from app.services.fusion_batch import chunked_forward, torch_runner
+from app.services.quantization import int8_enabled, quantize_int8
+from app.services.onnx_fusion import load_or_export
+from app.services.attention_fastpath import attend
+from app.services.executor import run_cpu
+from app.services.metrics import timed_model
+from app.services.warmup import register_model
+from app.services.wire_format import WireFormatError, read_arrays, array_response, request_body_spec
 
 # ---------------------------
 # Cross-Attention Block
@@ -23,7 +40,7 @@ class CrossAttentionBlock(nn.Module):
         self.ff_norm = nn.LayerNorm(embed_dim)
 
     def forward(self, query, key_value):
-        attn_output, _ = self.attn(query, key_value, key_value)
+        attn_output = attend(self.attn, query, key_value)
         out = self.norm(query + attn_output)
         out_ff = self.ff_norm(out + self.ff(out))
         return out_ff
@@ -104,27 +121,123 @@ import os
 from pathlib import Path
 model_path = Path(__file__).parent.parent.parent / "fusion_model.pth"
 
-model = FusionModel(embed_dim=EMBED_DIM, num_heads=NUM_HEADS, num_slots=NUM_SLOTS)
-model.load_state_dict(torch.load(str(model_path), map_location=device))
-model.to(device)
-model.eval()
+ONNX_PATH = CROSS_ATTENTION_ONNX_PATH
+ONNX_INPUT_NAMES = ["user_emb", "content_emb", "context_emb"]
+
+# Weights are loaded on first use (first request or the startup warm-up), not at import
+_model = None
+_runner = None
+_load_lock = Lock()
+
+
+def _load():
+    global _model, _runner
+    if _runner is None:
+        with _load_lock:
+            if _runner is None:
+                model = FusionModel(embed_dim=EMBED_DIM, num_heads=NUM_HEADS, num_slots=NUM_SLOTS)
+                model.load_state_dict(torch.load(str(model_path), map_location=device))
+                model.to(device)
+                model.eval()
+
+                # FusionModel already ends in a sigmoid, so the runner returns 0-1 slot scores directly
+                runner = None
+                if FUSION_RUNTIME == "onnx":
+                    runner = load_or_export(
+                        model, [torch.zeros(2, EMBED_DIM)] * 3, ONNX_INPUT_NAMES, ONNX_PATH, device,
+                        quantize=int8_enabled(),
+                    )
+                if runner is None:
+                    if int8_enabled():
+                        model = quantize_int8(model)
+                    runner = torch_runner(model, device)
+                _model, _runner = model, timed_model("cross_attention", runner)
+    return _model, _runner
+
+
+def get_model() -> FusionModel:
+    """The FusionModel, loaded on first call (int8 with MODEL_QUANTIZATION=int8 on the torch runtime)."""
+    return _load()[0]
+
+
+def get_runner():
+    """numpy-in / numpy-out runner (torch or ONNX Runtime) over the model, loaded on first call."""
+    return _load()[1]
+
+
+def _forward(user_embs: np.ndarray, content_embs: np.ndarray, metadata_embs: np.ndarray) -> np.ndarray:
+    return chunked_forward(get_runner(), [user_embs, content_embs, metadata_embs], FUSION_BATCH_CHUNK_SIZE)
+
+
+def _warm_up():
+    zeros = np.zeros((max(1, WARMUP_BATCH_SIZE), EMBED_DIM), dtype=np.float32)
+    get_runner()(zeros, zeros, zeros)
+
 
+register_model("cross_attention", _warm_up)
 
 
-@router.post("/predict-heatmap")
-def predict_heatmap(payload: EmbeddingRequest):
+# Array fields in wire order (also the concatenation order of application/octet-stream bodies)
+WIRE_FIELDS = {"metadata_embedding": EMBED_DIM, "content_embedding": EMBED_DIM, "user_embedding": EMBED_DIM}
+BATCH_WIRE_FIELDS = {"metadata_embeddings": EMBED_DIM, "content_embeddings": EMBED_DIM, "user_embeddings": EMBED_DIM}
+
+
+@router.post("/predict-heatmap", openapi_extra=request_body_spec(EmbeddingRequest))
+async def predict_heatmap(request: Request):
+    """
+    EmbeddingRequest as JSON, msgpack or raw float32/float16 (see app.services.wire_format);
+    the heatmap comes back in the format named by the Accept header.
+    """
     try:
-        # Convert embeddings to tensors
-        user_emb = torch.tensor([payload.user_embedding], dtype=torch.float32)
-        content_emb = torch.tensor([payload.content_embedding], dtype=torch.float32)
-        context_emb = torch.tensor([payload.metadata_embedding], dtype=torch.float32)  # using metadata as context
+        arrays, _ = await read_arrays(request, WIRE_FIELDS, model=EmbeddingRequest)
+    except WireFormatError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
 
-        with torch.no_grad():
-            heatmap = model(user_emb, content_emb, context_emb).cpu().numpy()[0]
+    try:
+        # using metadata as context
+        heatmap = (await run_cpu(
+            _forward,
+            arrays["user_embedding"][None],
+            arrays["content_embedding"][None],
+            arrays["metadata_embedding"][None],
+        ))[0]
 
         # Return JSON with slot-wise values
-        slot_values = {f"slot_{i}": float(val) for i, val in enumerate(heatmap)}
-        return JSONResponse(content={"heatmap": slot_values})
+        return array_response(
+            request, {"heatmap": heatmap},
+            lambda: {"heatmap": {f"slot_{i}": float(val) for i, val in enumerate(heatmap)}},
+        )
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
+
+@router.post("/predict-heatmap/batch", openapi_extra=request_body_spec(EmbeddingBatchRequest))
+async def predict_heatmap_batch(request: Request):
+    """
+    Batch variant for bulk scoring: N (user, content, metadata) embedding triples in, an
+    N x NUM_SLOTS matrix out (row i belongs to triple i), computed in chunked batched forwards.
+    Accepts and returns the same wire formats as /predict-heatmap.
+    """
+    try:
+        arrays, _ = await read_arrays(request, BATCH_WIRE_FIELDS, batch=True, model=EmbeddingBatchRequest)
+    except WireFormatError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    n = len(arrays["user_embeddings"])
+    if not (n == len(arrays["content_embeddings"]) == len(arrays["metadata_embeddings"])):
+        raise HTTPException(status_code=400, detail="user, content and metadata embeddings must have the same length")
+    if n > FUSION_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {FUSION_BATCH_MAX_ITEMS} triples per request")
+
+    try:
+        heatmaps = await run_cpu(
+            _forward, arrays["user_embeddings"], arrays["content_embeddings"], arrays["metadata_embeddings"]
+        )
+        heatmaps = heatmaps.reshape(n, NUM_SLOTS)
+        return array_response(
+            request, {"heatmaps": heatmaps},
+            lambda: {"heatmaps": heatmaps.tolist(), "num_slots": NUM_SLOTS},
+            extra={"num_slots": NUM_SLOTS},
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
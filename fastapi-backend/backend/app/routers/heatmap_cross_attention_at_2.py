@@ -1,11 +1,33 @@
 
 from app.models.embedding_models import BidirectionalModelInput
 
+from threading import Lock
+
+import numpy as np
 import torch
 import torch.nn as nn
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, Request
 from app.models.embedding_models import EmbeddingRequest
+from app.models.embedding_models import BidirectionalBatchInput
+from app.config import (
+    FUSION_BATCHING_ENABLED,
+    FUSION_MAX_BATCH_SIZE,
+    FUSION_MAX_WAIT_MS,
+    FUSION_BATCH_MAX_ITEMS,
+    FUSION_BATCH_CHUNK_SIZE,
+    FUSION_RUNTIME,
+    BICROSS_ONNX_PATH,
+    WARMUP_BATCH_SIZE,
+)
+from app.services.micro_batcher import MicroBatcher
+from app.services.fusion_batch import chunked_forward, torch_runner
+from app.services.quantization import int8_enabled, quantize_int8
+from app.services.onnx_fusion import SigmoidHead, load_or_export
+from app.services.attention_fastpath import attend
+from app.services.executor import run_cpu
+from app.services.metrics import timed, timed_model, register_stats_source
+from app.services.warmup import register_model
+from app.services.wire_format import WireFormatError, read_arrays, array_response, request_body_spec
 
 # -----------------------------------------------------
 # Define CrossAttentionBlock and BiCrossAttentionFusionModel
@@ -23,7 +45,9 @@ class CrossAttentionBlock(nn.Module):
         self.norm2 = nn.LayerNorm(embed_dim)
 
     def forward(self, q, kv):
-        attn_out, _ = self.attn(q, kv, kv)
+        return self.post_attention(q, attend(self.attn, q, kv))
+
+    def post_attention(self, q, attn_out):
         x = self.norm1(q + attn_out)
         ff_out = self.ff(x)
         return self.norm2(x + ff_out)
@@ -57,6 +81,30 @@ class BiCrossAttentionFusionModel(nn.Module):
         out = self.head(fused)  # [B, num_slots]
         return out
 
+    def encode_video_side(self, video_emb):
+        """
+        Per-input tensors of the video_emb branch for one row ([1, video_dim]): its projection
+        and the user_to_video attention output. With a single key/value token the attention
+        output depends only on the key/value, so it is shared by every user_emb scored against it.
+        Inference only.
+        """
+        v = self.video_proj(video_emb).unsqueeze(1)
+        return v, attend(self.user_to_video.attn, v, v)
+
+    def forward_video_side(self, video_side, user_emb):
+        """forward() for many user_emb rows against one encode_video_side() result."""
+        v, v_attn = video_side
+        u = self.user_proj(user_emb).unsqueeze(1)
+        batch = u.shape[0]
+        v = v.expand(batch, -1, -1)
+
+        v2u = self.video_to_user(v, u)
+        u2v = self.user_to_video.post_attention(u, v_attn.expand(batch, -1, -1))
+
+        fused = torch.cat([v2u, u2v], dim=-1)
+        fused = self.fusion(fused).squeeze(1)
+        return self.head(fused)
+
 
 # -----------------------------------------------------
 # Initialize model and device
@@ -76,40 +124,189 @@ import os
 from pathlib import Path
 model_path = Path(__file__).parent.parent.parent / "bidirectional_fusion_model.pth"
 
-# Load trained model weights
-model = BiCrossAttentionFusionModel(VIDEO_DIM, USER_DIM, HIDDEN_DIM, NUM_HEADS, NUM_SLOTS)
-model.load_state_dict(torch.load(str(model_path), map_location=device))
-model.to(device)
-model.eval()
+
+# -----------------------------------------------------
+# Micro-batched inference shared by every caller of the model
+# -----------------------------------------------------
+ONNX_PATH = BICROSS_ONNX_PATH
+ONNX_INPUT_NAMES = ["video_emb", "user_emb"]
+
+# Weights are loaded on first use (first request or the startup warm-up), not at import
+_model = None
+_runner = None
+_load_lock = Lock()
+
+
+def _load():
+    global _model, _runner
+    if _runner is None:
+        with _load_lock:
+            if _runner is None:
+                model = BiCrossAttentionFusionModel(VIDEO_DIM, USER_DIM, HIDDEN_DIM, NUM_HEADS, NUM_SLOTS)
+                model.load_state_dict(torch.load(str(model_path), map_location=device))
+                model.to(device)
+                model.eval()
+
+                runner = None
+                if FUSION_RUNTIME == "onnx":
+                    runner = load_or_export(
+                        SigmoidHead(model), [torch.zeros(2, VIDEO_DIM), torch.zeros(2, USER_DIM)], ONNX_INPUT_NAMES,
+                        ONNX_PATH, device, quantize=int8_enabled(),
+                    )
+                if runner is None:
+                    if int8_enabled():
+                        model = quantize_int8(model)
+                    runner = torch_runner(SigmoidHead(model), device)
+                _model, _runner = model, timed_model("bicross", runner)
+    return _model, _runner
+
+
+def get_model() -> BiCrossAttentionFusionModel:
+    """The BiCrossAttentionFusionModel, loaded on first call (int8 with MODEL_QUANTIZATION=int8 on torch)."""
+    return _load()[0]
+
+
+def get_runner():
+    """numpy-in / numpy-out sigmoid runner (torch or ONNX Runtime) over the model, loaded on first call."""
+    return _load()[1]
+
+
+def _warm_up():
+    n = max(1, WARMUP_BATCH_SIZE)
+    get_runner()(np.zeros((n, VIDEO_DIM), dtype=np.float32), np.zeros((n, USER_DIM), dtype=np.float32))
+
+
+register_model("bicross", _warm_up)
+
+
+@timed("fusion.predict_heatmaps")
+def predict_heatmaps(video_embs: np.ndarray, user_embs: np.ndarray,
+                     chunk_size: int = FUSION_BATCH_CHUNK_SIZE) -> np.ndarray:
+    """[N, NUM_SLOTS] sigmoid slot scores for aligned [N, VIDEO_DIM] / [N, USER_DIM] matrices."""
+    return chunked_forward(get_runner(), [video_embs, user_embs], chunk_size)
+
+
+@timed("fusion.predict_heatmaps_shared")
+def predict_heatmaps_shared(video_emb: np.ndarray, user_embs: np.ndarray,
+                            chunk_size: int = FUSION_BATCH_CHUNK_SIZE) -> np.ndarray:
+    """
+    [N, NUM_SLOTS] sigmoid slot scores for one VIDEO_DIM-d row against N USER_DIM-d rows.
+    The video_emb branch is encoded once and reused for every chunk. Always runs the torch
+    model, also with FUSION_RUNTIME=onnx (the exported graph has no split entry point).
+    """
+    model = get_model()
+    with torch.no_grad():
+        side = model.encode_video_side(torch.from_numpy(video_emb.reshape(1, -1)).to(device))
+        forward = lambda users: torch.sigmoid(model.forward_video_side(side, users))
+        return chunked_forward(timed_model("bicross", torch_runner(forward, device)), [user_embs], chunk_size)
+
+
+def _heatmap_batch(items):
+    """items: [(video_emb, user_emb)] -> [heatmap row] from one forward pass."""
+    video_embs = np.stack([v for v, _ in items])
+    user_embs = np.stack([u for _, u in items])
+    return list(predict_heatmaps(video_embs, user_embs, chunk_size=len(items)))
+
+
+batcher = MicroBatcher(
+    _heatmap_batch,
+    max_batch_size=FUSION_MAX_BATCH_SIZE,
+    max_wait_ms=FUSION_MAX_WAIT_MS,
+    name="bicross",
+    enabled=FUSION_BATCHING_ENABLED,
+)
+register_stats_source("bicross_batcher", batcher.stats)
+
+
+def _validated_pair(video_embedding, user_embedding):
+    video_emb = np.asarray(video_embedding, dtype=np.float32).reshape(-1)
+    user_emb = np.asarray(user_embedding, dtype=np.float32).reshape(-1)
+    if user_emb.shape[0] != USER_DIM:
+        raise HTTPException(status_code=400, detail=f"Expected user_emb dim {USER_DIM}, got {user_emb.shape[0]}")
+    if video_emb.shape[0] != VIDEO_DIM:
+        raise HTTPException(status_code=400, detail=f"Expected video_emb dim {VIDEO_DIM}, got {video_emb.shape[0]}")
+    return video_emb, user_emb
+
+
+@timed("fusion.predict_heatmap")
+def predict_heatmap(video_embedding, user_embedding) -> np.ndarray:
+    """
+    Sigmoid slot scores [NUM_SLOTS] for one pair, in the model's argument order
+    (VIDEO_DIM-d first, USER_DIM-d second). Concurrent callers share batched forwards.
+    """
+    return batcher(_validated_pair(video_embedding, user_embedding))
+
+
+@timed("fusion.predict_heatmap_async")
+async def predict_heatmap_async(video_embedding, user_embedding) -> np.ndarray:
+    """predict_heatmap for async routes; waits on the batch without blocking the event loop."""
+    return await batcher.call_async(_validated_pair(video_embedding, user_embedding))
 
 
 # -----------------------------------------------------
 # FastAPI endpoint for prediction
 # -----------------------------------------------------
-@router.post("/predict-slot-heatmap")
-def predict_slot_heatmap(payload: BidirectionalModelInput):
+# Array fields in wire order (also the concatenation order of application/octet-stream bodies)
+WIRE_FIELDS = {"user_embedding": USER_DIM, "video_embedding": VIDEO_DIM}
+BATCH_WIRE_FIELDS = {"user_embeddings": USER_DIM, "video_embeddings": VIDEO_DIM}
+
+
+@router.post("/predict-slot-heatmap", openapi_extra=request_body_spec(BidirectionalModelInput))
+async def predict_slot_heatmap(request: Request):
     """
-    Accepts user + video embeddings and returns slot-wise prediction heatmap (0-1 normalized scores)
+    Accepts user + video embeddings and returns slot-wise prediction heatmap (0-1 normalized scores).
+    Request and response may use JSON, msgpack or raw float32/float16 (see app.services.wire_format).
     """
     try:
-        # Convert embeddings to torch tensors
-        user_emb = torch.tensor([payload.user_embedding], dtype=torch.float32).to(device)
-        video_emb = torch.tensor([payload.video_embedding], dtype=torch.float32).to(device)
+        arrays, _ = await read_arrays(request, WIRE_FIELDS, model=BidirectionalModelInput)
+    except WireFormatError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
 
-        # Validate dimensions
-        if user_emb.shape[1] != USER_DIM:
-            raise HTTPException(status_code=400, detail=f"Expected user_emb dim {USER_DIM}, got {user_emb.shape[1]}")
-        if video_emb.shape[1] != VIDEO_DIM:
-            raise HTTPException(status_code=400, detail=f"Expected video_emb dim {VIDEO_DIM}, got {video_emb.shape[1]}")
-
-        # Run inference
-        with torch.no_grad():
-            slot_scores = model(video_emb, user_emb)
-            heatmap = torch.sigmoid(slot_scores).cpu().numpy()[0]
+    try:
+        heatmap = await predict_heatmap_async(arrays["video_embedding"], arrays["user_embedding"])
 
         # Return slot-wise heatmap as JSON
-        slot_values = {f"slot_{i}": float(val) for i, val in enumerate(heatmap)}
-        return JSONResponse(content={"heatmap": slot_values})
+        return array_response(
+            request, {"heatmap": heatmap},
+            lambda: {"heatmap": {f"slot_{i}": float(val) for i, val in enumerate(heatmap)}},
+        )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/predict-slot-heatmap/batch", openapi_extra=request_body_spec(BidirectionalBatchInput))
+async def predict_slot_heatmap_batch(request: Request):
+    """
+    Batch variant for bulk scoring: N user/video embedding pairs in, an N x NUM_SLOTS matrix of
+    0-1 scores out (row i belongs to pair i), computed in chunked batched forwards.
+    Accepts and returns the same wire formats as /predict-slot-heatmap.
+    """
+    try:
+        arrays, _ = await read_arrays(request, BATCH_WIRE_FIELDS, batch=True, model=BidirectionalBatchInput)
+    except WireFormatError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    n = len(arrays["user_embeddings"])
+    if n != len(arrays["video_embeddings"]):
+        raise HTTPException(status_code=400, detail="user_embeddings and video_embeddings must have the same length")
+    if n > FUSION_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {FUSION_BATCH_MAX_ITEMS} pairs per request")
+
+    try:
+        heatmaps = await run_cpu(predict_heatmaps, arrays["video_embeddings"], arrays["user_embeddings"])
+        heatmaps = heatmaps.reshape(n, NUM_SLOTS)
+        return array_response(
+            request, {"heatmaps": heatmaps},
+            lambda: {"heatmaps": heatmaps.tolist(), "num_slots": NUM_SLOTS},
+            extra={"num_slots": NUM_SLOTS},
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/batching-stats")
+def get_batching_stats():
+    """Queue depth, batch-size and wait-time summaries of the micro-batcher."""
+    return batcher.stats()
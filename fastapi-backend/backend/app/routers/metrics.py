@@ -0,0 +1,15 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
+
+from app.services.metrics import ENABLED, render_latest
+
+router = APIRouter(tags=["Monitoring"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Prometheus text exposition: stage / model latency histograms, cache and batcher stats."""
+    if not ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
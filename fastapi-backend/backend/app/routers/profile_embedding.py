@@ -1,12 +1,19 @@
 # app/routers/profile_embedding.py
+import json
+import asyncio
 import logging
 import numpy as np
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from typing import List, Dict, Any, Optional
-from app.models.embedding_models import ChannelResponseIn, EmbeddingOut, VideoIn
+from app.config import BULK_MAX_CHANNELS, BULK_CHUNK_CHANNELS
+from app.models.embedding_models import ChannelResponseIn, EmbeddingOut, VideoIn, BulkChannelEmbeddingRequest
 
 # Import or define _lazy_load_models
-from app.services.embedding_service import _lazy_load_models, clean_text, preprocess_youtube_response, extract_entities_and_link, score_topics, video_to_weighted_embedding, _models
+from app.services.embedding_service import _lazy_load_models, clean_text, preprocess_youtube_response, build_video_features, channel_embedding_batch, embed_channel_profiles_bulk, _models
+from app.services.youtube_service import fetch_channel_profiles_bulk_async
+from app.services.channel_cache import channel_cache, RECENT_VIDEOS
+from app.services.executor import run_cpu
 router = APIRouter(prefix="/embed", tags=["Profile Embedding"])
 
 # -------------------------
@@ -46,27 +53,12 @@ def build_channel_embedding(payload: ChannelResponseIn):
     max_views = max([v.get("view_count", 0) for v in videos]) if videos else 1.0
 
     # Step 2 & 3: entity linking + topic scoring -> build per-video structure
-    final_videos = []
-    for v in videos:
-        el = extract_entities_and_link(v)
-        topic_info = score_topics(v) if (len(el.get("mentions", [])) <= 10) else {"topics": [], "scores": []}
-        final_videos.append({
-            "clean_title": v.get("clean_title"),
-            "clean_description": v.get("clean_description"),
-            "view_count": v.get("view_count", 0),
-            "linked_entities": el.get("linked_entities", []),
-            "topics": topic_info.get("topics", []),
-            "scores": topic_info.get("scores", [])
-        })
-
-    # Step 4: Embedding + weighting
-    video_embeddings = []
-    for v in final_videos:
-        emb = video_to_weighted_embedding(v, global_max_views=max_views)
-        if emb is not None:
-            video_embeddings.append(emb)
-
-    if not video_embeddings:
+    final_videos = build_video_features(videos)
+
+    # Step 4: Embedding + weighting, aggregated to channel level in one batched encode
+    channel_vector, videos_processed = channel_embedding_batch(final_videos, global_max_views=max_views)
+
+    if channel_vector is None:
         embedder = _models["embedder"]
         zero_vec = np.zeros(embedder.get_sentence_embedding_dimension(), dtype=float)
         return EmbeddingOut(
@@ -76,13 +68,73 @@ def build_channel_embedding(payload: ChannelResponseIn):
             channel_title=processed["channel"]["title"]
         )
 
-    # Aggregate to channel level (mean of weighted video embeddings)
-    channel_vector = np.mean(np.stack(video_embeddings, axis=0), axis=0)
-    channel_vector = channel_vector.astype(float)
-
     return EmbeddingOut(
         embedding=channel_vector.tolist(),
         dim=int(channel_vector.shape[0]),
-        videos_processed=len(video_embeddings),
+        videos_processed=videos_processed,
         channel_title=processed["channel"]["title"]
     )
+
+
+@router.post("/channel-embeddings/bulk")
+async def bulk_channel_embeddings(payload: BulkChannelEmbeddingRequest):
+    """
+    Channel embeddings for many channel IDs, streamed back as NDJSON (one channel per line)
+    as each chunk of BULK_CHUNK_CHANNELS finishes. YouTube lookups are batched 50 IDs per call
+    and the NLP stages run over the pooled videos of a whole chunk; the next chunk is fetched
+    while the current one is being embedded.
+    """
+    channel_ids = list(dict.fromkeys(cid.strip() for cid in payload.channel_ids if cid.strip()))
+    if len(channel_ids) > BULK_MAX_CHANNELS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_MAX_CHANNELS} channel IDs per request")
+
+    chunk_size = max(1, BULK_CHUNK_CHANNELS)
+    chunks = [channel_ids[i:i + chunk_size] for i in range(0, len(channel_ids), chunk_size)]
+
+    async def stream():
+        if not chunks:
+            return
+        next_fetch = asyncio.create_task(fetch_channel_profiles_bulk_async(chunks[0], max_results=RECENT_VIDEOS))
+        # Cancel the prefetch of the next chunk if the client disconnects or the stream is closed early
+        try:
+            for i, chunk in enumerate(chunks):
+                try:
+                    profiles = await next_fetch
+                except Exception:
+                    profiles = {}
+                    logging.exception("Bulk channel fetch failed")
+                if i + 1 < len(chunks):
+                    next_fetch = asyncio.create_task(
+                        fetch_channel_profiles_bulk_async(chunks[i + 1], max_results=RECENT_VIDEOS)
+                    )
+
+                found = [cid for cid in chunk if profiles.get(cid) is not None]
+                for cid in chunk:
+                    if profiles.get(cid) is None:
+                        yield json.dumps({"channel_id": cid, "error": "Channel not found"}) + "\n"
+                if not found:
+                    continue
+
+                try:
+                    results = await run_cpu(embed_channel_profiles_bulk, [profiles[cid] for cid in found])
+                except Exception as e:
+                    logging.exception("Bulk channel embedding failed")
+                    for cid in found:
+                        yield json.dumps({"channel_id": cid, "error": str(e)}) + "\n"
+                    continue
+
+                for cid, (vector, videos_processed) in zip(found, results):
+                    channel_cache.put(cid, profiles[cid], vector)
+                    line = EmbeddingOut(
+                        embedding=vector.tolist(),
+                        dim=int(vector.shape[0]),
+                        videos_processed=videos_processed,
+                        channel_title=profiles[cid]["channel_title"],
+                    ).dict()
+                    line["channel_id"] = cid
+                    yield json.dumps(line) + "\n"
+        finally:
+            if not next_fetch.done():
+                next_fetch.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
@@ -1,24 +1,21 @@
 from fastapi import APIRouter, HTTPException
 import requests
-from app.config import YOUTUBE_API_KEY
+from app.services.http_client import youtube_client
 
 # print("Loaded API Key:", YOUTUBE_API_KEY)  # Removed to avoid logging sensitive information
 
 router = APIRouter(prefix="/test", tags=["Test"])
 
-BASE_URL = "https://www.googleapis.com/youtube/v3"
-
 @router.get("/channel-info/{channel_id}")
 def get_channel_info(channel_id: str):
-    url = f"{BASE_URL}/channels"
     params = {
         "part": "snippet,statistics",
         "id": channel_id,
-        "key": YOUTUBE_API_KEY
     }
-    response = requests.get(url, params=params)
-    data = response.json()
-    print(data)
+    try:
+        data = youtube_client.get_json("channels", params, timeout=15)
+    except requests.RequestException as e:
+        raise HTTPException(status_code=502, detail=f"YouTube API unreachable: {e}")
     if "items" not in data or len(data["items"]) == 0:
         raise HTTPException(status_code=404, detail="Channel not found")
 
@@ -1,34 +1,41 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from app.models.user import UserProfileRequest, UserProfileResponse, VideoInfo
-from app.services.youtube_service import get_channel_details, get_channel_videos
+from app.services.channel_cache import get_channel_profile, get_channel_profile_async
 
 router = APIRouter(prefix="/user-profiling", tags=["User Profiling Tower"])
 
-@router.post("/", response_model=UserProfileResponse)
-def get_user_profile(request: UserProfileRequest):
-    # Fetch channel details and recent videos
-    channel_data = get_channel_details(request.channel_id)
-    videos_data = get_channel_videos(request.channel_id, max_results=11)
-
-    channel_info = channel_data["items"][0]
-
+def _profile_response(profile: dict) -> UserProfileResponse:
     # Prepare recent video info
     recent_videos = []
-    for v in videos_data["videos"]:   # <-- now using "videos" instead of "items"
+    for v in profile["recent_videos"]:
         video_info = VideoInfo(
             title=v.get("title", ""),
             description=v.get("description", ""),
             thumbnail_url=v.get("thumbnail_url", ""),
-            view_count=int(v.get("viewCount", 0))   # <-- include viewCount
+            view_count=int(v.get("view_count", 0))
         )
         recent_videos.append(video_info)
 
     # Build response
-    response = UserProfileResponse(
-        channel_title=channel_info["snippet"]["title"],
-        subscriber_count=int(channel_info["statistics"].get("subscriberCount", 0)),
-        total_videos=int(channel_info["statistics"].get("videoCount", 0)),
+    return UserProfileResponse(
+        channel_title=profile["channel_title"],
+        subscriber_count=profile["subscriber_count"],
+        total_videos=profile["total_videos"],
         recent_videos=recent_videos
     )
 
-    return response
+@router.post("/", response_model=UserProfileResponse)
+def get_user_profile(request: UserProfileRequest):
+    # Fetch channel details and recent videos (served from the channel cache when still fresh)
+    profile = get_channel_profile(request.channel_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Channel not found")
+    return _profile_response(profile)
+
+@router.post("/async", response_model=UserProfileResponse)
+async def get_user_profile_async(request: UserProfileRequest):
+    # Same as get_user_profile, but the YouTube calls are awaited instead of blocking a worker
+    profile = await get_channel_profile_async(request.channel_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Channel not found")
+    return _profile_response(profile)
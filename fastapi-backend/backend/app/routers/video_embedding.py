@@ -1,57 +1,27 @@
-import json
-import re
-from typing import List
-
-from gradio_client import Client
-from fastapi import APIRouter, HTTPException
+import numpy as np
+from fastapi import APIRouter, HTTPException, Request
 from app.models.embedding_models import VideoInput
+from app.services.vidtower_service import get_vidtower_service, VidTowerError
+from app.services.wire_format import array_response
 
 router = APIRouter(prefix="/video-tower", tags=["Fusion Model"])
 
-# Initialize the Hugging Face Gradio client once
-client = Client("MeshMax/VidTower")
-
-# Request body model
 
 @router.post("/get-video-embedding/")
-async def get_video_embedding(video: VideoInput):
-    """Return the video embedding as a list[float] regardless of upstream format."""
+async def get_video_embedding(video: VideoInput, request: Request):
+    """
+    Return the video embedding as a list[float] regardless of upstream format, or packed /
+    raw float32/float16 when the Accept header asks for it (see app.services.wire_format).
+    """
     try:
-        result = client.predict(
-            title=video.title,
-            description=video.description,
-            tags=video.tags,
-            thumbnail_url=video.thumbnail_url,
-            api_name="/predict",
-        )
-
-        embedding: List[float]
+        embedding = await get_vidtower_service().embed_async(video)
+        return array_response(request, {"embedding": np.asarray(embedding, dtype=np.float32)},
+                              lambda: {"embedding": embedding})
+    except VidTowerError as e:
+        raise HTTPException(status_code=502, detail=str(e))
 
-        # Normalize various possible response shapes into a list[float]
-        if isinstance(result, (list, tuple)):
-            embedding = [float(x) for x in result]
-        elif hasattr(result, "tolist"):
-            embedding = [float(x) for x in result.tolist()]
-        elif isinstance(result, str):
-            # Try JSON first: e.g., "[0.1, 0.2, ...]"
-            parsed = None
-            try:
-                parsed = json.loads(result)
-            except Exception:
-                parsed = None
-            if isinstance(parsed, (list, tuple)):
-                embedding = [float(x) for x in parsed]
-            else:
-                # Fallback: extract all numbers from the string
-                nums = re.findall(r"[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?", result)
-                if not nums:
-                    raise HTTPException(status_code=502, detail="VidTower returned a string without numeric values")
-                embedding = [float(x) for x in nums]
-        else:
-            raise HTTPException(status_code=502, detail=f"Unexpected VidTower response type: {type(result).__name__}")
 
-        return {"embedding": embedding}
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=502, detail=str(e))
+@router.get("/cache-stats")
+def get_video_embedding_cache_stats():
+    """VidTower backend, in-flight calls and embedding cache hit rate / memory use."""
+    return get_vidtower_service().stats()
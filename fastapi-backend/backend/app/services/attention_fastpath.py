@@ -0,0 +1,108 @@
+"""
+Single-token fast path for nn.MultiheadAttention at inference.
+
+With one query and one key/value token the attention softmax is identically 1, so the block
+reduces to out_proj(v_proj(kv)) and the Q/K projections, scores and head reshapes are dead
+work. The V and output projections fold into one linear map:
+
+    W = W_out @ W_v,   b = W_out @ b_v + b_out
+
+Check the fused path against nn.MultiheadAttention for both fusion models with
+
+    python -m app.services.attention_fastpath
+"""
+import sys
+import json
+from typing import Tuple, Optional, Dict, Any
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+
+def _value_projection(attn: nn.MultiheadAttention) -> Tuple[torch.Tensor, Optional[torch.Tensor]]:
+    e = attn.embed_dim
+    if attn._qkv_same_embed_dim:
+        weight = attn.in_proj_weight[2 * e:]
+    else:
+        weight = attn.v_proj_weight
+    bias = attn.in_proj_bias[2 * e:] if attn.in_proj_bias is not None else None
+    return weight, bias
+
+
+def _fused_value_output(attn: nn.MultiheadAttention) -> Tuple[torch.Tensor, Optional[torch.Tensor]]:
+    """Folded (W, b), cached on the module and rebuilt whenever the source weights change."""
+    out = attn.out_proj
+    sources = (attn.in_proj_weight, attn.v_proj_weight, attn.in_proj_bias, out.weight, out.bias)
+    # Parameter version counters move on every in-place update (load_state_dict, optimizer steps)
+    key = tuple((id(t), t._version, t.device, t.dtype) if t is not None else None for t in sources)
+    cached = getattr(attn, "_fused_value_output", None)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    v_weight, v_bias = _value_projection(attn)
+    with torch.no_grad():
+        weight = out.weight @ v_weight
+        bias = out.bias.clone() if out.bias is not None else None
+        if v_bias is not None:
+            bias = out.weight @ v_bias + (bias if bias is not None else 0)
+    attn._fused_value_output = (key, (weight, bias))
+    return weight, bias
+
+
+def can_use_fastpath(attn: nn.MultiheadAttention, query: torch.Tensor, key_value: torch.Tensor) -> bool:
+    """Inference (no dropout), batch_first, one query and one key/value token, no extra keys."""
+    return (
+        not attn.training
+        and attn.batch_first
+        and query.dim() == 3 and key_value.dim() == 3
+        and query.shape[1] == 1 and key_value.shape[1] == 1
+        and attn.bias_k is None and not attn.add_zero_attn
+    )
+
+
+def attend(attn: nn.MultiheadAttention, query: torch.Tensor, key_value: torch.Tensor) -> torch.Tensor:
+    """attn(query, key_value, key_value)[0], through the folded linear map when it is exact."""
+    if can_use_fastpath(attn, query, key_value):
+        weight, bias = _fused_value_output(attn)
+        return F.linear(key_value, weight, bias)
+    return attn(query, key_value, key_value)[0]
+
+
+# -------------------------
+# Equivalence check
+# -------------------------
+
+def equivalence_report(batch_sizes=(1, 8, 256), atol: float = 1e-5) -> Dict[str, Any]:
+    """Max abs difference of fast path vs nn.MultiheadAttention for every block of both models."""
+    from app.routers import heatmap_cross_attention as cross
+    from app.routers import heatmap_cross_attention_at_2 as bicross
+
+    blocks = {
+        "bicross.video_to_user": bicross.get_model().video_to_user,
+        "bicross.user_to_video": bicross.get_model().user_to_video,
+        "cross.user_content_attn": cross.get_model().user_content_attn,
+        "cross.user_context_attn": cross.get_model().user_context_attn,
+        "cross.content_context_attn": cross.get_model().content_context_attn,
+    }
+    gen = torch.Generator().manual_seed(0)
+    report: Dict[str, Any] = {}
+    with torch.no_grad():
+        for name, block in blocks.items():
+            attn = block.attn
+            device = attn.out_proj.weight.device
+            diffs = {}
+            for batch in batch_sizes:
+                q = torch.randn(batch, 1, attn.embed_dim, generator=gen).to(device)
+                kv = torch.randn(batch, 1, attn.embed_dim, generator=gen).to(device)
+                reference = attn(q, kv, kv)[0]
+                diffs[str(batch)] = float((attend(attn, q, kv) - reference).abs().max())
+            report[name] = diffs
+    report["atol"] = atol
+    report["passed"] = all(max(d.values()) <= atol for k, d in report.items() if isinstance(d, dict))
+    return report
+
+
+if __name__ == "__main__":
+    result = equivalence_report()
+    print(json.dumps(result, indent=2))
+    sys.exit(0 if result["passed"] else 1)
@@ -0,0 +1,193 @@
+import time
+import logging
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional, Dict, Any, Callable, Awaitable, Tuple
+
+import numpy as np
+
+from app.config import CHANNEL_CACHE_TTL_SECONDS, CHANNEL_CACHE_MAX_ENTRIES
+from app.services.youtube_service import (
+    fetch_channel_profile,
+    fetch_channel_profile_async,
+    get_latest_upload_id,
+    get_latest_upload_id_async,
+)
+from app.services.executor import run_cpu
+from app.services.metrics import register_stats_source
+
+RECENT_VIDEOS = 11
+
+# -------------------------
+# In-process channel cache
+# -------------------------
+
+class ChannelCache:
+    """
+    Channel profile + embedding cache keyed by channel_id.
+    Entries younger than ttl_seconds are served without any network call. Older entries are
+    revalidated with one playlistItems(maxResults=1) call and only dropped when the newest
+    upload has changed.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int,
+                 latest_upload_fn: Callable[[str], Optional[str]] = get_latest_upload_id,
+                 latest_upload_async_fn: Callable[[str], Awaitable[Optional[str]]] = get_latest_upload_id_async):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, int(max_entries))
+        self._latest_upload_fn = latest_upload_fn
+        self._latest_upload_async_fn = latest_upload_async_fn
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _lookup(self, channel_id: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """(entry, expired) for a lookup; counts fresh hits and plain misses."""
+        with self._lock:
+            entry = self._entries.get(channel_id)
+            if entry is None:
+                self.misses += 1
+                return None, False
+            if time.monotonic() - entry["validated_at"] < self.ttl_seconds:
+                self._entries.move_to_end(channel_id)
+                self.hits += 1
+                return entry, False
+            return entry, True
+
+    def _apply_upload_check(self, channel_id: str, entry: Dict[str, Any],
+                            latest: Optional[str]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if latest is None:
+                # Check failed; serve the stale entry rather than a full rebuild that would fail too
+                logging.warning(f"Upload check failed for channel {channel_id}; serving cached profile.")
+                self.hits += 1
+                return entry
+            if latest == entry["newest_video_id"]:
+                entry["validated_at"] = time.monotonic()
+                self._entries.move_to_end(channel_id)
+                self.revalidations += 1
+                return entry
+            self._entries.pop(channel_id, None)
+            self.invalidations += 1
+            self.misses += 1
+            return None
+
+    def get(self, channel_id: str) -> Optional[Dict[str, Any]]:
+        entry, expired = self._lookup(channel_id)
+        if entry is None or not expired:
+            return entry
+        # TTL expired: cheap upload check outside the lock
+        latest = self._latest_upload_fn(entry["uploads_playlist"]) if entry["uploads_playlist"] else None
+        return self._apply_upload_check(channel_id, entry, latest)
+
+    async def get_async(self, channel_id: str) -> Optional[Dict[str, Any]]:
+        entry, expired = self._lookup(channel_id)
+        if entry is None or not expired:
+            return entry
+        latest = await self._latest_upload_async_fn(entry["uploads_playlist"]) if entry["uploads_playlist"] else None
+        return self._apply_upload_check(channel_id, entry, latest)
+
+    def put(self, channel_id: str, profile: Dict[str, Any], embedding: Optional[np.ndarray] = None):
+        recent = profile.get("recent_videos") or []
+        entry = {
+            "profile": profile,
+            "embedding": embedding,
+            "uploads_playlist": profile.get("uploads_playlist", ""),
+            "newest_video_id": recent[0].get("video_id", "") if recent else "",
+            "validated_at": time.monotonic(),
+        }
+        with self._lock:
+            self._entries[channel_id] = entry
+            self._entries.move_to_end(channel_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, channel_id: str):
+        with self._lock:
+            if self._entries.pop(channel_id, None) is not None:
+                self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.revalidations + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "revalidations": self.revalidations,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": (self.hits + self.revalidations) / lookups if lookups else None,
+            }
+
+
+channel_cache = ChannelCache(CHANNEL_CACHE_TTL_SECONDS, CHANNEL_CACHE_MAX_ENTRIES)
+register_stats_source("channel_cache", channel_cache.stats)
+
+
+def get_channel_profile(channel_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Channel stats + recent videos, from the cache when still valid.
+    Returns None if the channel does not exist.
+    """
+    entry = channel_cache.get(channel_id)
+    if entry is not None:
+        return entry["profile"]
+    profile = fetch_channel_profile(channel_id, max_results=RECENT_VIDEOS)
+    if profile is None:
+        return None
+    channel_cache.put(channel_id, profile)
+    return profile
+
+
+def get_channel_embedding(channel_id: str) -> Optional[np.ndarray]:
+    """
+    Channel (user) embedding; a warm hit skips both the YouTube fetch and the NLP pipeline.
+    Returns None if the channel does not exist.
+    """
+    entry = channel_cache.get(channel_id)
+    if entry is not None and entry["embedding"] is not None:
+        return entry["embedding"]
+
+    profile = entry["profile"] if entry is not None else fetch_channel_profile(channel_id, max_results=RECENT_VIDEOS)
+    if profile is None:
+        return None
+    from app.services.embedding_service import embed_channel_profile  # NLP models only when embedding
+
+    embedding, _ = embed_channel_profile(profile)
+    channel_cache.put(channel_id, profile, embedding)
+    return embedding
+
+
+async def get_channel_profile_async(channel_id: str) -> Optional[Dict[str, Any]]:
+    """Non-blocking get_channel_profile: YouTube calls are awaited, never block a worker."""
+    entry = await channel_cache.get_async(channel_id)
+    if entry is not None:
+        return entry["profile"]
+    profile = await fetch_channel_profile_async(channel_id, max_results=RECENT_VIDEOS)
+    if profile is None:
+        return None
+    channel_cache.put(channel_id, profile)
+    return profile
+
+
+async def get_channel_embedding_async(channel_id: str) -> Optional[np.ndarray]:
+    """Non-blocking get_channel_embedding: network I/O is awaited, model work runs on the CPU executor."""
+    entry = await channel_cache.get_async(channel_id)
+    if entry is not None and entry["embedding"] is not None:
+        return entry["embedding"]
+
+    profile = entry["profile"] if entry is not None else await fetch_channel_profile_async(
+        channel_id, max_results=RECENT_VIDEOS
+    )
+    if profile is None:
+        return None
+    from app.services.embedding_service import embed_channel_profile
+
+    embedding, _ = await run_cpu(embed_channel_profile, profile)
+    channel_cache.put(channel_id, profile, embedding)
+    return embedding
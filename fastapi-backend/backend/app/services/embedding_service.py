@@ -1,21 +1,51 @@
 import re
+import random
+import hashlib
 import numpy as np
 import logging
 from threading import Lock
-import transformers
+from concurrent.futures import ThreadPoolExecutor
 import torch
-from sentence_transformers import SentenceTransformer
-from transformers import pipeline
-from typing import Optional, Dict, Any
+from typing import TYPE_CHECKING, Optional, Dict, Any, List, Tuple
+from app.config import (
+    NER_BATCH_SIZE,
+    NER_MAX_BATCH_CHARS,
+    EMBED_BATCH_SIZE,
+    TOPIC_ENGINE,
+    TOPIC_CASCADE_TOP_K,
+    TOPIC_CASCADE_AUDIT_RATE,
+    NLI_BATCH_SIZE,
+    NLI_MAX_BATCH_CHARS,
+    MODEL_QUANTIZATION,
+    WARMUP_BATCH_SIZE,
+)
+from app.services.feature_cache import get_feature_cache
+from app.services.quantization import int8_enabled, quantize_int8, quantize_pipeline
+from app.services.metrics import timed, model_timer, register_stats_source
+from app.services.warmup import register_model
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
 # Lazy-loaded global model holders
 
 _models = {
     "ner": None,
     "classifier": None,
-    "embedder": None
+    "embedder": None,
+    "label_embeddings": None
 }
 _models_lock = Lock()
 
+# Running agreement between cascade and full NLI top-5 topics (see score_topics_batch)
+_cascade_stats = {"videos": 0, "audited": 0, "agreement_sum": 0.0, "skipped": 0}
+_cascade_stats_lock = Lock()
+# Audits run the full NLI pass off the request path, one video batch at a time; when more than
+# CASCADE_AUDIT_MAX_PENDING sampled videos are queued, new samples are skipped instead of queued
+_cascade_audit_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cascade-audit")
+_cascade_audit_pending = 0
+CASCADE_AUDIT_MAX_PENDING = 64
+
 # Candidate labels (you can reuse your big list or a smaller curated list)
 CANDIDATE_LABELS = [
     'animation', 'cartoon', '3D', 'short film', 'stop motion',
@@ -49,42 +79,146 @@ CANDIDATE_LABELS = [
     'series', 'tv', 'performance', 'trailer', 'preview', 'teaser',
     'clip', 'announcement']
 
+NER_MODEL_NAME = "tner/twitter-roberta-base-dec2021-tweetner7-all"
+CLASSIFIER_MODEL_NAME = "facebook/bart-large-mnli"
+EMBEDDER_MODEL_NAME = "paraphrase-multilingual-MiniLM-L12-v2"
+
+# De-duplicated labels (order preserved) used by the embedding topic engine
+TOPIC_LABELS = list(dict.fromkeys(CANDIDATE_LABELS))
+TOPIC_ENGINES = ("embedding", "nli", "cascade")
+TOP_K_TOPICS = 5
+NLI_HYPOTHESIS_TEMPLATE = "This example is {}."
+
+# Everything that changes the derived per-video features; part of every feature cache key
+FEATURE_VERSION = "|".join([
+    "v1",
+    NER_MODEL_NAME,
+    EMBEDDER_MODEL_NAME,
+    TOPIC_ENGINE,
+    CLASSIFIER_MODEL_NAME if TOPIC_ENGINE in ("nli", "cascade") else "-",
+    str(TOPIC_CASCADE_TOP_K) if TOPIC_ENGINE == "cascade" else "-",
+    hashlib.sha1("\n".join(CANDIDATE_LABELS).encode("utf-8")).hexdigest()[:12],
+] + ([MODEL_QUANTIZATION] if MODEL_QUANTIZATION != "none" else []))
+
 # -------------------------
 # Helper utilities
 # -------------------------
 
-def _lazy_load_models():
+# transformers / sentence_transformers are imported by the loaders, not at module import, so
+# starting the server (or a router that never embeds text) does not pay for them
+
+def _load_embedder_locked():
+    if _models["embedder"] is None:
+        from sentence_transformers import SentenceTransformer
+
+        embedder_device = "cuda" if torch.cuda.is_available() else "cpu"
+        _models["embedder"] = SentenceTransformer(
+            EMBEDDER_MODEL_NAME,
+            device=embedder_device
+        )
+        if int8_enabled():
+            _models["embedder"] = quantize_int8(_models["embedder"])
+        logging.info(f"SentenceTransformer embedder loaded on {embedder_device.upper()}.")
+
+def get_text_embedder() -> "SentenceTransformer":
+    """The shared MiniLM embedder on its own (without loading NER or the classifier)."""
+    with _models_lock:
+        _load_embedder_locked()
+        return _models["embedder"]
+
+def _lazy_load_models(include_classifier: Optional[bool] = None):
     """
     Load heavy models once (thread-safe).
     Uses GPU if available, otherwise CPU.
+    The bart-large-mnli classifier is only loaded when the configured topic engine needs it
+    (or include_classifier=True); the topic label matrix is embedded once with the embedder.
+    With MODEL_QUANTIZATION=int8 the linear layers of every model are quantized as they load.
     """
-    device = 0 if torch.cuda.is_available() else -1  # HF pipeline expects int
-    embedder_device = "cuda" if torch.cuda.is_available() else "cpu"
+    if include_classifier is None:
+        include_classifier = TOPIC_ENGINE in ("nli", "cascade")
 
     with _models_lock:
-        if _models["ner"] is None:
-            _models["ner"] = pipeline(
-                "ner",
-                model="tner/twitter-roberta-base-dec2021-tweetner7-all",
-                aggregation_strategy="simple",
-                device=device
-            )
-            logging.info(f"NER pipeline loaded on {'GPU' if device == 0 else 'CPU'}.")
+        _load_ner_locked()
+        if include_classifier:
+            _load_classifier_locked()
+        _load_embedder_locked()
+        _load_label_embeddings_locked()
 
-        if _models["classifier"] is None:
-            _models["classifier"] = pipeline(
-                "zero-shot-classification",
-                model="facebook/bart-large-mnli",
-                device=device
-            )
-            logging.info(f"Zero-shot classifier loaded on {'GPU' if device == 0 else 'CPU'}.")
-
-        if _models["embedder"] is None:
-            _models["embedder"] = SentenceTransformer(
-                "paraphrase-multilingual-MiniLM-L12-v2",
-                device=embedder_device
-            )
-            logging.info(f"SentenceTransformer embedder loaded on {embedder_device.upper()}.")
+def _pipeline_device() -> int:
+    return 0 if torch.cuda.is_available() else -1  # HF pipeline expects int
+
+def _load_ner_locked():
+    if _models["ner"] is None:
+        from transformers import pipeline
+
+        device = _pipeline_device()
+        _models["ner"] = pipeline(
+            "ner",
+            model=NER_MODEL_NAME,
+            aggregation_strategy="simple",
+            device=device
+        )
+        if int8_enabled():
+            quantize_pipeline(_models["ner"])
+        logging.info(f"NER pipeline loaded on {'GPU' if device == 0 else 'CPU'}.")
+
+def _load_classifier_locked():
+    if _models["classifier"] is None:
+        from transformers import pipeline
+
+        device = _pipeline_device()
+        _models["classifier"] = pipeline(
+            "zero-shot-classification",
+            model=CLASSIFIER_MODEL_NAME,
+            device=device
+        )
+        if int8_enabled():
+            quantize_pipeline(_models["classifier"])
+        logging.info(f"Zero-shot classifier loaded on {'GPU' if device == 0 else 'CPU'}.")
+
+def _load_label_embeddings_locked():
+    if _models["label_embeddings"] is None:
+        _models["label_embeddings"] = _models["embedder"].encode(
+            TOPIC_LABELS, convert_to_numpy=True, normalize_embeddings=True
+        )
+        logging.info(f"Embedded {len(TOPIC_LABELS)} topic labels.")
+
+# -------------------------
+# Startup warm-up (see app/services/warmup.py): load each model and run one dummy batch
+# -------------------------
+
+WARMUP_TEXTS = [
+    "street food tour in colombo with kottu and hoppers",
+    "elden ring boss rush live stream highlights on playstation 5",
+    "how black holes form explained in ten minutes",
+    "morning vlog and a quick recipe for coconut sambol",
+]
+
+def _warmup_texts() -> List[str]:
+    return [WARMUP_TEXTS[i % len(WARMUP_TEXTS)] for i in range(max(1, WARMUP_BATCH_SIZE))]
+
+def _warm_ner():
+    with _models_lock:
+        _load_ner_locked()
+    texts = _warmup_texts()
+    _models["ner"](texts, batch_size=len(texts))
+
+def _warm_embedder():
+    with _models_lock:
+        _load_embedder_locked()
+        _load_label_embeddings_locked()
+    _models["embedder"].encode(_warmup_texts(), convert_to_numpy=True, normalize_embeddings=True)
+
+def _warm_classifier():
+    with _models_lock:
+        _load_classifier_locked()
+    texts = _warmup_texts()
+    _nli_entailment_scores([(t, TOPIC_LABELS[i % len(TOPIC_LABELS)]) for i, t in enumerate(texts)])
+
+register_model("ner", _warm_ner)
+register_model("embedder", _warm_embedder)
+if TOPIC_ENGINE in ("nli", "cascade"):
+    register_model("zero_shot", _warm_classifier)
 
 def clean_text(text: Optional[str]) -> str:
     if not text:
@@ -95,6 +229,7 @@ def clean_text(text: Optional[str]) -> str:
     t = re.sub(r"\s+", " ", t).strip()
     return t
 
+@timed("nlp.preprocess_youtube_response")
 def preprocess_youtube_response(api_response: Dict[str, Any]) -> Dict[str, Any]:
     """
     Preprocess the API response to structured cleaned format.
@@ -130,15 +265,29 @@ def preprocess_youtube_response(api_response: Dict[str, Any]) -> Dict[str, Any]:
         },
         "videos": processed_videos
     }
-def extract_entities_and_link(processed_video: Dict[str, Any]) -> Dict[str, Any]:
+def _video_text(processed_video: Dict[str, Any]) -> str:
+    return (processed_video.get("clean_title", "") + " " + processed_video.get("clean_description", "")).strip()
+
+def _length_sorted_batches(texts: List[str], batch_size: int, max_batch_chars: int) -> List[List[int]]:
     """
-    Run NER on the combined title + description.
-    Returns a list of extracted entity mentions (without Wikipedia linking).
+    Group text indices into batches of similar length (longest first) so padding stays small.
+    A batch is closed once it reaches batch_size or its padded size (longest text * count)
+    would exceed max_batch_chars.
     """
-    text = (processed_video.get("clean_title", "") + " " + processed_video.get("clean_description", "")).strip()
-    ner = _models["ner"]
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+    batches = []
+    current = []
+    for i in order:
+        longest = len(texts[current[0]]) if current else len(texts[i])
+        if current and (len(current) >= batch_size or longest * (len(current) + 1) > max_batch_chars):
+            batches.append(current)
+            current = []
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
 
-    ner_results = ner(text) if text else []
+def _ner_results_to_mentions(ner_results: List[Dict[str, Any]]) -> Dict[str, Any]:
     mentions = []
 
     for ent in ner_results:
@@ -157,25 +306,252 @@ def extract_entities_and_link(processed_video: Dict[str, Any]) -> Dict[str, Any]
     # Return only extracted mentions
     return {"mentions": mentions, "linked_entities": mentions}
 
+@timed("nlp.extract_entities_and_link")
+def extract_entities_and_link(processed_video: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run NER on the combined title + description.
+    Returns a list of extracted entity mentions (without Wikipedia linking).
+    """
+    text = _video_text(processed_video)
+    ner = _models["ner"]
+
+    if not text:
+        return _ner_results_to_mentions([])
+    with model_timer("ner"):
+        ner_results = ner(text)
+    return _ner_results_to_mentions(ner_results)
+
+@timed("nlp.extract_entities_batch")
+def extract_entities_batch(processed_videos: List[Dict[str, Any]],
+                           batch_size: int = NER_BATCH_SIZE) -> List[Dict[str, Any]]:
+    """
+    Batched variant of extract_entities_and_link for all videos of a channel.
+    Texts are length-sorted into a few padded batches instead of one forward pass per video.
+    Returns one {"mentions", "linked_entities"} dict per input video, in input order.
+    """
+    texts = [_video_text(v) for v in processed_videos]
+    results = [_ner_results_to_mentions([]) for _ in texts]
+    non_empty = [i for i, t in enumerate(texts) if t]
+    if not non_empty:
+        return results
+
+    ner = _models["ner"]
+    batches = _length_sorted_batches([texts[i] for i in non_empty], batch_size, NER_MAX_BATCH_CHARS)
+    for batch in batches:
+        idxs = [non_empty[b] for b in batch]
+        with model_timer("ner"):
+            outputs = ner([texts[i] for i in idxs], batch_size=len(idxs))
+        for i, ner_results in zip(idxs, outputs):
+            results[i] = _ner_results_to_mentions(ner_results)
+    return results
+
+@timed("nlp.score_topics")
 def score_topics(processed_video: Dict[str, Any]) -> Dict[str, Any]:
     """
     Run zero-shot classification on the video text (title+desc) to get top topics and scores.
     """
-    text = (processed_video.get("clean_title", "") + " " + processed_video.get("clean_description", "")).strip()
+    text = _video_text(processed_video)
     if not text:
         return {"topics": [], "scores": []}
+    if _models["classifier"] is None:
+        _lazy_load_models(include_classifier=True)
     classifier = _models["classifier"]
-    res = classifier(text, CANDIDATE_LABELS, multi_label=True)
+    with model_timer("zero_shot"):
+        res = classifier(text, CANDIDATE_LABELS, multi_label=True)
     # res contains 'labels' and 'scores'
-    top_k = min(5, len(res.get("labels", [])))
+    top_k = min(TOP_K_TOPICS, len(res.get("labels", [])))
     labels = res.get("labels", [])[:top_k]
     scores = [float(s) for s in res.get("scores", [])[:top_k]]
     return {"topics": labels, "scores": scores}
 
+def _label_similarities(texts: List[str]) -> np.ndarray:
+    """
+    Cosine similarity of every text against the pre-embedded label matrix, in one product.
+    """
+    embedder = _models["embedder"]
+    label_embs = _models["label_embeddings"]
+    with model_timer("embedder"):
+        text_embs = embedder.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+    return text_embs @ label_embs.T  # [n_texts, n_labels]
 
-def video_to_weighted_embedding(video_struct: Dict[str, Any], global_max_views: float) -> Optional[np.ndarray]:
+def _score_topics_embedding(texts: List[str]) -> List[Dict[str, Any]]:
+    sims = _label_similarities(texts)
+    top_k = min(TOP_K_TOPICS, sims.shape[1])
+    top_idx = np.argsort(-sims, axis=1)[:, :top_k]
+    return [
+        {
+            "topics": [TOPIC_LABELS[j] for j in row],
+            "scores": [float(sims[i, j]) for j in row]
+        }
+        for i, row in enumerate(top_idx)
+    ]
 
-    embedder = _models["embedder"]
+def _nli_entailment_scores(pairs: List[Tuple[str, str]]) -> np.ndarray:
+    """
+    Multi-label entailment probability for each (text, label) pair, computed in
+    length-sorted batches directly on the zero-shot classifier's model.
+    Matches the pipeline's multi_label scoring (softmax over contradiction/entailment).
+    """
+    classifier = _models["classifier"]
+    model, tokenizer = classifier.model, classifier.tokenizer
+    entailment_id = classifier.entailment_id
+    contradiction_id = -1 if entailment_id == 0 else 0
+
+    premises = [p for p, _ in pairs]
+    hypotheses = [NLI_HYPOTHESIS_TEMPLATE.format(label) for _, label in pairs]
+    scores = np.zeros(len(pairs), dtype=np.float32)
+    for batch in _length_sorted_batches(premises, NLI_BATCH_SIZE, NLI_MAX_BATCH_CHARS):
+        inputs = tokenizer(
+            [premises[i] for i in batch],
+            [hypotheses[i] for i in batch],
+            truncation="only_first",
+            padding=True,
+            return_tensors="pt",
+        ).to(model.device)
+        with torch.no_grad(), model_timer("zero_shot"):
+            logits = model(**inputs).logits
+        entail_contr = logits[:, [contradiction_id, entailment_id]].softmax(dim=-1)
+        scores[batch] = entail_contr[:, 1].float().cpu().numpy()
+    return scores
+
+def _score_topics_cascade(texts: List[str], top_k_labels: int = TOPIC_CASCADE_TOP_K) -> List[Dict[str, Any]]:
+    """
+    Stage 1: embedding similarity shortlists the top_k_labels labels per text.
+    Stage 2: one batched NLI pass over every (text, shortlisted label) pair of the channel.
+    """
+    sims = _label_similarities(texts)
+    k = max(TOP_K_TOPICS, min(top_k_labels, sims.shape[1]))
+    shortlist = np.argsort(-sims, axis=1)[:, :k]
+
+    pairs = [(texts[i], TOPIC_LABELS[j]) for i, row in enumerate(shortlist) for j in row]
+    nli_scores = _nli_entailment_scores(pairs).reshape(len(texts), k)
+
+    results = []
+    for i, row in enumerate(shortlist):
+        order = np.argsort(-nli_scores[i])[:TOP_K_TOPICS]
+        results.append({
+            "topics": [TOPIC_LABELS[row[j]] for j in order],
+            "scores": [float(nli_scores[i, j]) for j in order]
+        })
+    return results
+
+def topic_agreement(result: Dict[str, Any], reference: Dict[str, Any]) -> float:
+    """
+    Fraction of the reference top-5 topics that also appear in result's top-5 (1.0 = same set).
+    """
+    ref_topics = set(reference.get("topics", []))
+    if not ref_topics:
+        return 1.0
+    return len(ref_topics & set(result.get("topics", []))) / len(ref_topics)
+
+def get_cascade_agreement_stats() -> Dict[str, Any]:
+    """
+    Agreement of cascade top-5 topics with the full NLI run, over audited videos so far.
+    """
+    with _cascade_stats_lock:
+        stats = dict(_cascade_stats)
+    stats["mean_agreement"] = stats["agreement_sum"] / stats["audited"] if stats["audited"] else None
+    return stats
+
+register_stats_source("topic_cascade", get_cascade_agreement_stats)
+
+def _run_cascade_audit(audited: List[Tuple[Dict[str, Any], Dict[str, Any]]]):
+    global _cascade_audit_pending
+    try:
+        agreements = [topic_agreement(res, score_topics(v)) for v, res in audited]
+    except Exception:
+        logging.exception("Cascade topic audit failed")
+        agreements = []
+    with _cascade_stats_lock:
+        _cascade_audit_pending -= len(audited)
+        _cascade_stats["audited"] += len(agreements)
+        _cascade_stats["agreement_sum"] += sum(agreements)
+    if agreements:
+        logging.info(
+            f"Cascade topic agreement: {sum(agreements) / len(agreements):.3f} on {len(agreements)} videos "
+            f"(running mean {get_cascade_agreement_stats()['mean_agreement']:.3f})."
+        )
+
+def _audit_cascade(processed_videos: List[Dict[str, Any]], results: List[Dict[str, Any]]):
+    """
+    Sample TOPIC_CASCADE_AUDIT_RATE of the videos and queue their full NLI comparison on the
+    audit worker; the request that sampled them does not wait for it.
+    """
+    global _cascade_audit_pending
+    audited = [
+        (v, {"topics": list(res["topics"])}) for v, res in zip(processed_videos, results)
+        if TOPIC_CASCADE_AUDIT_RATE > 0 and random.random() < TOPIC_CASCADE_AUDIT_RATE
+    ]
+    with _cascade_stats_lock:
+        _cascade_stats["videos"] += len(processed_videos)
+        if audited and _cascade_audit_pending + len(audited) > CASCADE_AUDIT_MAX_PENDING:
+            _cascade_stats["skipped"] += len(audited)
+            audited = []
+        _cascade_audit_pending += len(audited)
+    if audited:
+        _cascade_audit_executor.submit(_run_cascade_audit, audited)
+
+@timed("nlp.score_topics_batch")
+def score_topics_batch(processed_videos: List[Dict[str, Any]],
+                       engine: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Score topics for many videos at once with the selected engine (defaults to TOPIC_ENGINE).
+    Returns one {"topics", "scores"} top-5 dict per input video, in input order.
+    """
+    engine = (engine or TOPIC_ENGINE).lower()
+    if engine not in TOPIC_ENGINES:
+        raise ValueError(f"Unknown topic engine '{engine}', expected one of {TOPIC_ENGINES}")
+
+    if engine == "nli":
+        return [score_topics(v) for v in processed_videos]
+
+    texts = [_video_text(v) for v in processed_videos]
+    results = [{"topics": [], "scores": []} for _ in texts]
+    non_empty = [i for i, t in enumerate(texts) if t]
+    if not non_empty:
+        return results
+
+    if engine == "cascade":
+        if _models["classifier"] is None:
+            _lazy_load_models(include_classifier=True)
+        scored = _score_topics_cascade([texts[i] for i in non_empty])
+        _audit_cascade([processed_videos[i] for i in non_empty], scored)
+    else:
+        scored = _score_topics_embedding([texts[i] for i in non_empty])
+
+    for i, res in zip(non_empty, scored):
+        results[i] = res
+    return results
+
+def _compute_video_features(processed_videos: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Run entity extraction and topic scoring over all of a channel's videos in batches.
+    Topics are skipped for entity-heavy videos (more than 10 mentions), as before.
+    """
+    entity_results = extract_entities_batch(processed_videos)
+    to_score = [i for i, el in enumerate(entity_results) if len(el.get("mentions", [])) <= 10]
+    topic_results = {
+        i: res for i, res in zip(to_score, score_topics_batch([processed_videos[i] for i in to_score]))
+    }
+
+    final_videos = []
+    for i, (v, el) in enumerate(zip(processed_videos, entity_results)):
+        topic_info = topic_results.get(i, {"topics": [], "scores": []})
+        final_videos.append({
+            "clean_title": v.get("clean_title"),
+            "clean_description": v.get("clean_description"),
+            "view_count": v.get("view_count", 0),
+            "linked_entities": el.get("linked_entities", []),
+            "topics": topic_info.get("topics", []),
+            "scores": topic_info.get("scores", [])
+        })
+    return final_videos
+
+
+# Segment weights for the title+description, entity and topic texts of a video
+SEGMENT_WEIGHTS = (0.6, 0.25, 0.15)
+
+def _segment_texts(video_struct: Dict[str, Any]) -> Tuple[List[str], List[float]]:
     title = video_struct.get("clean_title", "")
     desc = video_struct.get("clean_description", "")
     entities = [e["entity"] for e in video_struct.get("linked_entities", []) if e.get("entity")]
@@ -186,21 +562,182 @@ def video_to_weighted_embedding(video_struct: Dict[str, Any], global_max_views:
 
     if title or desc:
         texts.append(f"{title} {desc}")
-        weights.append(0.6)
+        weights.append(SEGMENT_WEIGHTS[0])
     if entities:
         texts.append(" ".join(entities))
-        weights.append(0.25)
+        weights.append(SEGMENT_WEIGHTS[1])
     if topics:
         texts.append(" ".join(topics))
-        weights.append(0.15)
+        weights.append(SEGMENT_WEIGHTS[2])
+
+    return texts, weights
+
+def video_to_weighted_embedding(video_struct: Dict[str, Any], global_max_views: float) -> Optional[np.ndarray]:
+
+    embedder = _models["embedder"]
+    texts, weights = _segment_texts(video_struct)
 
     if not texts:
         return None
 
-    embs = embedder.encode(texts, convert_to_numpy=True)
+    with model_timer("embedder"):
+        embs = embedder.encode(texts, convert_to_numpy=True)
     embs = np.average(embs, axis=0, weights=weights)
 
     view_count = float(video_struct.get("view_count", 0) or 0)
     weight = view_count / max(1.0, global_max_views)
     return embs * weight
 
+@timed("nlp.video_base_embeddings")
+def video_base_embeddings(final_videos: List[Dict[str, Any]],
+                          batch_size: int = EMBED_BATCH_SIZE) -> List[Optional[np.ndarray]]:
+    """
+    Segment-weighted (not yet view-weighted) embedding of every video, from a single
+    embedder.encode call over all segment texts (encode length-sorts its own batches).
+    Videos without any text get None.
+    """
+    texts = []
+    seg_rows, seg_cols, seg_vals = [], [], []
+    valid = []
+
+    for i, v in enumerate(final_videos):
+        seg_texts, seg_weights = _segment_texts(v)
+        if not seg_texts:
+            continue
+        total = sum(seg_weights)
+        for t, w in zip(seg_texts, seg_weights):
+            seg_rows.append(len(valid))
+            seg_cols.append(len(texts))
+            seg_vals.append(w / total)
+            texts.append(t)
+        valid.append(i)
+
+    results: List[Optional[np.ndarray]] = [None] * len(final_videos)
+    if not texts:
+        return results
+
+    embedder = _models["embedder"]
+    with model_timer("embedder"):
+        embs = embedder.encode(texts, batch_size=batch_size, convert_to_numpy=True)  # [n_texts, dim]
+
+    segment_matrix = np.zeros((len(valid), len(texts)), dtype=np.float64)
+    segment_matrix[seg_rows, seg_cols] = seg_vals
+    base = segment_matrix @ embs  # [n_valid, dim]
+    for row, i in enumerate(valid):
+        results[i] = base[row]
+    return results
+
+@timed("nlp.channel_embedding_batch")
+def channel_embedding_batch(final_videos: List[Dict[str, Any]], global_max_views: float,
+                            batch_size: int = EMBED_BATCH_SIZE) -> Tuple[Optional[np.ndarray], int]:
+    """
+    Channel-level equivalent of averaging video_to_weighted_embedding over all videos.
+    Base embeddings already attached by build_video_features are reused; the rest come
+    from one batched encode. View-count weights and the mean are applied as one product.
+    Returns (channel_vector, videos_processed); channel_vector is None if no video had text.
+    """
+    missing = [i for i, v in enumerate(final_videos) if "embedding" not in v]
+    computed = dict(zip(missing, video_base_embeddings([final_videos[i] for i in missing], batch_size)))
+
+    base_embs, view_weights = [], []
+    for i, v in enumerate(final_videos):
+        emb = computed[i] if i in computed else v["embedding"]
+        if emb is None:
+            continue
+        base_embs.append(emb)
+        view_count = float(v.get("view_count", 0) or 0)
+        view_weights.append(view_count / max(1.0, global_max_views))
+
+    if not base_embs:
+        return None, 0
+
+    # mean over videos of (view weight * segment-weighted average)
+    weights = np.asarray(view_weights, dtype=np.float64) / len(base_embs)
+    channel_vector = (weights @ np.stack(base_embs, axis=0)).astype(float)
+    return channel_vector, len(base_embs)
+
+def _feature_key(processed_video: Dict[str, Any]) -> str:
+    payload = "\x00".join([
+        FEATURE_VERSION,
+        processed_video.get("clean_title") or "",
+        processed_video.get("clean_description") or "",
+    ])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+@timed("nlp.build_video_features")
+def build_video_features(processed_videos: List[Dict[str, Any]], use_cache: bool = True) -> List[Dict[str, Any]]:
+    """
+    Entities, topics and base embedding for every video of a channel.
+    Videos already in the persistent feature cache (same cleaned text and model versions)
+    are served from it; only the rest go through NER, topic scoring and the embedder.
+    use_cache=False computes everything (e.g. to compare model variants).
+    """
+    cache = get_feature_cache() if use_cache else None
+    keys = [_feature_key(v) for v in processed_videos]
+    cached = cache.get_many(keys) if cache is not None else {}
+
+    missing = [i for i, k in enumerate(keys) if k not in cached]
+    fresh = {}
+    if missing:
+        computed = _compute_video_features([processed_videos[i] for i in missing])
+        for i, features, emb in zip(missing, computed, video_base_embeddings(computed)):
+            features["embedding"] = emb
+            fresh[keys[i]] = {
+                "linked_entities": features["linked_entities"],
+                "topics": features["topics"],
+                "scores": features["scores"],
+                "embedding": emb,
+            }
+        if cache is not None:
+            cache.put_many(fresh)
+
+    final_videos = []
+    for v, key in zip(processed_videos, keys):
+        entry = cached.get(key) or fresh[key]
+        final_videos.append({
+            "clean_title": v.get("clean_title"),
+            "clean_description": v.get("clean_description"),
+            "view_count": v.get("view_count", 0),
+            "linked_entities": entry["linked_entities"],
+            "topics": entry["topics"],
+            "scores": entry["scores"],
+            "embedding": entry["embedding"],
+        })
+    return final_videos
+
+@timed("nlp.embed_channel_profiles_bulk")
+def embed_channel_profiles_bulk(api_responses: List[Dict[str, Any]],
+                                use_cache: bool = True) -> List[Tuple[np.ndarray, int]]:
+    """
+    Full NLP stage for many channel responses (channel_title + recent_videos) at once.
+    The videos of all channels are pooled so NER, topic scoring and the embedder run in
+    large batches over the combined set; aggregation is then done per channel.
+    Returns one (channel_vector, videos_processed) per response; a zero vector if no video had text.
+    """
+    _lazy_load_models()
+    processed = [preprocess_youtube_response(r) for r in api_responses]
+    all_videos = [v for p in processed for v in p.get("videos", [])]
+    all_features = build_video_features(all_videos, use_cache=use_cache)
+
+    results = []
+    offset = 0
+    for p in processed:
+        videos = p.get("videos", [])
+        final_videos = all_features[offset:offset + len(videos)]
+        offset += len(videos)
+        max_views = max([v.get("view_count", 0) for v in videos]) if videos else 1.0
+
+        channel_vector, videos_processed = channel_embedding_batch(final_videos, global_max_views=max_views)
+        if channel_vector is None:
+            embedder = _models["embedder"]
+            channel_vector, videos_processed = np.zeros(embedder.get_sentence_embedding_dimension(), dtype=float), 0
+        results.append((channel_vector, videos_processed))
+    return results
+
+def embed_channel_profile(api_response: Dict[str, Any]) -> Tuple[np.ndarray, int]:
+    """
+    Full NLP stage for a channel response (channel_title + recent_videos):
+    preprocessing, cached per-video features and view-weighted aggregation.
+    Returns (channel_vector, videos_processed); a zero vector if no video had text.
+    """
+    return embed_channel_profiles_bulk([api_response])[0]
@@ -0,0 +1,21 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Any
+
+from app.config import CPU_EXECUTOR_WORKERS
+
+# Bounded pool for CPU-bound model work (NER, embeddings, fusion) called from async routes,
+# so model calls never run on the event loop and never outnumber the cores they compete for.
+cpu_executor = ThreadPoolExecutor(max_workers=CPU_EXECUTOR_WORKERS, thread_name_prefix="cpu-model")
+
+
+async def run_cpu(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a CPU-bound callable on the bounded model executor and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cpu_executor, functools.partial(fn, *args, **kwargs))
+
+
+async def run_blocking_io(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking network call (e.g. a sync SDK) on the default thread pool."""
+    return await asyncio.to_thread(fn, *args, **kwargs)
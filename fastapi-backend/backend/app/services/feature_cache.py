@@ -0,0 +1,144 @@
+import json
+import sqlite3
+import time
+import logging
+from threading import Lock
+from typing import Optional, Dict, Any, List
+
+import numpy as np
+
+from app.config import FEATURE_CACHE_ENABLED, FEATURE_CACHE_PATH, FEATURE_CACHE_MAX_ENTRIES
+from app.services.metrics import register_stats_source
+
+# -------------------------
+# Persistent per-video feature store
+# -------------------------
+
+class FeatureCache:
+    """
+    SQLite-backed store of per-video derived features (entities, topics, base embedding).
+    Keys are content hashes computed by the caller; entries are evicted least-recently-used
+    once the table grows past max_entries.
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max(1, int(max_entries))
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS video_features (
+                key TEXT PRIMARY KEY,
+                features TEXT NOT NULL,
+                embedding BLOB,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_video_features_last_access ON video_features (last_access)"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Return {key: features} for every key present; features carry an "embedding" ndarray (or None).
+        """
+        unique = list(dict.fromkeys(keys))
+        if not unique:
+            return {}
+        found = {}
+        with self._lock:
+            placeholders = ",".join("?" for _ in unique)
+            rows = self._conn.execute(
+                f"SELECT key, features, embedding FROM video_features WHERE key IN ({placeholders})",
+                unique,
+            ).fetchall()
+            for key, features, embedding in rows:
+                entry = json.loads(features)
+                entry["embedding"] = np.frombuffer(embedding, dtype=np.float64).copy() if embedding is not None else None
+                found[key] = entry
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE video_features SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._conn.commit()
+            self.hits += sum(1 for k in keys if k in found)
+            self.misses += sum(1 for k in keys if k not in found)
+        return found
+
+    def put_many(self, entries: Dict[str, Dict[str, Any]]):
+        """
+        Store features by key; an "embedding" value is stored as a float64 blob.
+        """
+        if not entries:
+            return
+        now = time.time()
+        rows = []
+        for key, entry in entries.items():
+            features = {k: v for k, v in entry.items() if k != "embedding"}
+            embedding = entry.get("embedding")
+            blob = np.asarray(embedding, dtype=np.float64).tobytes() if embedding is not None else None
+            rows.append((key, json.dumps(features), blob, now))
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO video_features (key, features, embedding, last_access) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._evict_locked()
+            self._conn.commit()
+
+    def _evict_locked(self):
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM video_features").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM video_features WHERE key IN "
+                "(SELECT key FROM video_features ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
+            self.evictions += overflow
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM video_features").fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "entries": size,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else None,
+            }
+
+
+_cache: Optional[FeatureCache] = None
+_cache_lock = Lock()
+register_stats_source("feature_cache", lambda: _cache.stats() if _cache is not None else None)
+
+
+def get_feature_cache() -> Optional[FeatureCache]:
+    """
+    Shared FeatureCache, opened on first use. Returns None when caching is disabled
+    or the database cannot be opened (callers then compute everything).
+    """
+    global _cache
+    if not FEATURE_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = FeatureCache(FEATURE_CACHE_PATH, FEATURE_CACHE_MAX_ENTRIES)
+                logging.info(f"Video feature cache opened at {FEATURE_CACHE_PATH}.")
+            except sqlite3.Error:
+                logging.exception("Failed to open video feature cache; continuing without it")
+                return None
+        return _cache
@@ -0,0 +1,26 @@
+from typing import Callable, List
+
+import numpy as np
+import torch
+
+# -------------------------
+# Helpers for the batch scoring endpoints
+# -------------------------
+
+def torch_runner(forward: Callable[..., torch.Tensor], device: torch.device) -> Callable[..., np.ndarray]:
+    """Adapt a torch forward to the runner interface: float32 numpy arrays in, numpy out."""
+    def run(*arrays: np.ndarray) -> np.ndarray:
+        with torch.no_grad():
+            return forward(*[torch.from_numpy(a).to(device) for a in arrays]).cpu().numpy()
+    return run
+
+
+def chunked_forward(run: Callable[..., np.ndarray], inputs: List[np.ndarray], chunk_size: int) -> np.ndarray:
+    """
+    Call run(*arrays) (a torch_runner or an OnnxRunner) over row chunks of the aligned input
+    matrices and stack the outputs. Chunking bounds peak memory for very large requests.
+    """
+    n = inputs[0].shape[0]
+    chunk_size = max(1, int(chunk_size))
+    outputs = [run(*[x[start:start + chunk_size] for x in inputs]) for start in range(0, n, chunk_size)]
+    return np.concatenate(outputs) if outputs else np.zeros((0, 0), dtype=np.float32)
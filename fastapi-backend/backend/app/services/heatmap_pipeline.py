@@ -0,0 +1,142 @@
+"""
+Staged end-to-end heatmap pipeline shared by the prediction routes.
+
+    channel branch:  YouTube fetch -> NER / topics / embedding (channel cache; skipped when the
+                     caller already has the channel embedding)
+    video branch:    VidTower embedding (embedding cache, single-flight)
+    fusion:          BiCrossAttention heatmap (micro-batched)
+
+The two branches do not depend on each other, so they run concurrently and join only at
+fusion: latency is max(channel, video) + fusion instead of the sum of all stages.
+"""
+import asyncio
+from typing import Optional, Sequence
+
+import numpy as np
+
+from app.models.embedding_models import VideoInput
+from app.services.channel_cache import get_channel_embedding, get_channel_embedding_async
+from app.services.vidtower_service import get_vidtower_service
+from app.services.executor import run_cpu
+from app.services.metrics import timed
+from app.routers.heatmap_cross_attention_at_2 import (
+    predict_heatmap,
+    predict_heatmap_async,
+    predict_heatmaps_shared,
+    USER_DIM,
+    VIDEO_DIM,
+)
+
+
+class PipelineError(Exception):
+    """A stage rejected its input; status_code is the HTTP status routes should answer with."""
+    status_code = 500
+
+
+class ChannelNotFoundError(PipelineError):
+    status_code = 404
+
+    def __init__(self, channel_id: str):
+        super().__init__("Channel not found")
+        self.channel_id = channel_id
+
+
+class EmbeddingDimError(PipelineError):
+    status_code = 400
+
+
+def check_dims(channel_embedding, video_embedding):
+    # The model is called with the channel (VIDEO_DIM) embedding first, as it was trained
+    if len(channel_embedding) != VIDEO_DIM:
+        raise EmbeddingDimError(f"Expected user_emb dim {VIDEO_DIM}, got {len(channel_embedding)}")
+    if len(video_embedding) != USER_DIM:
+        raise EmbeddingDimError(f"Expected video_emb dim {USER_DIM}, got {len(video_embedding)}")
+
+
+# -------------------------
+# Channel branch
+# -------------------------
+
+@timed("pipeline.channel")
+def _channel_branch(channel_id: Optional[str], channel_embedding=None):
+    if channel_embedding is not None:
+        return channel_embedding
+    embedding = get_channel_embedding(channel_id)
+    if embedding is None:
+        raise ChannelNotFoundError(channel_id)
+    return embedding
+
+
+@timed("pipeline.channel_async")
+async def _channel_branch_async(channel_id: Optional[str], channel_embedding=None):
+    if channel_embedding is not None:
+        return channel_embedding
+    embedding = await get_channel_embedding_async(channel_id)
+    if embedding is None:
+        raise ChannelNotFoundError(channel_id)
+    return embedding
+
+
+async def _join(channel_branch, video_branch):
+    """Run both branches concurrently; if the channel branch fails the video wait is dropped."""
+    video_task = asyncio.ensure_future(video_branch)
+    try:
+        channel = await channel_branch
+    except BaseException:
+        # The shared VidTower call itself keeps running and still fills the embedding cache
+        video_task.cancel()
+        raise
+    return channel, await video_task
+
+
+# -------------------------
+# Pipelines
+# -------------------------
+
+@timed("pipeline.heatmap_for_video")
+def heatmap_for_video(video: VideoInput, channel_id: Optional[str] = None, channel_embedding=None) -> np.ndarray:
+    """
+    Sync pipeline: the VidTower call is started first and runs on its own pool while the
+    channel branch runs on the calling thread. Returns [NUM_SLOTS] sigmoid scores.
+    """
+    wait_for_video = get_vidtower_service().start(video)
+    channel = _channel_branch(channel_id, channel_embedding)
+    video_embedding = wait_for_video()
+
+    check_dims(channel, video_embedding)
+    return predict_heatmap(channel, video_embedding)
+
+
+@timed("pipeline.heatmap_for_video_async")
+async def heatmap_for_video_async(video: VideoInput, channel_id: Optional[str] = None,
+                                  channel_embedding=None) -> np.ndarray:
+    """Non-blocking heatmap_for_video: both branches are awaited concurrently."""
+    channel, video_embedding = await _join(
+        _channel_branch_async(channel_id, channel_embedding),
+        get_vidtower_service().embed_async(video),
+    )
+
+    check_dims(channel, video_embedding)
+    return await predict_heatmap_async(channel, video_embedding)
+
+
+@timed("pipeline.heatmaps_for_candidates_async")
+async def heatmaps_for_candidates_async(videos: Sequence[VideoInput], channel_id: Optional[str] = None,
+                                        channel_embedding=None) -> np.ndarray:
+    """
+    [N, NUM_SLOTS] scores for N candidate videos against one channel: the channel branch runs
+    once, concurrently with the N VidTower calls, and fusion encodes the channel side once.
+    """
+    service = get_vidtower_service()
+    channel, video_embeddings = await _join(
+        _channel_branch_async(channel_id, channel_embedding),
+        asyncio.gather(*(service.embed_async(v) for v in videos)),
+    )
+
+    for video_embedding in video_embeddings:
+        check_dims(channel, video_embedding)
+    return await run_cpu(
+        predict_heatmaps_shared,
+        np.asarray(channel, dtype=np.float32),
+        np.asarray(video_embeddings, dtype=np.float32),
+    )
@@ -0,0 +1,257 @@
+import time
+import random
+import asyncio
+import logging
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional, Dict, Any, Tuple
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.config import (
+    YOUTUBE_API_KEY,
+    YOUTUBE_API_BASE_URL,
+    YOUTUBE_HTTP_POOL_SIZE,
+    YOUTUBE_HTTP_MAX_RETRIES,
+    YOUTUBE_HTTP_BACKOFF_BASE,
+    YOUTUBE_HTTP_BACKOFF_MAX,
+    YOUTUBE_ETAG_CACHE_SIZE,
+)
+
+# Transient statuses worth retrying (rate limiting and upstream hiccups)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def backoff_delay(attempt: int, base: float, cap: float, retry_after: Optional[str] = None) -> float:
+    """
+    Full-jitter exponential backoff: uniform(0, min(cap, base * 2**attempt)).
+    A numeric Retry-After header from the server takes precedence (capped).
+    """
+    if retry_after:
+        try:
+            return min(cap, max(0.0, float(retry_after)))
+        except ValueError:
+            pass
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class ETagStore:
+    """
+    Bounded LRU of (etag, parsed body) per request, used for If-None-Match revalidation.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max(0, int(max_entries))
+        self._entries: "OrderedDict[str, Tuple[str, Any]]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[Tuple[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, etag: str, body: Any):
+        if self.max_entries == 0:
+            return
+        with self._lock:
+            self._entries[key] = (etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+def request_key(path: str, params: Dict[str, Any]) -> str:
+    """Cache key for a request: path plus sorted params, without the API key."""
+    items = sorted((k, str(v)) for k, v in params.items() if k != "key")
+    return path + "?" + "&".join(f"{k}={v}" for k, v in items)
+
+
+class _YouTubeClientBase:
+    """Request preparation, retry policy, ETag bookkeeping and counters shared by both clients."""
+
+    def __init__(self, base_url: str, api_key: Optional[str], max_retries: int,
+                 backoff_base: float, backoff_max: float, etags: ETagStore):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.etags = etags
+        self._stats_lock = Lock()
+        self._stats = {"requests": 0, "retries": 0, "not_modified": 0, "errors": 0}
+
+    def _count(self, name: str, n: int = 1):
+        with self._stats_lock:
+            self._stats[name] += n
+
+    def _prepare(self, path: str, params: Dict[str, Any]):
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        key = request_key(path, params)
+        query = dict(params)
+        if self.api_key:
+            query["key"] = self.api_key
+        cached = self.etags.get(key)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        return url, key, query, headers, cached
+
+    def _retry_delay(self, attempt: int, status_code: Optional[int] = None,
+                     retry_after: Optional[str] = None) -> Optional[float]:
+        """Seconds to wait before retrying, or None if the attempt should not be retried."""
+        if attempt >= self.max_retries:
+            return None
+        if status_code is not None and status_code not in RETRY_STATUSES:
+            return None
+        self._count("retries")
+        return backoff_delay(attempt, self.backoff_base, self.backoff_max, retry_after)
+
+    def _finish(self, path: str, key: str, status_code: int, etag: Optional[str], data: Any) -> Dict[str, Any]:
+        if status_code == 200 and etag:
+            self.etags.put(key, etag, data)
+        if status_code >= 400:
+            self._count("errors")
+            logging.warning(f"YouTube API {path} returned {status_code}")
+        return data if isinstance(data, dict) else {}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["etag_entries"] = len(self.etags)
+        return stats
+
+
+class YouTubeHTTPClient(_YouTubeClientBase):
+    """
+    Shared client for the YouTube Data API: one pooled keep-alive session, bounded retries
+    with jittered backoff, and ETag / If-None-Match revalidation so unchanged resources come
+    back as 304 and are served from the local copy.
+    base_url can point at a local stand-in server for tests and benchmarks.
+    """
+
+    def __init__(self, base_url: str = YOUTUBE_API_BASE_URL, api_key: Optional[str] = YOUTUBE_API_KEY,
+                 pool_size: int = YOUTUBE_HTTP_POOL_SIZE, max_retries: int = YOUTUBE_HTTP_MAX_RETRIES,
+                 backoff_base: float = YOUTUBE_HTTP_BACKOFF_BASE, backoff_max: float = YOUTUBE_HTTP_BACKOFF_MAX,
+                 etags: Optional[ETagStore] = None):
+        super().__init__(base_url, api_key, max_retries, backoff_base, backoff_max,
+                         etags if etags is not None else ETagStore(YOUTUBE_ETAG_CACHE_SIZE))
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get_json(self, path: str, params: Dict[str, Any], timeout: float = 15) -> Dict[str, Any]:
+        """
+        GET {base_url}/{path} and return the parsed JSON body (error bodies included).
+        Raises requests.RequestException only after retries are exhausted.
+        """
+        url, key, query, headers, cached = self._prepare(path, params)
+
+        attempt = 0
+        while True:
+            self._count("requests")
+            try:
+                resp = self.session.get(url, params=query, headers=headers, timeout=timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                delay = self._retry_delay(attempt)
+                if delay is None:
+                    self._count("errors")
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            if resp.status_code == 304 and cached:
+                self._count("not_modified")
+                return cached[1]
+
+            delay = self._retry_delay(attempt, resp.status_code, resp.headers.get("Retry-After"))
+            if delay is not None:
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            return self._finish(path, key, resp.status_code, resp.headers.get("ETag"), resp.json())
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncYouTubeHTTPClient(_YouTubeClientBase):
+    """
+    asyncio counterpart of YouTubeHTTPClient on a pooled httpx.AsyncClient, with the same
+    retry and ETag behaviour. The httpx client is created on first use inside the event loop.
+    """
+
+    def __init__(self, base_url: str = YOUTUBE_API_BASE_URL, api_key: Optional[str] = YOUTUBE_API_KEY,
+                 pool_size: int = YOUTUBE_HTTP_POOL_SIZE, max_retries: int = YOUTUBE_HTTP_MAX_RETRIES,
+                 backoff_base: float = YOUTUBE_HTTP_BACKOFF_BASE, backoff_max: float = YOUTUBE_HTTP_BACKOFF_MAX,
+                 etags: Optional[ETagStore] = None):
+        super().__init__(base_url, api_key, max_retries, backoff_base, backoff_max,
+                         etags if etags is not None else ETagStore(YOUTUBE_ETAG_CACHE_SIZE))
+        self.pool_size = pool_size
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+            )
+        return self._client
+
+    async def get_json(self, path: str, params: Dict[str, Any], timeout: float = 15) -> Dict[str, Any]:
+        """
+        Async GET {base_url}/{path}; same contract as YouTubeHTTPClient.get_json
+        (raises httpx.HTTPError only after retries are exhausted).
+        """
+        url, key, query, headers, cached = self._prepare(path, params)
+        client = self._get_client()
+
+        attempt = 0
+        while True:
+            self._count("requests")
+            try:
+                resp = await client.get(url, params=query, headers=headers, timeout=timeout)
+            except (httpx.TransportError, httpx.TimeoutException):
+                delay = self._retry_delay(attempt)
+                if delay is None:
+                    self._count("errors")
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+
+            if resp.status_code == 304 and cached:
+                self._count("not_modified")
+                return cached[1]
+
+            delay = self._retry_delay(attempt, resp.status_code, resp.headers.get("Retry-After"))
+            if delay is not None:
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+
+            return self._finish(path, key, resp.status_code, resp.headers.get("ETag"), resp.json())
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Both clients share one ETag store so sync and async routes revalidate the same resources
+_etag_store = ETagStore(YOUTUBE_ETAG_CACHE_SIZE)
+youtube_client = YouTubeHTTPClient(etags=_etag_store)
+async_youtube_client = AsyncYouTubeHTTPClient(etags=_etag_store)
+
+
+async def close_clients():
+    """Release pooled connections of both shared clients (called on app shutdown)."""
+    await async_youtube_client.aclose()
+    youtube_client.close()
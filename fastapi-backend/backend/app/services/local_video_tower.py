@@ -0,0 +1,230 @@
+"""
+EXPERIMENTAL in-process candidate for replacing the hosted MeshMax/VidTower Space.
+
+Not a serving option yet: no trained checkpoint exists for this architecture, so its vectors are
+not in VidTower's 768-d space and heatmaps computed from them are meaningless. Only the
+record/parity tooling below uses it; it is not one of the VIDTOWER_BACKEND choices until a
+distilled checkpoint passes the parity check.
+
+The tower embeds the video text with the shared MiniLM embedder, encodes the thumbnail with a
+local torchvision CNN and maps both through a small projection head to the 768-d vector the
+BiCrossAttentionFusionModel consumes. All weights (thumbnail encoder + head) come from one
+checkpoint file:
+
+    torch.save({"config": {...}, "state_dict": tower.state_dict()}, "video_tower.pth")
+
+Parity against the hosted Space is checked on recorded outputs:
+
+    python -m app.services.local_video_tower record videos.jsonl recorded.jsonl
+    python -m app.services.local_video_tower parity recorded.jsonl
+"""
+import io
+import sys
+import json
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Any
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+import torch
+import torch.nn as nn
+from PIL import Image
+
+from app.config import LOCAL_VIDTOWER_WEIGHTS, LOCAL_VIDTOWER_THUMB_TIMEOUT, VIDTOWER_MAX_CONCURRENCY
+from app.models.embedding_models import VideoInput
+
+DEFAULT_TOWER_CONFIG = {
+    "text_dim": 384,
+    "image_arch": "resnet18",
+    "image_size": 224,
+    "hidden_dim": 1024,
+    "output_dim": 768,
+    "normalize": True,
+}
+# ImageNet statistics used by the torchvision backbones
+IMAGE_MEAN = torch.tensor([0.485, 0.456, 0.406]).view(3, 1, 1)
+IMAGE_STD = torch.tensor([0.229, 0.224, 0.225]).view(3, 1, 1)
+
+
+def video_text(video: VideoInput) -> str:
+    parts = [video.title or "", video.tags or "", video.description or ""]
+    return ". ".join(p.strip() for p in parts if p and p.strip())
+
+
+# -------------------------
+# Model
+# -------------------------
+
+class LocalVideoTower(nn.Module):
+    """Thumbnail CNN + projection head over [text embedding ; image features]."""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        super().__init__()
+        import torchvision
+
+        self.config = {**DEFAULT_TOWER_CONFIG, **(config or {})}
+        backbone = torchvision.models.get_model(self.config["image_arch"], weights=None)
+        image_dim = backbone.fc.in_features
+        backbone.fc = nn.Identity()
+        self.image_encoder = backbone
+        self.image_dim = image_dim
+        self.head = nn.Sequential(
+            nn.Linear(self.config["text_dim"] + image_dim, self.config["hidden_dim"]),
+            nn.LayerNorm(self.config["hidden_dim"]),
+            nn.GELU(),
+            nn.Linear(self.config["hidden_dim"], self.config["output_dim"]),
+        )
+
+    def forward(self, text_emb, images, has_image):
+        # Missing thumbnails contribute zero image features rather than features of a blank image
+        image_feat = self.image_encoder(images) * has_image.unsqueeze(1)
+        out = self.head(torch.cat([text_emb, image_feat], dim=1))
+        if self.config["normalize"]:
+            out = nn.functional.normalize(out, p=2, dim=1)
+        return out
+
+
+# -------------------------
+# Backend
+# -------------------------
+
+class LocalVidTowerBackend:
+    """VidTower backend running LocalVideoTower on CPU (or GPU when present) in-process."""
+
+    name = "local"
+
+    def __init__(self, weights_path: str = LOCAL_VIDTOWER_WEIGHTS,
+                 thumb_timeout: float = LOCAL_VIDTOWER_THUMB_TIMEOUT):
+        from app.services.embedding_service import get_text_embedder
+
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        checkpoint = torch.load(weights_path, map_location=self.device)
+        self.model = LocalVideoTower(checkpoint.get("config"))
+        self.model.load_state_dict(checkpoint["state_dict"])
+        self.model.to(self.device).eval()
+        self.image_size = self.model.config["image_size"]
+        self.embedder = get_text_embedder()
+        self.thumb_timeout = thumb_timeout
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=max(1, VIDTOWER_MAX_CONCURRENCY))
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._fetch_pool = ThreadPoolExecutor(max_workers=max(1, VIDTOWER_MAX_CONCURRENCY),
+                                              thread_name_prefix="thumbnail")
+        logging.info(f"Experimental local video tower loaded from {weights_path} on {self.device}.")
+
+    def _thumbnail(self, url: str) -> Optional[torch.Tensor]:
+        if not url:
+            return None
+        try:
+            resp = self._session.get(url, timeout=self.thumb_timeout)
+            resp.raise_for_status()
+            image = Image.open(io.BytesIO(resp.content)).convert("RGB")
+        except Exception:
+            logging.warning(f"Could not load thumbnail {url}; embedding without it.")
+            return None
+        image = image.resize((self.image_size, self.image_size), Image.BILINEAR)
+        pixels = torch.from_numpy(np.asarray(image, dtype=np.float32) / 255.0).permute(2, 0, 1)
+        return (pixels - IMAGE_MEAN) / IMAGE_STD
+
+    def predict_batch(self, videos: List[VideoInput]) -> List[List[float]]:
+        """One text encode, concurrent thumbnail downloads and one tower forward for all videos."""
+        if not videos:
+            return []
+        thumbs = list(self._fetch_pool.map(self._thumbnail, [v.thumbnail_url for v in videos]))
+        text_emb = self.embedder.encode([video_text(v) for v in videos], convert_to_numpy=True)
+
+        blank = torch.zeros(3, self.image_size, self.image_size)
+        images = torch.stack([t if t is not None else blank for t in thumbs])
+        has_image = torch.tensor([t is not None for t in thumbs], dtype=torch.float32)
+        with torch.no_grad():
+            out = self.model(
+                torch.from_numpy(np.asarray(text_emb, dtype=np.float32)).to(self.device),
+                images.to(self.device),
+                has_image.to(self.device),
+            )
+        return out.cpu().numpy().tolist()
+
+    def predict(self, video: VideoInput) -> List[float]:
+        return self.predict_batch([video])[0]
+
+    def warm_up(self):
+        """One dummy forward (text only, no thumbnail download)."""
+        self.predict_batch([VideoInput(title="warm-up", description="", tags="", thumbnail_url="")])
+
+
+# -------------------------
+# Parity check against recorded VidTower outputs
+# -------------------------
+
+def record_vidtower_outputs(videos_path: str, out_path: str):
+    """Call the hosted Space for every VideoInput in videos_path (JSONL) and record the outputs."""
+    from app.services.vidtower_service import GradioVidTowerBackend, normalize_embedding
+
+    backend = GradioVidTowerBackend()
+    with open(videos_path) as src, open(out_path, "w") as dst:
+        for line in src:
+            if not line.strip():
+                continue
+            video = VideoInput(**json.loads(line))
+            embedding = normalize_embedding(backend.predict(video))
+            dst.write(json.dumps({"video": video.model_dump(), "embedding": embedding}) + "\n")
+
+
+def parity_report(records_path: str, backend: Optional[LocalVidTowerBackend] = None,
+                  batch_size: int = 32) -> Dict[str, Any]:
+    """Cosine similarity and max abs difference of local vs recorded VidTower embeddings."""
+    with open(records_path) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    if not records:
+        raise ValueError(f"No records in {records_path}")
+    backend = backend or LocalVidTowerBackend()
+
+    cosines, max_abs = [], []
+    for start in range(0, len(records), batch_size):
+        chunk = records[start:start + batch_size]
+        local = np.asarray(backend.predict_batch([VideoInput(**r["video"]) for r in chunk]), dtype=np.float64)
+        remote = np.asarray([r["embedding"] for r in chunk], dtype=np.float64)
+        if local.shape != remote.shape:
+            raise ValueError(f"Shape mismatch: local {local.shape} vs recorded {remote.shape}")
+        norms = np.linalg.norm(local, axis=1) * np.linalg.norm(remote, axis=1)
+        cosines.extend((local * remote).sum(axis=1) / np.maximum(norms, 1e-12))
+        max_abs.extend(np.abs(local - remote).max(axis=1))
+
+    cosines = np.asarray(cosines)
+    return {
+        "records": len(records),
+        "cosine_mean": float(cosines.mean()),
+        "cosine_min": float(cosines.min()),
+        "cosine_p05": float(np.percentile(cosines, 5)),
+        "max_abs_diff": float(np.max(max_abs)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local video tower parity tooling")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record", help="record hosted VidTower outputs for a JSONL of VideoInput")
+    rec.add_argument("videos")
+    rec.add_argument("out")
+    par = sub.add_parser("parity", help="compare the local tower against recorded outputs")
+    par.add_argument("records")
+    par.add_argument("--min-cosine", type=float, default=0.98,
+                     help="fail if any record's cosine similarity falls below this")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        record_vidtower_outputs(args.videos, args.out)
+        return 0
+    report = parity_report(args.records)
+    report["min_cosine_threshold"] = args.min_cosine
+    report["passed"] = report["cosine_min"] >= args.min_cosine
+    print(json.dumps(report, indent=2))
+    return 0 if report["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
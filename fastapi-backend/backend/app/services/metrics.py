@@ -0,0 +1,211 @@
+"""
+Prometheus instrumentation, exposed on GET /metrics.
+
+    app_stage_latency_seconds{stage}     pipeline stages: youtube.*, nlp.*, vidtower.*, fusion.*, pipeline.*
+    app_stage_inflight{stage}            calls currently inside a stage
+    app_stage_errors_total{stage}        calls that raised
+    app_model_latency_seconds{model}     model forwards: ner, zero_shot, embedder, bicross, cross_attention, vidtower
+    app_http_request_duration_seconds    per route template, method and status
+    app_<source>_<field>                 numeric fields of the caches' / batchers' stats(), read at scrape time
+
+The hot path costs two perf_counter calls and one histogram observe per instrumented call
+(a few microseconds); cache and batcher figures cost nothing until scraped. Everything turns
+into a no-op with METRICS_ENABLED=false or when prometheus_client is not installed.
+"""
+import re
+import time
+import asyncio
+import logging
+import functools
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from app.config import METRICS_ENABLED
+
+try:
+    from prometheus_client import Counter, Gauge, Histogram, REGISTRY, CONTENT_TYPE_LATEST, generate_latest
+    from prometheus_client.core import GaugeMetricFamily
+except ImportError:  # optional dependency
+    REGISTRY = None
+
+ENABLED = METRICS_ENABLED and REGISTRY is not None
+if METRICS_ENABLED and REGISTRY is None:
+    logging.warning("prometheus_client is not installed; /metrics is disabled.")
+
+# Model forwards take well under a millisecond at small batch sizes, YouTube calls seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+if ENABLED:
+    STAGE_LATENCY = Histogram("app_stage_latency_seconds", "Latency of a pipeline stage", ["stage"],
+                              buckets=LATENCY_BUCKETS)
+    STAGE_INFLIGHT = Gauge("app_stage_inflight", "Calls currently inside a pipeline stage", ["stage"])
+    STAGE_ERRORS = Counter("app_stage_errors_total", "Pipeline stage calls that raised", ["stage"])
+    MODEL_LATENCY = Histogram("app_model_latency_seconds", "Latency of one model forward / call", ["model"],
+                              buckets=LATENCY_BUCKETS)
+    HTTP_LATENCY = Histogram("app_http_request_duration_seconds", "HTTP request latency",
+                             ["method", "route", "status"], buckets=LATENCY_BUCKETS)
+
+
+# -------------------------
+# Stages and models
+# -------------------------
+
+def timed(stage: str):
+    """Decorator recording latency, in-flight count and errors of a sync or async function."""
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+        observe = STAGE_LATENCY.labels(stage).observe
+        inflight = STAGE_INFLIGHT.labels(stage)
+        errors = STAGE_ERRORS.labels(stage)
+
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                inflight.inc()
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                except BaseException:
+                    errors.inc()
+                    raise
+                finally:
+                    observe(time.perf_counter() - start)
+                    inflight.dec()
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            inflight.inc()
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except BaseException:
+                errors.inc()
+                raise
+            finally:
+                observe(time.perf_counter() - start)
+                inflight.dec()
+        return wrapper
+    return decorate
+
+
+class _ModelTimer:
+    __slots__ = ("observe", "start")
+
+    def __init__(self, observe):
+        self.observe = observe
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.observe(time.perf_counter() - self.start)
+        return False
+
+
+class _NoopTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopTimer()
+
+
+def model_timer(model: str):
+    """Context manager timing one model call: `with model_timer("ner"): ner(texts)`."""
+    if not ENABLED:
+        return _NOOP
+    return _ModelTimer(MODEL_LATENCY.labels(model).observe)
+
+
+def timed_model(model: str, fn: Callable) -> Callable:
+    """Wrap a runner callable so every call is recorded under app_model_latency_seconds{model}."""
+    if not ENABLED:
+        return fn
+    observe = MODEL_LATENCY.labels(model).observe
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            observe(time.perf_counter() - start)
+    return run
+
+
+# -------------------------
+# Scrape-time stats (caches, batchers, VidTower)
+# -------------------------
+
+_stats_sources: Dict[str, Callable[[], Optional[Dict[str, Any]]]] = {}
+
+
+def register_stats_source(name: str, stats_fn: Callable[[], Optional[Dict[str, Any]]]):
+    """Expose the numeric fields of stats_fn() (a dict, or None to skip) as app_<name>_<field> gauges."""
+    _stats_sources[name] = stats_fn
+
+
+def _numeric_fields(stats: Dict[str, Any], prefix: str = "") -> Iterable[Tuple[str, float]]:
+    for key, value in stats.items():
+        name = re.sub(r"[^a-zA-Z0-9_]", "_", f"{prefix}{key}")
+        if isinstance(value, dict):
+            yield from _numeric_fields(value, f"{name}_")
+        elif isinstance(value, (bool, int, float)):
+            yield name, float(value)
+
+
+class _StatsCollector:
+    def describe(self):
+        return []
+
+    def collect(self):
+        for source, stats_fn in list(_stats_sources.items()):
+            try:
+                stats = stats_fn()
+            except Exception:
+                logging.exception(f"stats() of {source} failed")
+                continue
+            if not stats:
+                continue
+            for field, value in _numeric_fields(stats):
+                family = GaugeMetricFamily(f"app_{source}_{field}", f"{source} stats(): {field}")
+                family.add_metric([], value)
+                yield family
+
+
+if ENABLED:
+    REGISTRY.register(_StatsCollector())
+
+
+# -------------------------
+# HTTP
+# -------------------------
+
+def instrument_app(app):
+    """Per-route latency middleware; the route template keeps label cardinality bounded."""
+    if not ENABLED:
+        return
+
+    @app.middleware("http")
+    async def record_latency(request, call_next):
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            if path != "/metrics":
+                HTTP_LATENCY.labels(request.method, path, str(status)).observe(time.perf_counter() - start)
+
+
+def render_latest() -> Tuple[bytes, str]:
+    """(body, content type) of the Prometheus text exposition."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,127 @@
+import time
+import queue
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Any, List, Dict
+
+import numpy as np
+
+# -------------------------
+# Dynamic micro-batching
+# -------------------------
+
+class MicroBatcher:
+    """
+    Collects concurrent single-item requests into one batched call.
+    A worker thread takes the first queued item, keeps collecting for up to max_wait_ms or
+    until max_batch_size items are queued, then calls batch_fn(items) once; batch_fn returns
+    one result per item, in order. With enabled=False every call runs inline as a batch of one.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]], max_batch_size: int = 32,
+                 max_wait_ms: float = 2.0, name: str = "batcher", enabled: bool = True,
+                 window: int = 1024):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.name = name
+        self.enabled = enabled
+        self._queue: "queue.Queue" = queue.Queue()
+        self._worker = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.batches = 0
+        # Recent samples for the batch-size / wait-time summaries
+        self._batch_sizes = deque(maxlen=window)
+        self._wait_ms = deque(maxlen=window)
+
+    def _ensure_worker(self):
+        with self._start_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name=f"{self.name}-batcher", daemon=True)
+                self._worker.start()
+
+    def submit(self, item: Any) -> Future:
+        future: Future = Future()
+        if not self.enabled:
+            try:
+                future.set_result(self.batch_fn([item])[0])
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        self._ensure_worker()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def __call__(self, item: Any) -> Any:
+        """Blocking call: enqueue item and wait for its row of the batch."""
+        return self.submit(item).result()
+
+    async def call_async(self, item: Any) -> Any:
+        """Non-blocking call for async routes."""
+        return await asyncio.wrap_future(self.submit(item))
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            # Callers that gave up while queued (e.g. a cancelled await) are dropped here, so
+            # batch_fn never computes rows nobody will read
+            batch = [entry for entry in self._collect() if entry[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            started = time.perf_counter()
+            items = [item for item, _, _ in batch]
+            try:
+                results = self.batch_fn(items)
+            except Exception as e:
+                logging.exception(f"{self.name} batch of {len(batch)} failed")
+                results = [e] * len(batch)
+                failed = True
+            else:
+                failed = False
+            for (_, future, _), result in zip(batch, results):
+                # Set each row on its own so one bad future cannot fail the rest of the batch
+                try:
+                    if failed:
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+                except Exception:
+                    logging.exception(f"{self.name} could not deliver a batch result")
+            with self._stats_lock:
+                self.requests += len(batch)
+                self.batches += 1
+                self._batch_sizes.append(len(batch))
+                self._wait_ms.extend((started - enqueued) * 1000.0 for _, _, enqueued in batch)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            sizes = np.asarray(self._batch_sizes, dtype=np.float64)
+            waits = np.asarray(self._wait_ms, dtype=np.float64)
+            return {
+                "name": self.name,
+                "enabled": self.enabled,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "queue_depth": self._queue.qsize(),
+                "requests": self.requests,
+                "batches": self.batches,
+                "batch_size_mean": float(sizes.mean()) if sizes.size else None,
+                "batch_size_max": int(sizes.max()) if sizes.size else None,
+                "wait_ms_mean": float(waits.mean()) if waits.size else None,
+                "wait_ms_p95": float(np.percentile(waits, 95)) if waits.size else None,
+            }
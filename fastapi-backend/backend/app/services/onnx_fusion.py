@@ -0,0 +1,239 @@
+"""
+ONNX Runtime serving for the fusion heads (BiCrossAttentionFusionModel and FusionModel).
+
+Graphs are exported with a dynamic batch axis, so one session serves single requests,
+micro-batches and the /batch endpoints alike. With FUSION_RUNTIME=onnx the routers export the
+graph on first load when it is missing or was exported from different weights (a fingerprint of
+the weights is stored next to it as <graph>.sha256); the same steps can be run by hand:
+
+    python -m app.services.onnx_fusion export
+    python -m app.services.onnx_fusion parity      # max abs diff vs torch, non-zero exit on failure
+    python -m app.services.onnx_fusion bench       # latency of torch vs ONNX Runtime per batch size
+"""
+import sys
+import json
+import time
+import hashlib
+import inspect
+import logging
+import argparse
+from pathlib import Path
+from typing import List, Sequence, Optional, Dict, Any
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from app.config import ONNX_INTRA_OP_THREADS
+
+
+class SigmoidHead(nn.Module):
+    """Wraps a logits model so the exported graph returns 0-1 slot scores."""
+
+    def __init__(self, model: nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, *inputs):
+        return torch.sigmoid(self.model(*inputs))
+
+
+def weights_fingerprint(model: nn.Module) -> str:
+    """sha256 over the names, dtypes, shapes and values of every tensor in model.state_dict()."""
+    digest = hashlib.sha256()
+    for name, tensor in sorted(model.state_dict().items()):
+        tensor = tensor.detach().to("cpu").contiguous()
+        digest.update(f"{name}:{tensor.dtype}:{tuple(tensor.shape)}".encode("utf-8"))
+        digest.update(tensor.reshape(-1).view(torch.uint8).numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _fingerprint_path(path: str) -> Path:
+    return Path(str(path) + ".sha256")
+
+
+def is_stale(model: nn.Module, path: str) -> bool:
+    """True if the graph at path is missing or was not exported from model's current weights."""
+    fingerprint = _fingerprint_path(path)
+    if not Path(path).exists() or not fingerprint.exists():
+        return True
+    return fingerprint.read_text().strip() != weights_fingerprint(model)
+
+
+def export_onnx(model: nn.Module, example_inputs: Sequence[torch.Tensor], input_names: List[str],
+                path: str, output_name: str = "heatmap", opset: int = 17):
+    """
+    Export model (eval mode, on CPU) with the batch axis of every input/output marked dynamic,
+    and record the fingerprint of its weights next to the graph.
+    """
+    model = model.to("cpu").eval()
+    dynamic_axes = {name: {0: "batch"} for name in [*input_names, output_name]}
+    kwargs = {}
+    # The TorchScript exporter handles nn.MultiheadAttention without extra dependencies;
+    # newer torch versions default to the dynamo exporter, so ask for it explicitly
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        kwargs["dynamo"] = False
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(t.to("cpu") for t in example_inputs),
+            path,
+            input_names=input_names,
+            output_names=[output_name],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            **kwargs,
+        )
+    _fingerprint_path(path).write_text(weights_fingerprint(model) + "\n")
+    logging.info(f"Exported ONNX graph to {path}.")
+
+
+class OnnxRunner:
+    """Callable over aligned float32 numpy inputs -> numpy output, backed by one ORT session."""
+
+    def __init__(self, path: str, intra_op_threads: int = ONNX_INTRA_OP_THREADS):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads > 0:
+            options.intra_op_num_threads = intra_op_threads
+        self.path = path
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def __call__(self, *arrays: np.ndarray) -> np.ndarray:
+        feeds = {name: np.ascontiguousarray(a, dtype=np.float32) for name, a in zip(self.input_names, arrays)}
+        return self.session.run(None, feeds)[0]
+
+
+def quantize_onnx_int8(path: str) -> str:
+    """Dynamic int8 quantization of an exported graph; returns the path of the int8 copy."""
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    int8_path = str(Path(path).with_suffix(".int8.onnx"))
+    if not Path(int8_path).exists() or Path(int8_path).stat().st_mtime < Path(path).stat().st_mtime:
+        quantize_dynamic(path, int8_path, weight_type=QuantType.QInt8)
+        logging.info(f"Wrote int8 ONNX graph to {int8_path}.")
+    return int8_path
+
+
+def load_or_export(model: nn.Module, example_inputs: Sequence[torch.Tensor], input_names: List[str],
+                   path: str, device: torch.device, quantize: bool = False) -> Optional[OnnxRunner]:
+    """
+    OnnxRunner for path, (re-)exporting the graph first if the file is missing or stale, i.e.
+    exported from other weights (and serving its int8 copy when quantize is set). Returns None
+    (callers keep the torch path) if export or session creation fails.
+    """
+    try:
+        if is_stale(model, path):
+            if Path(path).exists():
+                logging.warning(f"{path} was exported from different weights; re-exporting.")
+            export_onnx(model, example_inputs, input_names, path)
+            model.to(device)
+        return OnnxRunner(quantize_onnx_int8(path) if quantize else path)
+    except Exception:
+        logging.exception(f"ONNX Runtime unavailable for {path}; serving with torch")
+        model.to(device)
+        return None
+
+
+# -------------------------
+# Parity and latency checks
+# -------------------------
+
+def _fusion_models() -> Dict[str, Dict[str, Any]]:
+    from app.routers import heatmap_cross_attention as cross
+    from app.routers import heatmap_cross_attention_at_2 as bicross
+
+    return {
+        "bicross": {
+            "model": SigmoidHead(bicross.get_model()),
+            "dims": [bicross.VIDEO_DIM, bicross.USER_DIM],
+            "names": bicross.ONNX_INPUT_NAMES,
+            "path": bicross.ONNX_PATH,
+        },
+        "cross_attention": {
+            "model": cross.get_model(),
+            "dims": [cross.EMBED_DIM] * 3,
+            "names": cross.ONNX_INPUT_NAMES,
+            "path": cross.ONNX_PATH,
+        },
+    }
+
+
+def _random_inputs(dims: List[int], batch: int, seed: int = 0) -> List[np.ndarray]:
+    rng = np.random.default_rng(seed)
+    return [rng.standard_normal((batch, d)).astype(np.float32) for d in dims]
+
+
+def _torch_run(model: nn.Module, arrays: List[np.ndarray]) -> np.ndarray:
+    with torch.no_grad():
+        return model(*[torch.from_numpy(a) for a in arrays]).numpy()
+
+
+def parity_report(batch_sizes=(1, 7, 64, 256), atol: float = 1e-5) -> Dict[str, Any]:
+    report = {}
+    for name, spec in _fusion_models().items():
+        model = spec["model"].to("cpu").eval()
+        export_onnx(model, [torch.from_numpy(a) for a in _random_inputs(spec["dims"], 2)], spec["names"], spec["path"])
+        runner = OnnxRunner(spec["path"])
+        diffs = {}
+        for batch in batch_sizes:
+            arrays = _random_inputs(spec["dims"], batch, seed=batch)
+            diffs[str(batch)] = float(np.abs(_torch_run(model, arrays) - runner(*arrays)).max())
+        report[name] = {"max_abs_diff": diffs, "passed": max(diffs.values()) <= atol}
+    report["atol"] = atol
+    report["passed"] = all(v["passed"] for k, v in report.items() if isinstance(v, dict))
+    return report
+
+
+def latency_report(batch_sizes=(1, 8, 32, 256), repeats: int = 200) -> Dict[str, Any]:
+    """Median milliseconds per call for the torch and ONNX Runtime paths."""
+    def median_ms(fn, arrays):
+        for _ in range(10):
+            fn(arrays)
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn(arrays)
+            samples.append((time.perf_counter() - start) * 1000.0)
+        return float(np.median(samples))
+
+    report = {}
+    for name, spec in _fusion_models().items():
+        model = spec["model"].to("cpu").eval()
+        if not Path(spec["path"]).exists():
+            export_onnx(model, [torch.from_numpy(a) for a in _random_inputs(spec["dims"], 2)], spec["names"], spec["path"])
+        runner = OnnxRunner(spec["path"])
+        rows = {}
+        for batch in batch_sizes:
+            arrays = _random_inputs(spec["dims"], batch)
+            torch_ms = median_ms(lambda a: _torch_run(model, a), arrays)
+            onnx_ms = median_ms(lambda a: runner(*a), arrays)
+            rows[str(batch)] = {"torch_ms": torch_ms, "onnx_ms": onnx_ms, "speedup": torch_ms / onnx_ms}
+        report[name] = rows
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ONNX export / parity / latency for the fusion heads")
+    parser.add_argument("command", choices=["export", "parity", "bench"])
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        for spec in _fusion_models().values():
+            export_onnx(spec["model"], [torch.from_numpy(a) for a in _random_inputs(spec["dims"], 2)],
+                        spec["names"], spec["path"])
+            print(spec["path"])
+        return 0
+    if args.command == "parity":
+        report = parity_report()
+        print(json.dumps(report, indent=2))
+        return 0 if report["passed"] else 1
+    print(json.dumps(latency_report(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
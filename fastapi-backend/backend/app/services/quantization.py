@@ -0,0 +1,260 @@
+"""
+Int8 dynamic quantization for CPU serving (MODEL_QUANTIZATION=int8).
+
+Linear layers of the MiniLM embedder, the NER model, the bart-large-mnli classifier and the
+fusion heads are converted to dynamically quantized int8 at load time (with FUSION_RUNTIME=onnx
+the fusion heads serve the int8 ONNX graph instead). The accuracy gate compares every int8 path
+that can be served -- torch fusion heads, ONNX Runtime fusion graphs and the NLP models --
+against fp32 on a fixed evaluation set, and fails if any of them could not be evaluated:
+
+    MODEL_QUANTIZATION=none python -m app.services.quantization gate
+"""
+import sys
+import json
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from app.config import MODEL_QUANTIZATION
+
+QUANTIZATION_MODES = ("none", "int8")
+# Fixed evaluation inputs: the notebooks' embedding CSVs and a small set of channel profiles
+EVAL_EMBEDDINGS_DIR = Path(__file__).resolve().parents[4] / "nbs"
+EVAL_PROFILES_PATH = Path(__file__).resolve().parents[2] / "eval_data" / "channel_profiles.json"
+EVAL_ROWS = 256
+
+
+def int8_enabled() -> bool:
+    if MODEL_QUANTIZATION not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown MODEL_QUANTIZATION '{MODEL_QUANTIZATION}', expected one of {QUANTIZATION_MODES}")
+    return MODEL_QUANTIZATION == "int8"
+
+
+def quantize_int8(module: nn.Module) -> nn.Module:
+    """
+    Dynamic int8 quantization of every nn.Linear (weights int8, activations quantized per call).
+    Only meaningful on CPU; modules on a GPU are returned unchanged.
+    """
+    if any(p.is_cuda for p in module.parameters()):
+        logging.warning(f"Skipping int8 quantization of {type(module).__name__}: model is on GPU.")
+        return module
+    module.eval()
+    return torch.ao.quantization.quantize_dynamic(module, {nn.Linear}, dtype=torch.qint8)
+
+
+def quantize_pipeline(pipe):
+    """Quantize the model behind a transformers pipeline in place; returns the pipeline."""
+    pipe.model = quantize_int8(pipe.model)
+    return pipe
+
+
+def model_size_mb(module: nn.Module) -> float:
+    """Serialized state_dict size, which counts packed int8 weights correctly."""
+    import io
+    buffer = io.BytesIO()
+    torch.save(module.state_dict(), buffer)
+    return buffer.getbuffer().nbytes / (1024 * 1024)
+
+
+# -------------------------
+# Accuracy gate
+# -------------------------
+
+def _read_embeddings_csv(path: Path) -> np.ndarray:
+    import csv
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        cols = [i for i, name in enumerate(header) if name.startswith("embedding_")]
+        rows = np.asarray([[float(row[i]) for i in cols] for row in reader], dtype=np.float32)
+    return np.unique(rows, axis=0)
+
+
+def _eval_matrix(real: Optional[np.ndarray], dim: int, rows: int, seed: int) -> np.ndarray:
+    """
+    The recorded rows, padded to a fixed size with seeded Gaussian rows of the same average
+    norm (the notebooks' CSVs hold only a handful of distinct embeddings).
+    """
+    real = real if real is not None and len(real) else np.zeros((0, dim), dtype=np.float32)
+    norm = float(np.linalg.norm(real, axis=1).mean()) if len(real) else 1.0
+    pad = np.random.default_rng(seed).standard_normal((max(0, rows - len(real)), dim))
+    pad *= norm / np.linalg.norm(pad, axis=1, keepdims=True)
+    return np.concatenate([real, pad.astype(np.float32)])[:rows]
+
+
+def _heatmap_metrics(reference: np.ndarray, candidate: np.ndarray) -> Dict[str, float]:
+    diff = np.abs(reference - candidate)
+    ref_top = np.argsort(-reference, axis=1)[:, :3]
+    cand_top = np.argsort(-candidate, axis=1)[:, :3]
+    top3_overlap = np.mean([len(set(r) & set(c)) / 3.0 for r, c in zip(ref_top, cand_top)])
+    return {
+        "max_abs_diff": float(diff.max()),
+        "mean_abs_diff": float(diff.mean()),
+        "top1_agreement": float(np.mean(ref_top[:, 0] == cand_top[:, 0])),
+        "top3_overlap": float(top3_overlap),
+    }
+
+
+def _fusion_eval_inputs(eval_dir: Path, rows: int = EVAL_ROWS) -> Dict[str, np.ndarray]:
+    from app.routers import heatmap_cross_attention as cross
+    from app.routers import heatmap_cross_attention_at_2 as bicross
+
+    return {
+        "users": _eval_matrix(_read_embeddings_csv(eval_dir / "user_embs_expanded.csv"), cross.EMBED_DIM, rows, seed=1),
+        "videos": _eval_matrix(_read_embeddings_csv(eval_dir / "vid_embs_expanded.csv"), cross.EMBED_DIM, rows, seed=2),
+        "metadata": _eval_matrix(_read_embeddings_csv(eval_dir / "metadata_embeddings_expanded.csv"), cross.EMBED_DIM, rows, seed=3),
+        # No recorded 768-d VidTower outputs ship with the repo; seeded rows stand in
+        "vidtower": _eval_matrix(None, bicross.USER_DIM, rows, seed=4),
+    }
+
+
+def _fusion_heads() -> List[Tuple[str, nn.Module, List[str], List[str]]]:
+    """(name, fp32 model returning 0-1 scores, input keys of _fusion_eval_inputs, ONNX input names)."""
+    from app.routers import heatmap_cross_attention as cross
+    from app.routers import heatmap_cross_attention_at_2 as bicross
+    from app.services.onnx_fusion import SigmoidHead
+
+    return [
+        ("cross_attention", cross.get_model().to("cpu").eval(), ["users", "videos", "metadata"], cross.ONNX_INPUT_NAMES),
+        ("bicross", SigmoidHead(bicross.get_model().to("cpu").eval()).eval(), ["users", "vidtower"], bicross.ONNX_INPUT_NAMES),
+    ]
+
+
+def _torch_run(model: nn.Module, arrays: List[np.ndarray]) -> np.ndarray:
+    with torch.no_grad():
+        return model(*[torch.from_numpy(a) for a in arrays]).numpy()
+
+
+def _fusion_heatmaps(heads, inputs: Dict[str, np.ndarray]) -> Dict[str, Dict[str, float]]:
+    """torch int8 (quantize_dynamic) fusion heads vs fp32, as served with FUSION_RUNTIME=torch."""
+    results = {}
+    for name, fp32, keys, _ in heads:
+        arrays = [inputs[k] for k in keys]
+        int8 = quantize_int8(fp32)
+        results[name] = _heatmap_metrics(_torch_run(fp32, arrays), _torch_run(int8, arrays))
+        results[name].update(rows=len(arrays[0]), fp32_mb=model_size_mb(fp32), int8_mb=model_size_mb(int8))
+    return results
+
+
+def _onnx_int8_heatmaps(heads, inputs: Dict[str, np.ndarray]) -> Dict[str, Dict[str, float]]:
+    """
+    int8 ONNX graphs vs torch fp32, as served with FUSION_RUNTIME=onnx. The graphs are exported
+    from the fp32 models into a temporary directory, so the served graphs are left alone.
+    """
+    from app.services.onnx_fusion import OnnxRunner, export_onnx, quantize_onnx_int8
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, fp32, keys, input_names in heads:
+            arrays = [inputs[k] for k in keys]
+            path = str(Path(tmp) / f"{name}.onnx")
+            export_onnx(fp32, [torch.from_numpy(a[:2]) for a in arrays], input_names, path)
+            int8_path = quantize_onnx_int8(path)
+            results[f"{name}_onnx"] = _heatmap_metrics(_torch_run(fp32, arrays), OnnxRunner(int8_path)(*arrays))
+            results[f"{name}_onnx"].update(rows=len(arrays[0]), fp32_mb=Path(path).stat().st_size / (1024 * 1024),
+                                           int8_mb=Path(int8_path).stat().st_size / (1024 * 1024))
+    return results
+
+
+def _channel_embeddings(profiles_path: Path) -> Dict[str, float]:
+    from app.services import embedding_service as es
+
+    with open(profiles_path) as f:
+        profiles = json.load(f)
+    es._lazy_load_models()
+    reference = es.embed_channel_profiles_bulk(profiles, use_cache=False)
+
+    quantize_loaded_nlp_models()
+    candidate = es.embed_channel_profiles_bulk(profiles, use_cache=False)
+
+    cosines = []
+    for (ref, _), (cand, _) in zip(reference, candidate):
+        norm = np.linalg.norm(ref) * np.linalg.norm(cand)
+        cosines.append(float(ref @ cand / norm) if norm else 1.0)
+    return {"channels": len(profiles), "cosine_min": min(cosines), "cosine_mean": float(np.mean(cosines))}
+
+
+def quantize_loaded_nlp_models():
+    """Quantize the already-loaded NLP models in place and re-embed the topic labels."""
+    from app.services import embedding_service as es
+
+    with es._models_lock:
+        for name in ("ner", "classifier"):
+            if es._models[name] is not None:
+                quantize_pipeline(es._models[name])
+        if es._models["embedder"] is not None:
+            es._models["embedder"] = quantize_int8(es._models["embedder"])
+        es._models["label_embeddings"] = None
+    es._lazy_load_models()
+
+
+def accuracy_gate(eval_dir: Path = EVAL_EMBEDDINGS_DIR, profiles_path: Path = EVAL_PROFILES_PATH,
+                  max_abs_diff: float = 0.05, min_top1: float = 0.97, min_cosine: float = 0.98,
+                  include_nlp: bool = True) -> Dict[str, Any]:
+    """
+    Compare every int8 serving path against fp32. The gate passes only if every path was
+    evaluated and is within the thresholds; a path that could not be evaluated (skipped, or
+    its dependencies are missing) is listed under "not_evaluated" and fails the gate.
+    """
+    if int8_enabled():
+        raise RuntimeError("Run the gate with MODEL_QUANTIZATION=none; it builds the int8 models itself")
+    heads = _fusion_heads()
+    inputs = _fusion_eval_inputs(eval_dir)
+    report: Dict[str, Any] = {"heatmaps": _fusion_heatmaps(heads, inputs)}
+    not_evaluated: Dict[str, str] = {}
+    try:
+        report["heatmaps"].update(_onnx_int8_heatmaps(heads, inputs))
+    except Exception as e:
+        logging.exception("ONNX Runtime int8 fusion graphs could not be evaluated")
+        not_evaluated["onnx_int8_fusion"] = f"{type(e).__name__}: {e}"
+
+    failures: List[str] = []
+    for name, m in report["heatmaps"].items():
+        if m["max_abs_diff"] > max_abs_diff:
+            failures.append(f"{name}: max_abs_diff {m['max_abs_diff']:.4f} > {max_abs_diff}")
+        if m["top1_agreement"] < min_top1:
+            failures.append(f"{name}: top1_agreement {m['top1_agreement']:.3f} < {min_top1}")
+    if not include_nlp:
+        not_evaluated["channel_embeddings"] = "skipped (--skip-nlp)"
+    else:
+        try:
+            report["channel_embeddings"] = _channel_embeddings(profiles_path)
+        except Exception as e:
+            logging.exception("NLP models could not be evaluated")
+            not_evaluated["channel_embeddings"] = f"{type(e).__name__}: {e}"
+        else:
+            if report["channel_embeddings"]["cosine_min"] < min_cosine:
+                failures.append(f"channel_embeddings: cosine_min {report['channel_embeddings']['cosine_min']:.4f} < {min_cosine}")
+    failures += [f"{name}: not evaluated ({reason})" for name, reason in not_evaluated.items()]
+
+    report["thresholds"] = {"max_abs_diff": max_abs_diff, "min_top1": min_top1, "min_cosine": min_cosine}
+    report["not_evaluated"] = not_evaluated
+    report["failures"] = failures
+    report["passed"] = not failures
+    return report
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="int8 quantization accuracy gate")
+    parser.add_argument("command", choices=["gate"])
+    parser.add_argument("--max-abs-diff", type=float, default=0.05)
+    parser.add_argument("--min-top1", type=float, default=0.97)
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    parser.add_argument("--skip-nlp", action="store_true",
+                        help="do not load the NLP models (the gate then reports them as not evaluated and fails)")
+    args = parser.parse_args(argv)
+
+    report = accuracy_gate(max_abs_diff=args.max_abs_diff, min_top1=args.min_top1,
+                           min_cosine=args.min_cosine, include_nlp=not args.skip_nlp)
+    print(json.dumps(report, indent=2))
+    return 0 if report["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+import re
+import sys
+import time
+import hashlib
+import logging
+import sqlite3
+import unicodedata
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional, Dict, Any, List
+
+import numpy as np
+
+from app.config import (
+    VIDEO_EMB_CACHE_ENABLED,
+    VIDEO_EMB_CACHE_MAX_ENTRIES,
+    VIDEO_EMB_CACHE_PATH,
+    VIDEO_EMB_CACHE_DISK_MAX_ENTRIES,
+)
+from app.models.embedding_models import VideoInput
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize_text(text: str) -> str:
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text or "")).strip()
+
+
+def video_input_key(video: VideoInput, namespace: str = "") -> str:
+    """
+    Content hash of a VideoInput. Whitespace runs are collapsed, text is NFC-normalized and
+    tags are compared as a comma-separated list, so trivially different resends share a key.
+    namespace separates embeddings produced by different backends.
+    """
+    tags = [_normalize_text(t) for t in (video.tags or "").split(",")]
+    parts = [
+        namespace,
+        _normalize_text(video.title),
+        _normalize_text(video.description),
+        ",".join(t for t in tags if t),
+        (video.thumbnail_url or "").strip(),
+    ]
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+
+def as_stored(embedding: List[float]) -> List[float]:
+    """embedding rounded to the float32 values the cache stores, so misses and hits return the same values."""
+    return np.asarray(embedding, dtype=np.float32).tolist()
+
+
+# -------------------------
+# Video embedding cache
+# -------------------------
+
+class VideoEmbeddingCache:
+    """
+    In-memory LRU of video embeddings (float32) keyed by video_input_key, with an optional
+    SQLite file behind it: writes go through to disk and memory misses fall back to it,
+    so results survive restarts. The disk table is evicted least-recently-used once it grows
+    past disk_max_entries.
+    """
+
+    def __init__(self, max_entries: int, path: Optional[str] = None,
+                 disk_max_entries: int = VIDEO_EMB_CACHE_DISK_MAX_ENTRIES):
+        self.max_entries = max(1, int(max_entries))
+        self.disk_max_entries = max(1, int(disk_max_entries))
+        self.path = path or None
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        self._conn = None
+        if self.path:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS video_embeddings (
+                    key TEXT PRIMARY KEY,
+                    embedding BLOB NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL DEFAULT 0
+                )
+                """
+            )
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(video_embeddings)")]
+            if "last_access" not in columns:
+                # Files written before the disk cap existed
+                self._conn.execute("ALTER TABLE video_embeddings ADD COLUMN last_access REAL NOT NULL DEFAULT 0")
+                self._conn.execute("UPDATE video_embeddings SET last_access = created_at")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_video_embeddings_last_access ON video_embeddings (last_access)"
+            )
+            self._evict_disk_locked()
+            self._conn.commit()
+
+    def _remember_locked(self, key: str, embedding: np.ndarray):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old.nbytes
+        self._entries[key] = embedding
+        self._bytes += embedding.nbytes
+        while len(self._entries) > self.max_entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return embedding.tolist()
+            if self._conn is not None:
+                row = self._conn.execute("SELECT embedding FROM video_embeddings WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    embedding = np.frombuffer(row[0], dtype=np.float32).copy()
+                    self._conn.execute("UPDATE video_embeddings SET last_access = ? WHERE key = ?", (time.time(), key))
+                    self._conn.commit()
+                    self._remember_locked(key, embedding)
+                    self.disk_hits += 1
+                    return embedding.tolist()
+            self.misses += 1
+            return None
+
+    def put(self, key: str, embedding: List[float]):
+        arr = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            self._remember_locked(key, arr)
+            if self._conn is not None:
+                now = time.time()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO video_embeddings (key, embedding, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, arr.tobytes(), now, now),
+                )
+                self._evict_disk_locked()
+                self._conn.commit()
+
+    def _evict_disk_locked(self):
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM video_embeddings").fetchone()
+        overflow = count - self.disk_max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM video_embeddings WHERE key IN "
+                "(SELECT key FROM video_embeddings ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
+            self.disk_evictions += overflow
+
+    def clear(self):
+        """Drop the in-memory entries (the disk copy, if any, is kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            disk_entries = None
+            if self._conn is not None:
+                (disk_entries,) = self._conn.execute("SELECT COUNT(*) FROM video_embeddings").fetchone()
+            # Array payloads plus per-entry key / ndarray header overhead
+            overhead = sum(sys.getsizeof(k) + sys.getsizeof(v) - v.nbytes for k, v in self._entries.items())
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else None,
+                "memory_bytes": self._bytes + overhead,
+                "embedding_bytes": self._bytes,
+                "disk_path": self.path,
+                "disk_entries": disk_entries,
+                "disk_max_entries": self.disk_max_entries if self._conn is not None else None,
+                "disk_evictions": self.disk_evictions,
+            }
+
+
+_cache: Optional[VideoEmbeddingCache] = None
+_cache_lock = Lock()
+
+
+def get_video_embedding_cache() -> Optional[VideoEmbeddingCache]:
+    """
+    Shared VideoEmbeddingCache, created on first use. Returns None when disabled. If the
+    disk file cannot be opened the cache runs memory-only.
+    """
+    global _cache
+    if not VIDEO_EMB_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = VideoEmbeddingCache(VIDEO_EMB_CACHE_MAX_ENTRIES, VIDEO_EMB_CACHE_PATH)
+            except sqlite3.Error:
+                logging.exception("Failed to open video embedding cache file; keeping it in memory only")
+                _cache = VideoEmbeddingCache(VIDEO_EMB_CACHE_MAX_ENTRIES)
+        return _cache
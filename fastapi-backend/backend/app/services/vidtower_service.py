@@ -0,0 +1,259 @@
+import json
+import re
+import asyncio
+import hashlib
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import (
+    VIDTOWER_BACKEND,
+    VIDTOWER_SPACE,
+    VIDTOWER_TIMEOUT_SECONDS,
+    VIDTOWER_MAX_CONCURRENCY,
+    VIDTOWER_FAKE_LATENCY_MS,
+)
+from app.models.embedding_models import VideoInput
+from app.services.video_embedding_cache import VideoEmbeddingCache, as_stored, get_video_embedding_cache, video_input_key
+from app.services.metrics import timed, model_timer, register_stats_source
+from app.services.warmup import register_model
+
+VIDTOWER_DIM = 768
+
+
+class VidTowerError(Exception):
+    """VidTower could not produce an embedding (unreachable, timed out or malformed output)."""
+
+
+def normalize_embedding(result: Any) -> List[float]:
+    """Normalize the various VidTower response shapes into a list[float]."""
+    if isinstance(result, (list, tuple)):
+        return [float(x) for x in result]
+    if hasattr(result, "tolist"):
+        return [float(x) for x in result.tolist()]
+    if isinstance(result, str):
+        # Try JSON first: e.g., "[0.1, 0.2, ...]"
+        try:
+            parsed = json.loads(result)
+        except Exception:
+            parsed = None
+        if isinstance(parsed, (list, tuple)):
+            return [float(x) for x in parsed]
+        # Fallback: extract all numbers from the string
+        nums = re.findall(r"[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?", result)
+        if not nums:
+            raise VidTowerError("VidTower returned a string without numeric values")
+        return [float(x) for x in nums]
+    raise VidTowerError(f"Unexpected VidTower response type: {type(result).__name__}")
+
+
+# -------------------------
+# Backends
+# -------------------------
+
+class GradioVidTowerBackend:
+    """The hosted MeshMax/VidTower Space. The gradio Client (Space handshake + config
+    download) is created once on first use and reused for every call."""
+
+    name = "gradio"
+
+    def __init__(self, space: str = VIDTOWER_SPACE, timeout: float = VIDTOWER_TIMEOUT_SECONDS):
+        self.space = space
+        self.timeout = timeout
+        self._client = None
+        self._lock = Lock()
+
+    def _get_client(self):
+        with self._lock:
+            if self._client is None:
+                from gradio_client import Client
+                self._client = Client(self.space, verbose=False, httpx_kwargs={"timeout": self.timeout})
+                logging.info(f"VidTower client connected to {self.space}.")
+            return self._client
+
+    def warm_up(self):
+        """Connect to the Space ahead of the first request (no prediction is made)."""
+        self._get_client()
+
+    def predict(self, video: VideoInput) -> Any:
+        return self._get_client().predict(
+            title=video.title,
+            description=video.description,
+            tags=video.tags,
+            thumbnail_url=video.thumbnail_url,
+            api_name="/predict",
+        )
+
+
+class FakeVidTowerBackend:
+    """Local stand-in for benchmarks and tests: a deterministic unit vector per input,
+    with optional simulated latency. No network."""
+
+    name = "fake"
+
+    def __init__(self, dim: int = VIDTOWER_DIM, latency_ms: float = VIDTOWER_FAKE_LATENCY_MS):
+        self.dim = dim
+        self.latency_ms = latency_ms
+
+    def predict(self, video: VideoInput) -> Any:
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000.0)
+        digest = hashlib.sha256(
+            "\x00".join([video.title, video.description, video.tags, video.thumbnail_url]).encode("utf-8")
+        ).digest()
+        rng = np.random.default_rng(int.from_bytes(digest[:8], "little"))
+        vec = rng.standard_normal(self.dim)
+        return (vec / np.linalg.norm(vec)).tolist()
+
+
+BACKENDS = {
+    "gradio": GradioVidTowerBackend,
+    "fake": FakeVidTowerBackend,
+}
+
+
+# -------------------------
+# Service
+# -------------------------
+
+class VidTowerService:
+    """
+    Shared entry point for VidTower embeddings. Calls run on a dedicated pool of
+    max_concurrency threads, which bounds in-flight requests for sync and async callers
+    alike; each call is bounded by timeout seconds (queueing included).
+    With a cache, repeated inputs are served locally and identical concurrent requests
+    share one upstream call.
+    """
+
+    def __init__(self, backend, max_concurrency: int = VIDTOWER_MAX_CONCURRENCY,
+                 timeout: float = VIDTOWER_TIMEOUT_SECONDS, cache: Optional[VideoEmbeddingCache] = None):
+        self.backend = backend
+        self.timeout = timeout
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="vidtower")
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = Lock()
+        self.coalesced = 0
+
+    def _call(self, video: VideoInput) -> List[float]:
+        with model_timer("vidtower"):
+            embedding = normalize_embedding(self.backend.predict(video))
+        # With a cache, a miss returns the same float32-rounded values a later hit will
+        return as_stored(embedding) if self.cache is not None else embedding
+
+    def _settle(self, key: str, future: Future):
+        if not future.cancelled() and future.exception() is None:
+            self.cache.put(key, future.result())
+        with self._inflight_lock:
+            self._inflight.pop(key, None)
+
+    def _lookup_or_submit(self, video: VideoInput) -> Tuple[Optional[List[float]], Optional[Future]]:
+        """(cached embedding, None) on a cache hit, else (None, future of the upstream call)."""
+        if self.cache is None:
+            return None, self._executor.submit(self._call, video)
+        key = video_input_key(video, self.backend.name)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached, None
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            submitted = future is None
+            if submitted:
+                future = self._executor.submit(self._call, video)
+                self._inflight[key] = future
+            else:
+                self.coalesced += 1
+        if submitted:
+            # Outside the lock: a call that already finished runs the callback inline
+            future.add_done_callback(lambda f, key=key: self._settle(key, f))
+        return None, future
+
+    def start(self, video: VideoInput) -> Callable[[], List[float]]:
+        """
+        Start the lookup / upstream call now and return a blocking wait for its result, so sync
+        callers can do other work meanwhile. The timeout counts from start().
+        """
+        cached, future = self._lookup_or_submit(video)
+        deadline = time.monotonic() + self.timeout
+
+        def wait() -> List[float]:
+            if cached is not None:
+                return cached
+            try:
+                return future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeoutError:
+                raise VidTowerError(f"VidTower timed out after {self.timeout:g}s")
+            except VidTowerError:
+                raise
+            except Exception as e:
+                raise VidTowerError(str(e)) from e
+        return wait
+
+    @timed("vidtower.embed")
+    def embed(self, video: VideoInput) -> List[float]:
+        """Blocking call for sync routes."""
+        return self.start(video)()
+
+    @timed("vidtower.embed_async")
+    async def embed_async(self, video: VideoInput) -> List[float]:
+        """Non-blocking call for async routes; the event loop is never blocked."""
+        cached, future = self._lookup_or_submit(video)
+        if cached is not None:
+            return cached
+        try:
+            # shield: a timed-out waiter must not cancel a call other requests may share
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            raise VidTowerError(f"VidTower timed out after {self.timeout:g}s")
+        except VidTowerError:
+            raise
+        except Exception as e:
+            raise VidTowerError(str(e)) from e
+
+    def stats(self) -> Dict[str, Any]:
+        with self._inflight_lock:
+            inflight = len(self._inflight)
+        return {
+            "backend": self.backend.name,
+            "inflight": inflight,
+            "coalesced": self.coalesced,
+            "cache": self.cache.stats() if self.cache is not None else None,
+        }
+
+
+_service: Optional[VidTowerService] = None
+_service_lock = Lock()
+register_stats_source("vidtower", lambda: _service.stats() if _service is not None else None)
+
+
+def get_vidtower_service() -> VidTowerService:
+    """Process-wide VidTowerService for the configured backend (VIDTOWER_BACKEND)."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            if VIDTOWER_BACKEND not in BACKENDS:
+                raise ValueError(f"Unknown VidTower backend '{VIDTOWER_BACKEND}', expected one of {tuple(BACKENDS)}")
+            _service = VidTowerService(BACKENDS[VIDTOWER_BACKEND](), cache=get_video_embedding_cache())
+        return _service
+
+
+def _warm_up():
+    warm_up = getattr(get_vidtower_service().backend, "warm_up", None)
+    if warm_up is not None:
+        warm_up()
+
+
+# The hosted Space is outside our control, so it is reported but does not gate readiness
+register_model("vidtower", _warm_up, required=False)
+
+
+def set_vidtower_backend(backend) -> VidTowerService:
+    """Swap the backend of the shared service (e.g. a fake for tests or benchmarks)."""
+    global _service
+    with _service_lock:
+        _service = VidTowerService(backend, cache=get_video_embedding_cache())
+        return _service
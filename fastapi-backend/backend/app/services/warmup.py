@@ -0,0 +1,129 @@
+"""
+Startup warm-up and per-model readiness.
+
+Each module that owns a model registers it with register_model(name, warm_fn); warm_fn loads
+the model (if it is not loaded yet) and runs one dummy batch through it, so one-time costs
+(downloads, weight loading, ONNX session setup, first-call allocations) are paid before traffic
+arrives instead of by the first request. start_warmup() runs every warm_fn in a background
+thread once the server is listening; GET /health/ready answers 200 only when every required
+model is ready.
+
+    pending -> loading -> ready | failed       (WARMUP_ENABLED=false: "lazy", loaded on first use)
+
+A required model that fails to warm up is "failed" (readiness fails with it) until the warm-up
+thread retries it successfully, with exponential backoff from WARMUP_RETRY_INITIAL_SECONDS up to
+WARMUP_RETRY_MAX_SECONDS; requests that need it meanwhile still retry the load lazily. Optional models (required=False) are reported but never gate
+readiness, e.g. the hosted VidTower Space.
+"""
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from app.config import WARMUP_ENABLED, WARMUP_RETRY_INITIAL_SECONDS, WARMUP_RETRY_MAX_SECONDS
+from app.services.metrics import register_stats_source
+
+PENDING, LOADING, READY, FAILED, LAZY = "pending", "loading", "ready", "failed", "lazy"
+
+
+class _Model:
+    __slots__ = ("warm_fn", "required", "state", "seconds", "error")
+
+    def __init__(self, warm_fn: Callable[[], Any], required: bool):
+        self.warm_fn = warm_fn
+        self.required = required
+        self.state = PENDING if WARMUP_ENABLED else LAZY
+        self.seconds: Optional[float] = None
+        self.error: Optional[str] = None
+
+
+_models: Dict[str, _Model] = {}
+_lock = threading.Lock()
+_thread: Optional[threading.Thread] = None
+
+
+def register_model(name: str, warm_fn: Callable[[], Any], required: bool = True):
+    """Register a model for warm-up; warm_fn() must be safe to call while requests use the model."""
+    with _lock:
+        _models[name] = _Model(warm_fn, required)
+
+
+def _warm(name: str, model: _Model):
+    with _lock:
+        model.state = LOADING
+    start = time.perf_counter()
+    try:
+        model.warm_fn()
+    except Exception as e:
+        if model.required:
+            logging.exception(f"Warm-up of {name} failed")
+        else:
+            logging.warning(f"Warm-up of optional {name} failed: {e}")
+        with _lock:
+            model.state, model.error = FAILED, f"{type(e).__name__}: {e}"
+    else:
+        with _lock:
+            model.state, model.error = READY, None
+        logging.info(f"{name} warmed up in {time.perf_counter() - start:.1f}s.")
+    finally:
+        model.seconds = round(time.perf_counter() - start, 3)
+
+
+def _run_all():
+    with _lock:
+        models = list(_models.items())
+    for name, model in models:
+        _warm(name, model)
+    _retry_failed(models)
+
+
+def _retry_failed(models, sleep: Callable[[float], Any] = time.sleep):
+    """Retry failed required models until they are all ready, backing off between rounds."""
+    delay = max(0.0, WARMUP_RETRY_INITIAL_SECONDS)
+    while True:
+        with _lock:
+            failed = [(name, m) for name, m in models if m.required and m.state == FAILED]
+        if not failed:
+            return
+        logging.warning(f"Retrying warm-up of {[name for name, _ in failed]} in {delay:.0f}s")
+        sleep(delay)
+        for name, model in failed:
+            _warm(name, model)
+        delay = min(max(delay * 2, 1.0), WARMUP_RETRY_MAX_SECONDS)
+
+
+def start_warmup():
+    """Warm every registered model in one background thread (no-op with WARMUP_ENABLED=false)."""
+    global _thread
+    if not WARMUP_ENABLED or _thread is not None:
+        return
+    _thread = threading.Thread(target=_run_all, name="model-warmup", daemon=True)
+    _thread.start()
+
+
+# -------------------------
+# Readiness
+# -------------------------
+
+def model_states() -> Dict[str, Dict[str, Any]]:
+    with _lock:
+        return {
+            name: {"state": m.state, "required": m.required, "seconds": m.seconds,
+                   **({"error": m.error} if m.error else {})}
+            for name, m in _models.items()
+        }
+
+
+def is_ready() -> bool:
+    """True once every required model is ready (always, when warm-up is disabled)."""
+    with _lock:
+        return all(m.state in (READY, LAZY) for m in _models.values() if m.required)
+
+
+def _warmup_stats() -> Dict[str, Any]:
+    with _lock:
+        return {name: {"ready": m.state in (READY, LAZY), "failed": m.state == FAILED,
+                       "seconds": m.seconds or 0.0} for name, m in _models.items()}
+
+
+register_stats_source("warmup", _warmup_stats)
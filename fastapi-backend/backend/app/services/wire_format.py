@@ -0,0 +1,302 @@
+"""
+Content-negotiated wire formats for embedding requests and heatmap / embedding responses.
+
+Request body (Content-Type):
+    application/json          the usual fields, validated against the route's pydantic body model
+                              (malformed or invalid bodies answer 422, like any FastAPI body);
+                              any array field may instead be a packed object
+                              {"data": <base64 little-endian floats>, "dtype": "float32"}
+    application/msgpack       same map; packed "data" is raw bytes (bin) instead of base64
+    application/octet-stream  the endpoint's array fields concatenated in order as raw
+                              little-endian floats (dtype from "; dtype=float16", default float32);
+                              batch endpoints take the row-major matrices back to back
+
+Response (Accept, highest q-value first; ties keep header order):
+application/json keeps the existing JSON shape;
+"application/json; encoding=base64" and application/msgpack return the same keys with packed
+arrays {"data", "dtype", "shape"}; application/octet-stream returns the raw array (single-array
+responses only) with X-Embedding-Dtype / X-Embedding-Shape headers. A "dtype=float16" parameter
+on the Accept value halves any packed or raw payload. msgpack is an optional dependency.
+"""
+import json
+import base64
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+import numpy as np
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response
+from pydantic import ValidationError
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+OCTET_STREAM = "application/octet-stream"
+MSGPACK_ALIASES = (MSGPACK, "application/x-msgpack")
+DTYPES = {"float32": np.dtype("<f4"), "float16": np.dtype("<f2")}
+
+
+class WireFormatError(ValueError):
+    """
+    Body could not be decoded; status_code is 400 (malformed binary body, wrong dimensions,
+    NaN / infinite values) or 415 (unsupported type). Malformed or invalid JSON / msgpack maps raise RequestValidationError.
+    """
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _media_type(value: str) -> Tuple[str, Dict[str, str]]:
+    """'application/json; encoding=base64' -> ('application/json', {'encoding': 'base64'})"""
+    parts = [p.strip() for p in (value or "").split(";")]
+    params = {}
+    for p in parts[1:]:
+        if "=" in p:
+            k, v = p.split("=", 1)
+            params[k.strip().lower()] = v.strip().strip('"').lower()
+    return parts[0].lower(), params
+
+
+def _dtype(name: Optional[str]) -> np.dtype:
+    name = name or "float32"
+    if name not in DTYPES:
+        raise WireFormatError(f"Unsupported dtype '{name}', expected one of {tuple(DTYPES)}")
+    return DTYPES[name]
+
+
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError:
+        raise WireFormatError("msgpack is not installed on this server", status_code=415)
+    return msgpack
+
+
+# -------------------------
+# Requests
+# -------------------------
+
+def _check_finite(array: np.ndarray, name: str) -> np.ndarray:
+    # NaN / Infinity pass JSON and msgpack decoding, and float32 overflow turns large values into
+    # inf; any of them would silently produce a NaN heatmap
+    if not np.isfinite(array).all():
+        raise WireFormatError(f"{name}: values must be finite (no NaN or Infinity)")
+    return array
+
+
+def _as_array(value: Any, name: str, dim: int, batch: bool) -> np.ndarray:
+    if isinstance(value, dict):
+        data = value.get("data")
+        if isinstance(data, str):
+            try:
+                data = base64.b64decode(data, validate=True)
+            except ValueError:
+                raise WireFormatError(f"{name}: data is not valid base64")
+        if not isinstance(data, (bytes, bytearray)):
+            raise WireFormatError(f"{name}: packed arrays need a 'data' field")
+        dtype = _dtype(value.get("dtype"))
+        if len(data) % dtype.itemsize:
+            raise WireFormatError(f"{name}: {len(data)} bytes is not a whole number of {dtype.name} values")
+        array = np.frombuffer(data, dtype=dtype).astype(np.float32)
+    else:
+        try:
+            # Out-of-range values become inf here and are rejected by _check_finite below
+            with np.errstate(over="ignore"):
+                array = np.asarray(value, dtype=np.float32)
+        except (ValueError, TypeError):
+            raise WireFormatError(f"{name}: expected a list of numbers or a packed array")
+
+    if batch:
+        if array.ndim == 1:
+            if array.size % dim:
+                raise WireFormatError(f"{name}: expected rows of dim {dim}, got {array.size} values")
+            array = array.reshape(-1, dim)
+        if array.ndim != 2 or array.shape[1] != dim:
+            raise WireFormatError(f"{name}: expected dim {dim}, got {array.shape[-1] if array.ndim else 0}")
+    else:
+        array = array.reshape(-1)
+        if array.shape[0] != dim:
+            raise WireFormatError(f"Expected {name} dim {dim}, got {array.shape[0]}")
+    return _check_finite(array, name)
+
+
+def _split_octet_stream(body: bytes, fields: Dict[str, int], dtype: np.dtype, batch: bool) -> Dict[str, np.ndarray]:
+    row_values = sum(fields.values())
+    if len(body) % dtype.itemsize:
+        raise WireFormatError(f"Body of {len(body)} bytes is not a whole number of {dtype.name} values")
+    values = np.frombuffer(body, dtype=dtype)
+    rows = values.size // row_values if batch else 1
+    if values.size != rows * row_values:
+        expected = f"a multiple of {row_values}" if batch else str(row_values)
+        raise WireFormatError(f"Expected {expected} {dtype.name} values ({', '.join(fields)}), got {values.size}")
+
+    arrays, offset = {}, 0
+    for name, dim in fields.items():
+        size = rows * dim
+        chunk = _check_finite(values[offset:offset + size].astype(np.float32), name)
+        arrays[name] = chunk.reshape(rows, dim) if batch else chunk
+        offset += size
+    return arrays
+
+
+def _validate(payload: Any, model: type, fields: Dict[str, int]):
+    """
+    Validate a decoded JSON / msgpack body against the route's body model, as FastAPI would for a
+    declared body parameter. Packed array fields are checked by _as_array instead.
+    """
+    if isinstance(payload, dict):
+        payload = {k: [] if k in fields and isinstance(v, dict) else v for k, v in payload.items()}
+    try:
+        model.model_validate(payload)
+    except ValidationError as e:
+        errors = [{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)]
+        raise RequestValidationError(errors, body=payload)
+
+
+async def read_arrays(request: Request, fields: Dict[str, int], batch: bool = False,
+                      model: Optional[type] = None) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """
+    Decode the body into float32 arrays for fields (name -> dim, in wire order): [dim] vectors,
+    or [N, dim] matrices with batch=True. Returns (arrays, remaining non-array fields).
+    JSON and msgpack maps are validated against model (the route's pydantic body model) and
+    raise RequestValidationError (422) when malformed or invalid. Raises WireFormatError on
+    malformed binary bodies, wrong dimensions, non-finite values and unsupported types.
+    """
+    media_type, params = _media_type(request.headers.get("content-type", JSON))
+    body = await request.body()
+
+    if media_type == OCTET_STREAM:
+        return _split_octet_stream(body, fields, _dtype(params.get("dtype")), batch), {}
+    if media_type in MSGPACK_ALIASES:
+        try:
+            payload = _msgpack().unpackb(body, raw=False)
+        except WireFormatError:
+            raise
+        except Exception:
+            raise WireFormatError("Body is not valid msgpack")
+    elif media_type in (JSON, "") or media_type.endswith("+json"):
+        try:
+            payload = json.loads(body)
+        except json.JSONDecodeError as e:
+            # Same error FastAPI reports for a malformed body of a declared body parameter
+            raise RequestValidationError(
+                [{"type": "json_invalid", "loc": ("body", e.pos), "msg": "JSON decode error",
+                  "input": {}, "ctx": {"error": e.msg}}],
+                body=e.doc,
+            )
+        except ValueError:
+            raise RequestValidationError(
+                [{"type": "json_invalid", "loc": ("body", 0), "msg": "JSON decode error", "input": {}}]
+            )
+    else:
+        raise WireFormatError(f"Unsupported Content-Type '{media_type}'", status_code=415)
+
+    if model is not None:
+        _validate(payload, model, fields)
+    if not isinstance(payload, dict):
+        raise WireFormatError("Body must be an object")
+    missing = [name for name in fields if name not in payload]
+    if missing:
+        raise WireFormatError(f"Missing field(s): {', '.join(missing)}")
+    arrays = {name: _as_array(payload[name], name, dim, batch) for name, dim in fields.items()}
+    rest = {k: v for k, v in payload.items() if k not in fields}
+    return arrays, rest
+
+
+# -------------------------
+# Responses
+# -------------------------
+
+def _packed(array: np.ndarray, dtype: np.dtype, text: bool) -> Dict[str, Any]:
+    data = np.ascontiguousarray(array, dtype=dtype).tobytes()
+    return {
+        "data": base64.b64encode(data).decode("ascii") if text else data,
+        "dtype": dtype.name,
+        "shape": list(array.shape),
+    }
+
+
+def _accepted(accept: str) -> List[Tuple[str, Dict[str, str]]]:
+    """Accept header entries ordered by q-value (highest first, ties in header order); q=0 dropped."""
+    entries = []
+    for index, value in enumerate(accept.split(",")):
+        media_type, params = _media_type(value)
+        try:
+            q = float(params.pop("q", "1"))
+        except ValueError:
+            q = 1.0
+        if q > 0:
+            entries.append((-q, index, media_type, params))
+    return [(media_type, params) for _, _, media_type, params in sorted(entries)]
+
+
+def array_response(request: Request, arrays: Dict[str, np.ndarray], json_content: Callable[[], Any],
+                   extra: Optional[Dict[str, Any]] = None) -> Response:
+    """
+    Encode arrays (plus scalar extra fields) in the format asked for by the Accept header.
+    json_content builds the endpoint's existing JSON body and is only called for plain JSON.
+    """
+    for media_type, params in _accepted(request.headers.get("accept") or JSON):
+        try:
+            dtype = _dtype(params.get("dtype"))
+        except WireFormatError as e:
+            return JSONResponse(status_code=406, content={"detail": str(e)})
+
+        if media_type == OCTET_STREAM and len(arrays) == 1:
+            array = next(iter(arrays.values()))
+            return Response(
+                content=np.ascontiguousarray(array, dtype=dtype).tobytes(),
+                media_type=OCTET_STREAM,
+                headers={"X-Embedding-Dtype": dtype.name, "X-Embedding-Shape": ",".join(map(str, array.shape))},
+            )
+        if media_type in MSGPACK_ALIASES:
+            try:
+                packer = _msgpack()
+            except WireFormatError:
+                continue
+            content = {**(extra or {}), **{k: _packed(a, dtype, text=False) for k, a in arrays.items()}}
+            return Response(content=packer.packb(content, use_bin_type=True), media_type=MSGPACK)
+        if media_type == JSON and params.get("encoding") == "base64":
+            content = {**(extra or {}), **{k: _packed(a, dtype, text=True) for k, a in arrays.items()}}
+            return JSONResponse(content=content)
+        if media_type in (JSON, "*/*", "application/*", ""):
+            break
+    return JSONResponse(content=json_content())
+
+
+# Body models of raw-Request routes, added to the OpenAPI components by add_body_schemas
+_BODY_MODELS: Dict[str, type] = {}
+
+
+def request_body_spec(model, binary: bool = True) -> Dict[str, Any]:
+    """
+    openapi_extra documenting a raw-Request route's body: model (by reference, registered with
+    add_body_schemas) for JSON and msgpack, the binary types, and the 422 validation response.
+    """
+    _BODY_MODELS[model.__name__] = model
+    ref = {"$ref": f"#/components/schemas/{model.__name__}"}
+    content = {JSON: {"schema": ref}, MSGPACK: {"schema": ref}}
+    if binary:
+        content[OCTET_STREAM] = {"schema": {"type": "string", "format": "binary"}}
+    return {
+        "requestBody": {"required": True, "content": content},
+        "responses": {"422": {
+            "description": "Validation Error",
+            "content": {JSON: {"schema": {"$ref": "#/components/schemas/HTTPValidationError"}}},
+        }},
+    }
+
+
+def add_body_schemas(openapi_schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the models registered by request_body_spec (and FastAPI's validation error schemas)."""
+    from fastapi.openapi.utils import validation_error_definition, validation_error_response_definition
+
+    schemas = openapi_schema.setdefault("components", {}).setdefault("schemas", {})
+    for name, model in _BODY_MODELS.items():
+        schema = model.model_json_schema(ref_template="#/components/schemas/{model}")
+        for def_name, definition in schema.pop("$defs", {}).items():
+            schemas.setdefault(def_name, definition)
+        schemas.setdefault(name, schema)
+    schemas.setdefault("ValidationError", validation_error_definition)
+    schemas.setdefault("HTTPValidationError", validation_error_response_definition)
+    return openapi_schema
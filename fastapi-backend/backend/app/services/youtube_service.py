@@ -1,95 +1,330 @@
-import requests
-from app.config import YOUTUBE_API_KEY
+import asyncio
+from collections import OrderedDict
+from threading import Lock
 
-BASE_URL = "https://www.googleapis.com/youtube/v3"
+from app.services.http_client import youtube_client, async_youtube_client
+from app.services.metrics import timed
 
+# channel_id -> uploads playlist id; the mapping never changes, so it is memoized for the
+# life of the process (bounded so a stream of unknown IDs cannot grow it forever)
+UPLOADS_PLAYLIST_MEMO_SIZE = 10000
+# channels.list / videos.list accept at most 50 IDs per call
+API_BATCH_SIZE = 50
+_uploads_playlists: "OrderedDict[str, str]" = OrderedDict()
+_uploads_playlists_lock = Lock()
 
+def _remember_uploads_playlist(channel_id: str, channel_data):
+    uploads = _uploads_playlist_of(channel_data)
+    if not uploads:
+        return
+    with _uploads_playlists_lock:
+        _uploads_playlists[channel_id] = uploads
+        _uploads_playlists.move_to_end(channel_id)
+        while len(_uploads_playlists) > UPLOADS_PLAYLIST_MEMO_SIZE:
+            _uploads_playlists.popitem(last=False)
+
+def known_uploads_playlist(channel_id: str):
+    """Memoized uploads playlist id for a channel, or None if not seen yet."""
+    with _uploads_playlists_lock:
+        return _uploads_playlists.get(channel_id)
+
+
+def _channel_params(channel_id: str):
+    return {
+        "part": "snippet,statistics,contentDetails",
+        "id": channel_id,
+    }
+
+def _uploads_playlist_of(channel_data):
+    items = (channel_data or {}).get("items") or []
+    if not items:
+        return None
+    return (
+        items[0]
+        .get("contentDetails", {})
+        .get("relatedPlaylists", {})
+        .get("uploads")
+    )
+
+def _playlist_params(uploads_playlist: str, max_results: int):
+    return {
+        "part": "snippet,contentDetails",
+        "playlistId": uploads_playlist,
+        "maxResults": max(1, min(int(max_results or 10), 50)),
+    }
+
+def _playlist_video_ids(playlist_json):
+    p_items = (playlist_json or {}).get("items") or []
+    video_ids = [i.get("contentDetails", {}).get("videoId") for i in p_items]
+    return [vid for vid in video_ids if vid]
+
+def _videos_params(video_ids):
+    return {
+        "part": "snippet,statistics",
+        "id": ",".join(video_ids),
+    }
+
+def _parse_videos(videos_json):
+    v_items = (videos_json or {}).get("items") or []
+    videos = []
+    for v in v_items:
+        snip = v.get("snippet", {})
+        thumbs = snip.get("thumbnails", {})
+        thumb_url = None
+        # choose available thumbnail key
+        for k in ("default", "medium", "high", "standard", "maxres"):
+            if k in thumbs and isinstance(thumbs[k], dict):
+                thumb_url = thumbs[k].get("url")
+                if thumb_url:
+                    break
+        stats = v.get("statistics", {})
+        videos.append(
+            {
+                "video_id": v.get("id", ""),
+                "title": snip.get("title", ""),
+                "description": snip.get("description", ""),
+                "thumbnail_url": thumb_url or "",
+                "viewCount": stats.get("viewCount", 0),
+            }
+        )
+    return videos
+
+def _latest_upload_params(uploads_playlist_id: str):
+    return {
+        "part": "contentDetails",
+        "playlistId": uploads_playlist_id,
+        "maxResults": 1,
+    }
+
+def _latest_upload_from(data):
+    if "error" in data:
+        return None
+    items = data.get("items") or []
+    if not items:
+        return ""
+    return items[0].get("contentDetails", {}).get("videoId") or ""
+
+def _build_profile(channel_id: str, channel_data, videos):
+    items = (channel_data or {}).get("items") or []
+    if not items:
+        return None
+    channel_info = items[0]
+    stats = channel_info.get("statistics", {})
+    recent_videos = [
+        {
+            "video_id": v.get("video_id", ""),
+            "title": v.get("title", ""),
+            "description": v.get("description", ""),
+            "thumbnail_url": v.get("thumbnail_url", ""),
+            "view_count": int(v.get("viewCount", 0)),
+        }
+        for v in videos
+    ]
+    return {
+        "channel_id": channel_id,
+        "channel_title": channel_info.get("snippet", {}).get("title", ""),
+        "subscriber_count": int(stats.get("subscriberCount", 0)),
+        "total_videos": int(stats.get("videoCount", 0)),
+        "uploads_playlist": _uploads_playlist_of(channel_data) or "",
+        "recent_videos": recent_videos,
+    }
+
+
+@timed("youtube.get_channel_details")
 def get_channel_details(channel_id: str):
     """Fetch basic channel details using YouTube Data API.
     Returns a dict; never raises for common API issues to keep callers resilient.
     """
     try:
-        url = f"{BASE_URL}/channels"
-        params = {
-            "part": "snippet,statistics,contentDetails",
-            "id": channel_id,
-            "key": YOUTUBE_API_KEY,
-        }
-        response = requests.get(url, params=params, timeout=15)
-        data = response.json() if response is not None else {}
-        return data if isinstance(data, dict) else {}
+        data = youtube_client.get_json("channels", _channel_params(channel_id), timeout=15)
+        _remember_uploads_playlist(channel_id, data)
+        return data
     except Exception:
         # Network or parsing error; return empty so callers can decide fallback
         return {}
 
-def get_channel_videos(channel_id: str, max_results: int = 10):
+@timed("youtube.get_channel_videos")
+def get_channel_videos(channel_id: str, max_results: int = 10, uploads_playlist: str = None):
     """Fetch recent videos for a channel with basic metadata and viewCount.
     Returns a dict {"videos": [...]} and avoids raising on missing keys or API errors.
+    The channels call is skipped when the uploads playlist is passed in or already memoized.
     """
     try:
         # Step 1: Get uploads playlist id
-        channel_data = get_channel_details(channel_id) or {}
-        items = channel_data.get("items") or []
-        if not items:
-            return {"videos": []}
-        uploads_playlist = (
-            items[0]
-            .get("contentDetails", {})
-            .get("relatedPlaylists", {})
-            .get("uploads")
-        )
+        uploads_playlist = uploads_playlist or known_uploads_playlist(channel_id)
+        if not uploads_playlist:
+            uploads_playlist = _uploads_playlist_of(get_channel_details(channel_id))
         if not uploads_playlist:
             return {"videos": []}
 
         # Step 2: Get playlist items
-        url = f"{BASE_URL}/playlistItems"
-        params = {
-            "part": "snippet,contentDetails",
-            "playlistId": uploads_playlist,
-            "maxResults": max(1, min(int(max_results or 10), 50)),
-            "key": YOUTUBE_API_KEY,
-        }
-        playlist_resp = requests.get(url, params=params, timeout=20)
-        playlist_json = playlist_resp.json() if playlist_resp is not None else {}
-        p_items = playlist_json.get("items") or []
-        video_ids = [i.get("contentDetails", {}).get("videoId") for i in p_items]
-        video_ids = [vid for vid in video_ids if vid]
+        playlist_json = youtube_client.get_json(
+            "playlistItems", _playlist_params(uploads_playlist, max_results), timeout=20
+        )
+        video_ids = _playlist_video_ids(playlist_json)
         if not video_ids:
             return {"videos": []}
 
         # Step 3: Get video details with viewCount
-        videos_url = f"{BASE_URL}/videos"
-        videos_params = {
-            "part": "snippet,statistics",
-            "id": ",".join(video_ids),
-            "key": YOUTUBE_API_KEY,
-        }
-        videos_resp = requests.get(videos_url, params=videos_params, timeout=20)
-        videos_json = videos_resp.json() if videos_resp is not None else {}
-        v_items = videos_json.get("items") or []
-        videos = []
-        for v in v_items:
-            snip = v.get("snippet", {})
-            thumbs = snip.get("thumbnails", {})
-            thumb_url = None
-            # choose available thumbnail key
-            for k in ("default", "medium", "high", "standard", "maxres"):
-                if k in thumbs and isinstance(thumbs[k], dict):
-                    thumb_url = thumbs[k].get("url")
-                    if thumb_url:
-                        break
-            stats = v.get("statistics", {})
-            videos.append(
-                {
-                    "title": snip.get("title", ""),
-                    "description": snip.get("description", ""),
-                    "thumbnail_url": thumb_url or "",
-                    "viewCount": stats.get("viewCount", 0),
-                }
-            )
-        return {"videos": videos}
+        videos_json = youtube_client.get_json("videos", _videos_params(video_ids), timeout=20)
+        return {"videos": _parse_videos(videos_json)}
     except Exception:
         # Gracefully degrade to empty result
         return {"videos": []}
-    
 
+@timed("youtube.get_latest_upload_id")
+def get_latest_upload_id(uploads_playlist_id: str):
+    """Return the video ID of the newest item in an uploads playlist.
+    One cheap playlistItems call (maxResults=1); returns "" for an empty playlist
+    and None if the request fails, so callers can tell "no videos" from "unknown".
+    """
+    try:
+        data = youtube_client.get_json("playlistItems", _latest_upload_params(uploads_playlist_id), timeout=10)
+        return _latest_upload_from(data)
+    except Exception:
+        return None
+
+@timed("youtube.fetch_channel_profile")
+def fetch_channel_profile(channel_id: str, max_results: int = 11):
+    """Fetch channel stats plus recent videos as one normalized dict.
+    Uses a single channels call: its uploads playlist feeds the playlistItems/videos calls
+    directly. Returns None when the channel does not exist (or the lookup failed).
+    """
+    channel_data = get_channel_details(channel_id)
+    if not (channel_data.get("items") or []):
+        return None
+    videos_data = get_channel_videos(
+        channel_id, max_results=max_results, uploads_playlist=_uploads_playlist_of(channel_data) or None
+    )
+    return _build_profile(channel_id, channel_data, videos_data["videos"])
+
+
+# -------------------------
+# asyncio variants (same contracts, non-blocking I/O)
+# -------------------------
+
+@timed("youtube.get_channel_details_async")
+async def get_channel_details_async(channel_id: str):
+    try:
+        data = await async_youtube_client.get_json("channels", _channel_params(channel_id), timeout=15)
+        _remember_uploads_playlist(channel_id, data)
+        return data
+    except Exception:
+        return {}
+
+@timed("youtube.get_channel_videos_async")
+async def get_channel_videos_async(channel_id: str, max_results: int = 10, uploads_playlist: str = None):
+    try:
+        uploads_playlist = uploads_playlist or known_uploads_playlist(channel_id)
+        if not uploads_playlist:
+            uploads_playlist = _uploads_playlist_of(await get_channel_details_async(channel_id))
+        if not uploads_playlist:
+            return {"videos": []}
+
+        playlist_json = await async_youtube_client.get_json(
+            "playlistItems", _playlist_params(uploads_playlist, max_results), timeout=20
+        )
+        video_ids = _playlist_video_ids(playlist_json)
+        if not video_ids:
+            return {"videos": []}
+
+        videos_json = await async_youtube_client.get_json("videos", _videos_params(video_ids), timeout=20)
+        return {"videos": _parse_videos(videos_json)}
+    except Exception:
+        return {"videos": []}
+
+@timed("youtube.get_latest_upload_id_async")
+async def get_latest_upload_id_async(uploads_playlist_id: str):
+    try:
+        data = await async_youtube_client.get_json(
+            "playlistItems", _latest_upload_params(uploads_playlist_id), timeout=10
+        )
+        return _latest_upload_from(data)
+    except Exception:
+        return None
+
+@timed("youtube.fetch_channel_profile_async")
+async def fetch_channel_profile_async(channel_id: str, max_results: int = 11):
+    channel_data = await get_channel_details_async(channel_id)
+    if not (channel_data.get("items") or []):
+        return None
+    videos_data = await get_channel_videos_async(
+        channel_id, max_results=max_results, uploads_playlist=_uploads_playlist_of(channel_data) or None
+    )
+    return _build_profile(channel_id, channel_data, videos_data["videos"])
+
+
+# -------------------------
+# Bulk (many channels) fetches, batched at API_BATCH_SIZE IDs per call
+# -------------------------
+
+def _chunks(ids, size: int = API_BATCH_SIZE):
+    return [ids[i:i + size] for i in range(0, len(ids), size)]
+
+@timed("youtube.get_channels_batch_async")
+async def get_channels_batch_async(channel_ids):
+    """channels.list for many channels, 50 IDs per call. Returns {channel_id: channel item}."""
+    async def fetch(chunk):
+        params = _channel_params(",".join(chunk))
+        params["maxResults"] = API_BATCH_SIZE
+        try:
+            data = await async_youtube_client.get_json("channels", params, timeout=20)
+        except Exception:
+            return []
+        return data.get("items") or []
+
+    found = {}
+    for items in await asyncio.gather(*(fetch(c) for c in _chunks(list(channel_ids)))):
+        for item in items:
+            if item.get("id"):
+                found[item["id"]] = item
+                _remember_uploads_playlist(item["id"], {"items": [item]})
+    return found
+
+@timed("youtube.get_videos_batch_async")
+async def get_videos_batch_async(video_ids):
+    """videos.list for many videos, 50 IDs per call. Returns {video_id: parsed video}."""
+    async def fetch(chunk):
+        try:
+            return await async_youtube_client.get_json("videos", _videos_params(chunk), timeout=20)
+        except Exception:
+            return {}
+
+    found = {}
+    for data in await asyncio.gather(*(fetch(c) for c in _chunks(list(video_ids)))):
+        for v in _parse_videos(data):
+            found[v["video_id"]] = v
+    return found
+
+@timed("youtube.fetch_channel_profiles_bulk_async")
+async def fetch_channel_profiles_bulk_async(channel_ids, max_results: int = 11, concurrency: int = 16):
+    """Profiles for many channels: batched channels.list, one playlistItems call per channel
+    (that endpoint takes a single playlist), then batched videos.list over all recent videos.
+    Returns {channel_id: profile or None}, None for channels that do not exist.
+    """
+    channel_ids = list(dict.fromkeys(channel_ids))
+    channels = await get_channels_batch_async(channel_ids)
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def recent_ids(channel_id):
+        uploads = _uploads_playlist_of({"items": [channels[channel_id]]})
+        if not uploads:
+            return []
+        async with semaphore:
+            try:
+                data = await async_youtube_client.get_json(
+                    "playlistItems", _playlist_params(uploads, max_results), timeout=20
+                )
+            except Exception:
+                return []
+        return _playlist_video_ids(data)
+
+    found_ids = [cid for cid in channel_ids if cid in channels]
+    id_lists = await asyncio.gather(*(recent_ids(cid) for cid in found_ids))
+    videos = await get_videos_batch_async([vid for ids in id_lists for vid in ids])
+
+    profiles = {cid: None for cid in channel_ids}
+    for cid, ids in zip(found_ids, id_lists):
+        profiles[cid] = _build_profile(cid, {"items": [channels[cid]]}, [videos[v] for v in ids if v in videos])
+    return profiles
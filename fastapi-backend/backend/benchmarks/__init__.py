@@ -0,0 +1 @@
+"""Local load-benchmark harness: fake YouTube Data API plus a load driver (python -m benchmarks.run)."""
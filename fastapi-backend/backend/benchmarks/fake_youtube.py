@@ -0,0 +1,175 @@
+"""
+Local stand-in for the YouTube Data API v3 (channels, playlistItems, videos), serving recorded
+responses from fixtures/youtube_api.json. Point the backend at it with YOUTUBE_API_BASE_URL.
+
+Any channel ID that is not in the fixtures but looks like one ("UC...", e.g. the IDs in
+nbs/user_embs_expanded.csv) is served as an alias of a recorded channel picked by a stable hash,
+so benchmarks can use many distinct channels. Responses carry ETags and honour If-None-Match.
+
+    python -m uvicorn benchmarks.fake_youtube:app --port 8090
+    FAKE_YOUTUBE_LATENCY_MS=80 ...          # simulated Google round trip per call
+
+Record real responses into the fixture file (needs YOUTUBE_API_KEY and network access):
+
+    python -m benchmarks.fake_youtube record UCxxxx UCyyyy
+"""
+import os
+import sys
+import copy
+import json
+import zlib
+import asyncio
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+FIXTURES_PATH = Path(os.getenv("FAKE_YOUTUBE_FIXTURES", str(Path(__file__).parent / "fixtures" / "youtube_api.json")))
+LATENCY_MS = float(os.getenv("FAKE_YOUTUBE_LATENCY_MS", "0"))
+REAL_API_BASE_URL = "https://www.googleapis.com/youtube/v3"
+
+
+def load_fixtures(path: Path = FIXTURES_PATH) -> Dict[str, Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        fixtures = json.load(f)
+    for section in ("channels", "playlistItems", "videos"):
+        fixtures.setdefault(section, {})
+    return fixtures
+
+
+# -------------------------
+# Fixture lookup
+# -------------------------
+
+class FixtureStore:
+    def __init__(self, fixtures: Dict[str, Dict[str, Any]]):
+        self.fixtures = fixtures
+        self.recorded_channels = sorted(fixtures["channels"])
+        self.stats = {"requests": 0, "not_modified": 0}
+
+    def _alias_of(self, channel_id: str):
+        """Recorded channel served for channel_id (itself if recorded), or None for unknown IDs."""
+        if channel_id in self.fixtures["channels"]:
+            return channel_id
+        if not channel_id.startswith("UC") or not self.recorded_channels:
+            return None
+        return self.recorded_channels[zlib.crc32(channel_id.encode()) % len(self.recorded_channels)]
+
+    def channel_items(self, channel_ids: List[str]) -> List[Dict[str, Any]]:
+        items = []
+        for channel_id in channel_ids:
+            alias = self._alias_of(channel_id)
+            if alias is None:
+                continue
+            for item in self.fixtures["channels"][alias].get("items", []):
+                if alias != channel_id:
+                    item = copy.deepcopy(item)
+                    item["id"] = channel_id
+                    item.setdefault("contentDetails", {}).setdefault("relatedPlaylists", {})["uploads"] = "UU" + channel_id[2:]
+                items.append(item)
+        return items
+
+    def playlist_items(self, playlist_id: str, max_results: int) -> List[Dict[str, Any]]:
+        response = self.fixtures["playlistItems"].get(playlist_id)
+        if response is None and playlist_id.startswith("UU"):
+            alias = self._alias_of("UC" + playlist_id[2:])
+            if alias is not None:
+                uploads = self.fixtures["channels"][alias]["items"][0]["contentDetails"]["relatedPlaylists"]["uploads"]
+                response = self.fixtures["playlistItems"].get(uploads)
+        return list((response or {}).get("items", []))[:max_results]
+
+    def video_items(self, video_ids: List[str]) -> List[Dict[str, Any]]:
+        return [self.fixtures["videos"][v] for v in video_ids if v in self.fixtures["videos"]]
+
+
+# -------------------------
+# App
+# -------------------------
+
+app = FastAPI(title="Fake YouTube Data API")
+store = FixtureStore(load_fixtures())
+
+
+def _ids(request: Request) -> List[str]:
+    return [i for i in request.query_params.get("id", "").split(",") if i]
+
+
+async def _respond(request: Request, kind: str, items: List[Dict[str, Any]]) -> Response:
+    store.stats["requests"] += 1
+    if LATENCY_MS > 0:
+        await asyncio.sleep(LATENCY_MS / 1000.0)
+    body = {"kind": f"youtube#{kind}ListResponse", "pageInfo": {"totalResults": len(items), "resultsPerPage": len(items)},
+            "items": items}
+    encoded = json.dumps(body, separators=(",", ":")).encode()
+    etag = '"' + hashlib.sha1(encoded).hexdigest() + '"'
+    if request.headers.get("if-none-match") == etag:
+        store.stats["not_modified"] += 1
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=encoded, media_type="application/json", headers={"ETag": etag})
+
+
+@app.get("/channels")
+async def channels(request: Request):
+    return await _respond(request, "channel", store.channel_items(_ids(request)))
+
+
+@app.get("/playlistItems")
+async def playlist_items(request: Request):
+    max_results = max(1, min(int(request.query_params.get("maxResults", "5")), 50))
+    return await _respond(request, "playlistItem",
+                          store.playlist_items(request.query_params.get("playlistId", ""), max_results))
+
+
+@app.get("/videos")
+async def videos(request: Request):
+    return await _respond(request, "video", store.video_items(_ids(request)))
+
+
+@app.get("/_stats")
+def stats():
+    return JSONResponse(store.stats)
+
+
+# -------------------------
+# Recording
+# -------------------------
+
+def record(channel_ids: List[str], path: Path = FIXTURES_PATH, max_results: int = 50):
+    """Fetch channels / uploads / videos for channel_ids from the real API and merge them into the fixtures."""
+    import requests
+
+    api_key = os.getenv("YOUTUBE_API_KEY")
+    if not api_key:
+        raise SystemExit("YOUTUBE_API_KEY is required to record fixtures")
+    fixtures = load_fixtures(path) if path.exists() else {"channels": {}, "playlistItems": {}, "videos": {}}
+
+    def get(resource, **params):
+        resp = requests.get(f"{REAL_API_BASE_URL}/{resource}", params={**params, "key": api_key}, timeout=20)
+        resp.raise_for_status()
+        return resp.json()
+
+    for channel_id in channel_ids:
+        channel = get("channels", part="snippet,statistics,contentDetails", id=channel_id)
+        if not channel.get("items"):
+            print(f"{channel_id}: not found, skipped", file=sys.stderr)
+            continue
+        fixtures["channels"][channel_id] = channel
+        uploads = channel["items"][0]["contentDetails"]["relatedPlaylists"]["uploads"]
+        playlist = get("playlistItems", part="snippet,contentDetails", playlistId=uploads, maxResults=max_results)
+        fixtures["playlistItems"][uploads] = playlist
+        video_ids = [i["contentDetails"]["videoId"] for i in playlist.get("items", [])]
+        if video_ids:
+            for item in get("videos", part="snippet,statistics", id=",".join(video_ids)).get("items", []):
+                fixtures["videos"][item["id"]] = item
+        print(f"{channel_id}: {len(video_ids)} videos", file=sys.stderr)
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(fixtures, f, indent=1)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] != "record":
+        raise SystemExit("usage: python -m benchmarks.fake_youtube record CHANNEL_ID [CHANNEL_ID ...]")
+    record(sys.argv[2:])
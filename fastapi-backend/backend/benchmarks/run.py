@@ -0,0 +1,549 @@
+"""
+Load benchmark for the backend, fully local: starts the fake YouTube Data API
+(benchmarks/fake_youtube.py) and `uvicorn app.main:app` with VIDTOWER_BACKEND=fake, drives each
+endpoint scenario at the requested concurrency levels (closed loop: every client sends its next
+request as soon as the previous one returns) and reports latency percentiles, throughput and the
+server's peak RSS, plus the time from spawning the server to listening (/health/live) and to
+ready (/health/ready, models warmed up). Inputs are the embeddings in nbs/user_embs_expanded.csv /
+nbs/vid_embs_expanded.csv and the channel profiles in eval_data/.
+
+    cd fastapi-backend/backend
+    python -m benchmarks.run                                    # every scenario at 1, 8, 32
+    python -m benchmarks.run --scenarios bicross,bicross_batch --concurrency 1,16 --requests 500
+    python -m benchmarks.run --env FUSION_RUNTIME=onnx --output onnx.json --baseline torch.json
+    python -m benchmarks.run --startup-only --startup-runs 5    # time to listening / ready only
+
+Results are written as JSON (--output); with --baseline, startup time and per scenario /
+concurrency p95 latency and throughput are compared and the exit status is 1 if any moved by
+more than --tolerance.
+The load generator runs on the same machine, so compare results from the same host only.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import socket
+import asyncio
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+DATA_DIR = BACKEND_DIR.parents[1] / "nbs"
+PROFILES_PATH = BACKEND_DIR / "eval_data" / "channel_profiles.json"
+
+
+# -------------------------
+# Inputs
+# -------------------------
+
+def _read_embeddings(path: Path):
+    """(channel ids or None, [N, D] float32 of the embedding_* columns) from an nbs/*_expanded.csv file."""
+    with open(path, newline="") as f:
+        rows = list(csv.reader(f))
+    header, rows = rows[0], rows[1:]
+    columns = [j for j, name in enumerate(header) if name.startswith("embedding_")]
+    ids = [r[header.index("channel_id")] for r in rows] if "channel_id" in header else None
+    values = np.asarray([[r[j] for j in columns] for r in rows], dtype=np.float32)
+    return ids, values
+
+
+class Inputs:
+    def __init__(self, data_dir: Path, batch_size: int):
+        self.channel_ids, self.user_embs = _read_embeddings(data_dir / "user_embs_expanded.csv")
+        _, self.video_embs = _read_embeddings(data_dir / "vid_embs_expanded.csv")
+        with open(PROFILES_PATH, encoding="utf-8") as f:
+            self.profiles = json.load(f)
+        self.titles = [v["title"] for p in self.profiles for v in p["recent_videos"]]
+        self.batch_size = batch_size
+
+    def user(self, i: int) -> List[float]:
+        return self.user_embs[i % len(self.user_embs)].tolist()
+
+    def video_emb(self, i: int) -> List[float]:
+        return self.video_embs[i % len(self.video_embs)].tolist()
+
+    def wide(self, i: int) -> List[float]:
+        # The bi-cross model's 768-d input has no CSV of its own: pair a user row with a video row
+        return self.user(i) + self.video_emb(i + 1)
+
+    def channel_id(self, i: int) -> str:
+        return self.channel_ids[i % len(self.channel_ids)]
+
+    def video(self, i: int) -> Dict[str, str]:
+        # A distinct draft per request, so VidTower results are not served from its cache
+        title = self.titles[i % len(self.titles)]
+        return {"title": f"{title} #{i}", "description": f"Benchmark draft {i}: {title}",
+                "tags": "benchmark,draft", "thumbnail_url": f"https://i.ytimg.com/vi/bench{i}/hqdefault.jpg"}
+
+    def rows(self, i: int, fn: Callable[[int], List[float]]) -> List[List[float]]:
+        return [fn(i * self.batch_size + j) for j in range(self.batch_size)]
+
+
+# -------------------------
+# Scenarios
+# -------------------------
+
+@dataclass
+class Scenario:
+    method: str
+    path: str
+    request: Callable[[Inputs, int], Dict[str, Any]]  # httpx request kwargs for request i
+    description: str
+
+
+def _octet(*vectors: List[float]) -> Dict[str, Any]:
+    body = np.concatenate([np.asarray(v, dtype="<f4") for v in vectors]).tobytes()
+    return {"content": body, "headers": {"Content-Type": "application/octet-stream",
+                                         "Accept": "application/octet-stream"}}
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "mlp": Scenario("POST", "/mlp-fusion-model/predict-heatmap", lambda d, i: {"json": {
+        "metadata_embedding": d.video_emb(i), "content_embedding": d.video_emb(i + 1), "user_embedding": d.user(i)}},
+        "Early-fusion MLP, one item"),
+    "cross_attention": Scenario("POST", "/cross-attention-fusion-model/predict-heatmap", lambda d, i: {"json": {
+        "metadata_embedding": d.video_emb(i), "content_embedding": d.video_emb(i + 1), "user_embedding": d.user(i)}},
+        "Cross-attention fusion, one item"),
+    "cross_attention_batch": Scenario("POST", "/cross-attention-fusion-model/predict-heatmap/batch", lambda d, i: {"json": {
+        "metadata_embeddings": d.rows(i, d.video_emb), "content_embeddings": d.rows(i + 1, d.video_emb),
+        "user_embeddings": d.rows(i, d.user)}},
+        "Cross-attention fusion, --batch-size items per request"),
+    "bicross": Scenario("POST", "/bicross-fusion/predict-slot-heatmap", lambda d, i: {"json": {
+        "user_embedding": d.wide(i), "video_embedding": d.user(i)}},
+        "Bi-cross fusion, one item (micro-batched server side)"),
+    "bicross_octet": Scenario("POST", "/bicross-fusion/predict-slot-heatmap",
+        lambda d, i: _octet(d.wide(i), d.user(i)),
+        "Bi-cross fusion, one item as raw float32 in and out"),
+    "bicross_batch": Scenario("POST", "/bicross-fusion/predict-slot-heatmap/batch", lambda d, i: {"json": {
+        "user_embeddings": d.rows(i, d.wide), "video_embeddings": d.rows(i, d.user)}},
+        "Bi-cross fusion, --batch-size items per request"),
+    "video_embedding": Scenario("POST", "/video-tower/get-video-embedding/", lambda d, i: {"json": d.video(i)},
+        "VidTower embedding (fake backend)"),
+    "channel_emb_video": Scenario("POST", "/channel-emb-and-video-data/prediction-heatmap", lambda d, i: {"json": {
+        "channel_embedding": d.user(i), "video": d.video(i)}},
+        "Channel embedding + video -> heatmap"),
+    "channel_video": Scenario("POST", "/channel-id-and-video-data/prediction-heatmap", lambda d, i: {"json": {
+        "channel_id": d.channel_id(i), "video": d.video(i)}},
+        "Channel ID + video -> heatmap (YouTube, NLP, VidTower, fusion)"),
+    "channel_video_async": Scenario("POST", "/channel-id-and-video-data/prediction-heatmap/async", lambda d, i: {"json": {
+        "channel_id": d.channel_id(i), "video": d.video(i)}},
+        "Same as channel_video on the async pipeline"),
+    "candidates": Scenario("POST", "/channel-id-and-video-data/prediction-heatmap/candidates", lambda d, i: {"json": {
+        "channel_id": d.channel_id(i), "videos": [d.video(i * 5 + j) for j in range(5)]}},
+        "Five draft videos against one channel"),
+    "predictions": Scenario("POST", "/api/predictions", lambda d, i: {"json": {
+        "channel": f"https://www.youtube.com/channel/{d.channel_id(i)}", **_prediction_fields(d.video(i))}},
+        "Frontend prediction route"),
+    "predictions_async": Scenario("POST", "/api/predictions/async", lambda d, i: {"json": {
+        "channel": f"https://www.youtube.com/channel/{d.channel_id(i)}", **_prediction_fields(d.video(i))}},
+        "Frontend prediction route, async pipeline"),
+    "user_profile": Scenario("POST", "/user-profiling/", lambda d, i: {"json": {"channel_id": d.channel_id(i)}},
+        "Channel profile from the YouTube API (channel cache)"),
+    "user_profile_async": Scenario("POST", "/user-profiling/async", lambda d, i: {"json": {"channel_id": d.channel_id(i)}},
+        "Channel profile, async client"),
+    "channel_embedding": Scenario("POST", "/embed/channel-embedding",
+        lambda d, i: {"json": d.profiles[i % len(d.profiles)]},
+        "Channel profile -> embedding (NER, topics, embedder)"),
+}
+
+
+def _prediction_fields(video: Dict[str, str]) -> Dict[str, str]:
+    return {"title": video["title"], "description": video["description"], "tags": video["tags"],
+            "thumbnail": video["thumbnail_url"]}
+
+
+# -------------------------
+# Processes
+# -------------------------
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _rss_bytes(pid: int, field: str = "VmRSS") -> Optional[int]:
+    """Resident set size (VmRSS) or its lifetime peak (VmHWM) of pid; None where /proc is unavailable."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss
+    except Exception:
+        return None
+
+
+class RssSampler:
+    """Samples a process's RSS in a background thread; peak is the highest value seen."""
+
+    def __init__(self, pid: int, interval: float = 0.02):
+        self.pid = pid
+        self.interval = interval
+        self.peak: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = _rss_bytes(self.pid)
+            if rss is not None:
+                self.peak = max(self.peak or 0, rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+class Server:
+    """A uvicorn subprocess; output goes to log_path."""
+
+    def __init__(self, name: str, target: str, port: int, env: Dict[str, str], log_path: Path):
+        self.name = name
+        self.url = f"http://127.0.0.1:{port}"
+        self.log_path = log_path
+        self._log = open(log_path, "wb")
+        self.started = time.perf_counter()
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", target, "--host", "127.0.0.1", "--port", str(port),
+             "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=env, stdout=self._log, stderr=subprocess.STDOUT,
+        )
+
+    def wait_ready(self, path: str, timeout: float) -> float:
+        """Seconds from spawn until GET path returns 200."""
+        deadline = self.started + timeout
+        while time.perf_counter() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"{self.name} exited with {self.process.returncode}:\n{self.log_tail()}")
+            try:
+                if httpx.get(self.url + path, timeout=2).status_code == 200:
+                    return time.perf_counter() - self.started
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.1)
+        raise RuntimeError(f"{self.name} not ready after {timeout:.0f}s:\n{self.log_tail()}")
+
+    def log_tail(self, lines: int = 30) -> str:
+        self._log.flush()
+        return "\n".join(self.log_path.read_text(errors="replace").splitlines()[-lines:])
+
+    def stop(self):
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self._log.close()
+
+
+# -------------------------
+# Load
+# -------------------------
+
+async def _drive(client: httpx.AsyncClient, scenario: Scenario, inputs: Inputs, start: int,
+                 count: int, concurrency: int, duration: Optional[float]):
+    """Closed-loop load: concurrency clients share request indices start..start+count (or run for duration)."""
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    next_index = start
+    deadline = time.perf_counter() + duration if duration else None
+
+    def take() -> Optional[int]:
+        nonlocal next_index
+        if deadline is not None:
+            if time.perf_counter() >= deadline:
+                return None
+        elif next_index >= start + count:
+            return None
+        next_index += 1
+        return next_index - 1
+
+    async def client_loop():
+        while (i := take()) is not None:
+            kwargs = scenario.request(inputs, i)
+            t0 = time.perf_counter()
+            try:
+                resp = await client.request(scenario.method, scenario.path, **kwargs)
+                status = str(resp.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - t0)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - t0, next_index
+
+
+def _summary(latencies: List[float], statuses: Dict[str, int], elapsed: float) -> Dict[str, Any]:
+    ms = np.asarray(latencies) * 1000.0
+    ok = sum(n for s, n in statuses.items() if s.isdigit() and 200 <= int(s) < 300)
+    pct = lambda q: round(float(np.percentile(ms, q)), 3) if ms.size else None
+    return {
+        "requests": int(ms.size),
+        "errors": int(ms.size) - ok,
+        "status_counts": statuses,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(ok / elapsed, 2) if elapsed > 0 else None,
+        "latency_ms": {"p50": pct(50), "p95": pct(95), "p99": pct(99),
+                       "mean": round(float(ms.mean()), 3) if ms.size else None,
+                       "max": round(float(ms.max()), 3) if ms.size else None},
+    }
+
+
+async def run_scenarios(url: str, pid: int, inputs: Inputs, args) -> List[Dict[str, Any]]:
+    results = []
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=args.timeout) as client:
+        index = 0
+        for name in args.scenarios:
+            scenario = SCENARIOS[name]
+            # Warm-up: first-use model loads, caches and connection setup stay out of the numbers
+            _, warm_statuses, _, index = await _drive(client, scenario, inputs, index, args.warmup, 1, None)
+            for concurrency in args.concurrency:
+                with RssSampler(pid) as rss:
+                    latencies, statuses, elapsed, index = await _drive(
+                        client, scenario, inputs, index, args.requests, concurrency, args.duration)
+                result = {"scenario": name, "method": scenario.method, "path": scenario.path,
+                          "concurrency": concurrency, **_summary(latencies, statuses, elapsed),
+                          "peak_rss_mb": round(rss.peak / 2**20, 1) if rss.peak else None}
+                results.append(result)
+                _print_row(result)
+    return results
+
+
+# -------------------------
+# Reporting
+# -------------------------
+
+def _print_row(r: Dict[str, Any]):
+    lat = r["latency_ms"]
+    fmt = lambda v: f"{v:9.2f}" if v is not None else f"{'-':>9}"
+    print(f"{r['scenario']:<24}{r['concurrency']:>5}{r['requests']:>8}{r['errors']:>7}"
+          f"{fmt(lat['p50'])}{fmt(lat['p95'])}{fmt(lat['p99'])}{fmt(r['throughput_rps'])}"
+          f"{fmt(r['peak_rss_mb'])}", flush=True)
+
+
+def _print_header():
+    print(f"{'scenario':<24}{'conc':>5}{'reqs':>8}{'errors':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'req/s':>9}{'RSS MB':>9}", flush=True)
+
+
+def compare(report: Dict[str, Any], baseline_path: Path, tolerance: float) -> bool:
+    """Print startup, p95 and throughput changes against a previous results file; True if anything regressed."""
+    with open(baseline_path) as f:
+        old_report = json.load(f)
+    regressed = False
+    print(f"\nvs {baseline_path} (tolerance {tolerance:.0%})")
+
+    old_startup, startup = old_report.get("startup") or {}, report.get("startup") or {}
+    for key in ("listening_s", "ready_s"):
+        if old_startup.get(key) and startup.get(key):
+            change = startup[key] / old_startup[key] - 1
+            flag = change > tolerance
+            regressed |= flag
+            print(f"{'startup ' + key:<29}{change:+7.1%}{'  REGRESSION' if flag else ''}")
+
+    baseline = {(r["scenario"], r["concurrency"]): r for r in old_report.get("results", [])}
+    for r in report["results"]:
+        old = baseline.get((r["scenario"], r["concurrency"]))
+        if not old or not old["latency_ms"]["p95"] or not old["throughput_rps"] or not r["throughput_rps"]:
+            continue
+        p95 = r["latency_ms"]["p95"] / old["latency_ms"]["p95"] - 1
+        rps = r["throughput_rps"] / old["throughput_rps"] - 1
+        flag = p95 > tolerance or rps < -tolerance
+        regressed |= flag
+        print(f"{r['scenario']:<24}{r['concurrency']:>5}  p95 {p95:+7.1%}  req/s {rps:+7.1%}"
+              f"{'  REGRESSION' if flag else ''}")
+    return regressed
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# -------------------------
+# CLI
+# -------------------------
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help="comma-separated scenario names (see --list)")
+    parser.add_argument("--list", action="store_true", help="list scenarios and exit")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 8, 32], help="e.g. 1,8,32")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario and concurrency level")
+    parser.add_argument("--duration", type=float, default=None, help="seconds per level (overrides --requests)")
+    parser.add_argument("--warmup", type=int, default=10, help="unmeasured requests per scenario")
+    parser.add_argument("--batch-size", type=int, default=64, help="items per request in *_batch scenarios")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout, seconds")
+    parser.add_argument("--vidtower-latency-ms", type=float, default=50.0, help="fake VidTower latency")
+    parser.add_argument("--youtube-latency-ms", type=float, default=50.0, help="fake YouTube API latency")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the app (e.g. FUSION_RUNTIME=onnx); repeatable")
+    parser.add_argument("--app", default="app.main:app", help="ASGI app to benchmark")
+    parser.add_argument("--live-path", default="/health/live", help="GET path that answers 200 once the app listens")
+    parser.add_argument("--ready-path", default="/health/ready",
+                        help="GET path that answers 200 once models are warmed up; load starts after it")
+    parser.add_argument("--startup-timeout", type=float, default=600.0)
+    parser.add_argument("--startup-runs", type=int, default=1,
+                        help="start the app this many times and report the median time to listening / ready")
+    parser.add_argument("--startup-only", action="store_true", help="only measure startup, send no load")
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR, help="directory holding the nbs CSVs")
+    parser.add_argument("--output", type=Path, default=Path("benchmark_results.json"))
+    parser.add_argument("--baseline", type=Path, default=None, help="previous results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed p95 / throughput change")
+    args = parser.parse_args(argv)
+
+    args.scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [s for s in args.scenarios if s not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s) {', '.join(unknown)}; choose from {', '.join(SCENARIOS)}")
+    if args.startup_runs < 1:
+        parser.error("--startup-runs must be at least 1")
+    if not args.concurrency or min(args.concurrency) < 1:
+        parser.error("--concurrency needs positive integers")
+    for item in args.env:
+        if "=" not in item:
+            parser.error(f"--env expects KEY=VALUE, got '{item}'")
+    return args
+
+
+def _start_app(args, env: Dict[str, str], log_path: Path):
+    """Spawn the app and wait for it: (server, {listening_s, ready_s, rss_mb})."""
+    app = Server("app", args.app, _free_port(), env, log_path)
+    try:
+        listening_s = app.wait_ready(args.live_path, args.startup_timeout)
+        ready_s = app.wait_ready(args.ready_path, args.startup_timeout)
+    except BaseException:
+        app.stop()
+        raise
+    rss = _rss_bytes(app.process.pid)
+    return app, {"listening_s": round(listening_s, 3), "ready_s": round(ready_s, 3),
+                 "rss_mb": round(rss / 2**20, 1) if rss else None}
+
+
+def _startup_summary(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    median = lambda key: round(float(np.median([r[key] for r in runs])), 3)
+    return {"listening_s": median("listening_s"), "ready_s": median("ready_s"), "runs": runs}
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.list:
+        for name, s in SCENARIOS.items():
+            print(f"{name:<24}{s.method:<6}{s.path:<58}{s.description}")
+        return 0
+
+    inputs = Inputs(args.data_dir, args.batch_size)
+    workdir = Path(tempfile.mkdtemp(prefix="benchmark-"))
+    youtube_port = _free_port()
+
+    youtube_env = {**os.environ, "FAKE_YOUTUBE_LATENCY_MS": str(args.youtube_latency_ms)}
+    app_overrides = {
+        "YOUTUBE_API_KEY": os.environ.get("YOUTUBE_API_KEY") or "benchmark",
+        "YOUTUBE_API_BASE_URL": f"http://127.0.0.1:{youtube_port}",
+        "VIDTOWER_BACKEND": "fake",
+        "VIDTOWER_FAKE_LATENCY_MS": str(args.vidtower_latency_ms),
+        # Fresh on-disk caches each run, so results do not depend on earlier runs
+        "FEATURE_CACHE_PATH": str(workdir / "feature_cache.sqlite3"),
+        "VIDEO_EMB_CACHE_PATH": "",
+        **dict(item.split("=", 1) for item in args.env),
+    }
+    app_env = {**os.environ, **app_overrides}
+
+    youtube = Server("fake YouTube", "benchmarks.fake_youtube:app", youtube_port, youtube_env,
+                     workdir / "fake_youtube.log")
+    app = None
+    startups: List[Dict[str, Any]] = []
+    results: List[Dict[str, Any]] = []
+    peak_rss = None
+    try:
+        youtube.wait_ready("/_stats", 60)
+        # Every start but the last is only timed; the last one also serves the load (unless --startup-only)
+        for run in range(args.startup_runs):
+            app, startup = _start_app(args, app_env, workdir / f"app-{run}.log")
+            startups.append(startup)
+            print(f"{args.app} start {run + 1}/{args.startup_runs}: listening after {startup['listening_s']:.2f}s, "
+                  f"ready after {startup['ready_s']:.2f}s, RSS {startup['rss_mb']} MB", flush=True)
+            if run < args.startup_runs - 1 or args.startup_only:
+                app.stop()
+                app = None
+        print(f"(logs in {workdir})", flush=True)
+
+        if app is not None:
+            print()
+            _print_header()
+            results = asyncio.run(run_scenarios(app.url, app.process.pid, inputs, args))
+            peak_rss = _rss_bytes(app.process.pid, "VmHWM")
+    finally:
+        if app is not None:
+            app.stop()
+        youtube.stop()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "app": args.app,
+            "app_env": {k: v for k, v in app_overrides.items() if k != "YOUTUBE_API_KEY"},
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "duration_s": args.duration,
+            "warmup": args.warmup,
+            "batch_size": args.batch_size,
+            "youtube_latency_ms": args.youtube_latency_ms,
+            "vidtower_latency_ms": args.vidtower_latency_ms,
+        },
+        "startup": _startup_summary(startups),
+        "peak_rss_mb": round(peak_rss / 2**20, 1) if peak_rss else None,
+        "results": results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nresults written to {args.output}")
+
+    if args.baseline is not None and compare(report, args.baseline, args.tolerance):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
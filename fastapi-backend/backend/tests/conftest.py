@@ -0,0 +1,7 @@
+import os
+import sys
+from pathlib import Path
+
+# app.config refuses to import without an API key; tests never call the real YouTube API
+os.environ.setdefault("YOUTUBE_API_KEY", "test")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
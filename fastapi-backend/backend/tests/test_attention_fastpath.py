@@ -0,0 +1,87 @@
+import pytest
+import torch
+
+from app.services.attention_fastpath import attend
+from app.routers import heatmap_cross_attention as cross
+from app.routers import heatmap_cross_attention_at_2 as bicross
+
+# float32 rounding of the folded matrix product; it grows slightly with the output magnitude
+ATOL, RTOL = 2e-6, 1e-6
+
+
+def _blocks(seed=0):
+    torch.manual_seed(seed)
+    bi = bicross.BiCrossAttentionFusionModel(
+        bicross.VIDEO_DIM, bicross.USER_DIM, bicross.HIDDEN_DIM, bicross.NUM_HEADS, bicross.NUM_SLOTS
+    )
+    fm = cross.FusionModel(embed_dim=cross.EMBED_DIM, num_heads=cross.NUM_HEADS, num_slots=cross.NUM_SLOTS)
+    return {
+        "bicross.video_to_user": bi.video_to_user.attn,
+        "bicross.user_to_video": bi.user_to_video.attn,
+        "cross.user_content_attn": fm.user_content_attn.attn,
+        "cross.user_context_attn": fm.user_context_attn.attn,
+        "cross.content_context_attn": fm.content_context_attn.attn,
+    }
+
+
+BLOCKS = _blocks()
+
+
+def _calls(attn):
+    """Count calls into the module itself; the fast path never makes one."""
+    calls = []
+    handle = attn.register_forward_hook(lambda *args: calls.append(None))
+    return calls, handle
+
+
+def _qkv(attn, batch, q_len=1, kv_len=1, seed=0):
+    gen = torch.Generator().manual_seed(seed)
+    q = torch.randn(batch, q_len, attn.embed_dim, generator=gen)
+    kv = torch.randn(batch, kv_len, attn.embed_dim, generator=gen)
+    return q, kv
+
+
+@pytest.mark.parametrize("name", list(BLOCKS))
+@pytest.mark.parametrize("batch", [1, 8, 256])
+def test_fastpath_matches_multihead_attention(name, batch):
+    attn = BLOCKS[name].eval()
+    q, kv = _qkv(attn, batch)
+    calls, handle = _calls(attn)
+    try:
+        with torch.no_grad():
+            fast = attend(attn, q, kv)
+            assert not calls
+            reference = attn(q, kv, kv)[0]
+    finally:
+        handle.remove()
+    torch.testing.assert_close(fast, reference, atol=ATOL, rtol=RTOL)
+
+
+@pytest.mark.parametrize("name", list(BLOCKS))
+def test_training_mode_falls_back_to_the_module(name):
+    attn = BLOCKS[name].train()
+    q, kv = _qkv(attn, 4)
+    calls, handle = _calls(attn)
+    try:
+        with torch.no_grad():
+            attend(attn, q, kv)
+    finally:
+        handle.remove()
+        attn.eval()
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("name", list(BLOCKS))
+@pytest.mark.parametrize("q_len,kv_len", [(1, 3), (2, 1), (3, 3)])
+def test_longer_sequences_fall_back_to_the_module(name, q_len, kv_len):
+    attn = BLOCKS[name].eval()
+    q, kv = _qkv(attn, 4, q_len, kv_len)
+    calls, handle = _calls(attn)
+    try:
+        with torch.no_grad():
+            out = attend(attn, q, kv)
+            assert len(calls) == 1
+            reference = attn(q, kv, kv)[0]
+    finally:
+        handle.remove()
+    assert torch.equal(out, reference)
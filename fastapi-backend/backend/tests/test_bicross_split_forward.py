@@ -0,0 +1,31 @@
+import pytest
+import torch
+
+from app.routers import heatmap_cross_attention_at_2 as bicross
+
+# Same float32 ops as forward() apart from the broadcast of the shared video-side tensors
+ATOL = 1.2e-7
+
+
+def _model(seed):
+    torch.manual_seed(seed)
+    model = bicross.BiCrossAttentionFusionModel(
+        bicross.VIDEO_DIM, bicross.USER_DIM, bicross.HIDDEN_DIM, bicross.NUM_HEADS, bicross.NUM_SLOTS
+    )
+    return model.eval()
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+@pytest.mark.parametrize("candidates", [1, 7, 50])
+def test_split_forward_matches_forward(seed, candidates):
+    model = _model(seed)
+    gen = torch.Generator().manual_seed(seed)
+    video_emb = torch.randn(1, bicross.VIDEO_DIM, generator=gen)
+    user_emb = torch.randn(candidates, bicross.USER_DIM, generator=gen)
+
+    with torch.no_grad():
+        split = torch.sigmoid(model.forward_video_side(model.encode_video_side(video_emb), user_emb))
+        full = torch.sigmoid(model(video_emb.expand(candidates, -1), user_emb))
+
+    assert split.shape == (candidates, bicross.NUM_SLOTS)
+    assert float((split - full).abs().max()) <= ATOL
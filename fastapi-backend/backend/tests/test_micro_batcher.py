@@ -0,0 +1,62 @@
+import threading
+from concurrent.futures import CancelledError
+
+import pytest
+
+from app.services.micro_batcher import MicroBatcher
+
+
+def _blocked_batcher():
+    """A batcher whose first batch waits on `release`, so later submits queue up behind it."""
+    release = threading.Event()
+    started = threading.Event()
+    seen = []
+
+    def batch_fn(items):
+        if not seen:
+            started.set()
+            release.wait(5)
+        seen.append(list(items))
+        return [item * 2 for item in items]
+
+    return MicroBatcher(batch_fn, max_batch_size=8, max_wait_ms=50.0, name="test"), release, started, seen
+
+
+def test_cancelled_caller_is_dropped_from_the_batch():
+    batcher, release, started, seen = _blocked_batcher()
+    first = batcher.submit(0)
+    assert started.wait(5)
+    kept, cancelled, other = batcher.submit(1), batcher.submit(2), batcher.submit(3)
+    assert cancelled.cancel()
+    release.set()
+
+    assert first.result(5) == 0
+    assert kept.result(5) == 2
+    assert other.result(5) == 6
+    with pytest.raises(CancelledError):
+        cancelled.result(0)
+    assert seen == [[0], [1, 3]]
+    assert batcher.stats()["requests"] == 3
+
+
+def test_fully_cancelled_batch_skips_batch_fn():
+    batcher, release, started, seen = _blocked_batcher()
+    batcher.submit(0)
+    assert started.wait(5)
+    queued = [batcher.submit(i) for i in (1, 2)]
+    assert all(future.cancel() for future in queued)
+    release.set()
+
+    assert batcher.submit(5).result(5) == 10
+    assert seen == [[0], [5]]
+
+
+def test_batch_fn_error_reaches_every_caller():
+    def batch_fn(items):
+        raise ValueError("boom")
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=4, max_wait_ms=20.0, name="failing")
+    futures = [batcher.submit(i) for i in range(3)]
+    for future in futures:
+        with pytest.raises(ValueError, match="boom"):
+            future.result(5)
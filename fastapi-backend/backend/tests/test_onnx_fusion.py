@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+import torch
+
+pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+
+from app.services.onnx_fusion import OnnxRunner, SigmoidHead, export_onnx, is_stale, load_or_export
+from app.routers import heatmap_cross_attention as cross
+from app.routers import heatmap_cross_attention_at_2 as bicross
+
+ATOL = 1e-5
+
+
+def _bicross(seed):
+    torch.manual_seed(seed)
+    model = bicross.BiCrossAttentionFusionModel(
+        bicross.VIDEO_DIM, bicross.USER_DIM, bicross.HIDDEN_DIM, bicross.NUM_HEADS, bicross.NUM_SLOTS
+    )
+    return SigmoidHead(model).eval(), [bicross.VIDEO_DIM, bicross.USER_DIM], bicross.ONNX_INPUT_NAMES
+
+
+def _cross(seed):
+    torch.manual_seed(seed)
+    model = cross.FusionModel(embed_dim=cross.EMBED_DIM, num_heads=cross.NUM_HEADS, num_slots=cross.NUM_SLOTS)
+    return model.eval(), [cross.EMBED_DIM] * 3, cross.ONNX_INPUT_NAMES
+
+
+def _inputs(dims, batch, seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.standard_normal((batch, d)).astype(np.float32) for d in dims]
+
+
+def _torch_out(model, arrays):
+    with torch.no_grad():
+        return model(*[torch.from_numpy(a) for a in arrays]).numpy()
+
+
+@pytest.mark.parametrize("build", [_bicross, _cross], ids=["bicross", "cross_attention"])
+def test_onnx_matches_torch(tmp_path, build):
+    model, dims, names = build(seed=0)
+    path = str(tmp_path / "head.onnx")
+    export_onnx(model, [torch.from_numpy(a) for a in _inputs(dims, 2)], names, path)
+    runner = OnnxRunner(path)
+
+    for batch in (1, 7, 64):
+        arrays = _inputs(dims, batch, seed=batch)
+        np.testing.assert_allclose(runner(*arrays), _torch_out(model, arrays), rtol=0, atol=ATOL)
+
+
+def test_load_or_export_reexports_when_weights_change(tmp_path):
+    old, dims, names = _bicross(seed=0)
+    new, _, _ = _bicross(seed=1)
+    path = str(tmp_path / "head.onnx")
+    example = [torch.zeros(2, d) for d in dims]
+    arrays = _inputs(dims, 3)
+
+    load_or_export(old, example, names, path, torch.device("cpu"))
+    assert not is_stale(old, path)
+    assert is_stale(new, path)
+
+    runner = load_or_export(new, example, names, path, torch.device("cpu"))
+    np.testing.assert_allclose(runner(*arrays), _torch_out(new, arrays), rtol=0, atol=ATOL)
+    assert not is_stale(new, path)
@@ -0,0 +1,55 @@
+import pytest
+
+from app.services import warmup
+
+
+@pytest.fixture
+def models(monkeypatch):
+    monkeypatch.setattr(warmup, "_models", {})
+    return warmup._models
+
+
+def _flaky(failures):
+    calls = []
+
+    def warm_fn():
+        calls.append(None)
+        if len(calls) <= failures:
+            raise RuntimeError("weights not there yet")
+
+    return warm_fn, calls
+
+
+def test_failed_required_model_is_retried_until_ready(models, monkeypatch):
+    monkeypatch.setattr(warmup, "WARMUP_RETRY_INITIAL_SECONDS", 5.0)
+    monkeypatch.setattr(warmup, "WARMUP_RETRY_MAX_SECONDS", 12.0)
+    warm_fn, calls = _flaky(failures=3)
+    warmup.register_model("flaky", warm_fn)
+    items = list(models.items())
+    for name, model in items:
+        warmup._warm(name, model)
+    assert not warmup.is_ready()
+    assert warmup.model_states()["flaky"]["state"] == warmup.FAILED
+
+    delays = []
+    warmup._retry_failed(items, sleep=delays.append)
+
+    assert delays == [5.0, 10.0, 12.0]
+    assert len(calls) == 4
+    assert warmup.is_ready()
+    assert "error" not in warmup.model_states()["flaky"]
+
+
+def test_optional_model_failure_is_not_retried(models):
+    warm_fn, calls = _flaky(failures=1)
+    warmup.register_model("optional", warm_fn, required=False)
+    items = list(models.items())
+    for name, model in items:
+        warmup._warm(name, model)
+
+    delays = []
+    warmup._retry_failed(items, sleep=delays.append)
+
+    assert delays == []
+    assert len(calls) == 1
+    assert warmup.is_ready()
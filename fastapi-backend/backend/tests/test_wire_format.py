@@ -0,0 +1,180 @@
+import base64
+import json
+
+import numpy as np
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from app.services.wire_format import WireFormatError, read_arrays, array_response
+
+FIELDS = {"query": 4, "key": 2}
+
+
+class PairInput(BaseModel):
+    query: list[float]
+    key: list[float]
+
+
+class PairBatchInput(BaseModel):
+    query: list[list[float]]
+    key: list[list[float]]
+
+
+def _app():
+    """Echo routes wired like the fusion routers: decode, then encode the arrays back."""
+    app = FastAPI()
+
+    async def echo(request: Request, batch: bool, model: type):
+        try:
+            arrays, _ = await read_arrays(request, FIELDS, batch=batch, model=model)
+        except WireFormatError as e:
+            raise HTTPException(status_code=e.status_code, detail=str(e))
+        out = np.concatenate([arrays["query"], arrays["key"]], axis=-1)
+        return array_response(request, {"out": out}, lambda: {"out": out.tolist()})
+
+    @app.post("/echo")
+    async def echo_one(request: Request):
+        return await echo(request, False, PairInput)
+
+    @app.post("/echo-batch")
+    async def echo_batch(request: Request):
+        return await echo(request, True, PairBatchInput)
+
+    return app
+
+
+client = TestClient(_app())
+QUERY = np.array([0.5, -1.25, 2.0, 3.5], dtype=np.float32)
+KEY = np.array([-0.75, 1.5], dtype=np.float32)
+EXPECTED = np.concatenate([QUERY, KEY])
+
+
+def _packed(array, dtype="float32", text=True):
+    data = array.astype(dtype).tobytes()
+    return {"data": base64.b64encode(data).decode("ascii") if text else data, "dtype": dtype}
+
+
+def _unpacked(packed):
+    data = packed["data"]
+    data = base64.b64decode(data) if isinstance(data, str) else data
+    return np.frombuffer(data, dtype=packed["dtype"]).reshape(packed["shape"])
+
+
+def _post(path, content, content_type, accept="application/json"):
+    return client.post(path, content=content, headers={"Content-Type": content_type, "Accept": accept})
+
+
+# -------------------------
+# Round trips
+# -------------------------
+
+def test_json_lists_round_trip():
+    response = client.post("/echo", json={"query": QUERY.tolist(), "key": KEY.tolist()})
+    assert response.status_code == 200
+    np.testing.assert_array_equal(response.json()["out"], EXPECTED)
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+def test_json_packed_round_trip(dtype):
+    body = json.dumps({"query": _packed(QUERY, dtype), "key": _packed(KEY, dtype)})
+    response = _post("/echo", body, "application/json", f"application/json; encoding=base64; dtype={dtype}")
+    assert response.status_code == 200
+    out = response.json()["out"]
+    assert out["dtype"] == dtype and out["shape"] == [6]
+    np.testing.assert_array_equal(_unpacked(out), EXPECTED.astype(dtype))
+
+
+def test_msgpack_round_trip():
+    msgpack = pytest.importorskip("msgpack")
+    body = msgpack.packb({"query": _packed(QUERY, text=False), "key": KEY.tolist()}, use_bin_type=True)
+    response = _post("/echo", body, "application/msgpack", "application/msgpack")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/msgpack"
+    np.testing.assert_array_equal(_unpacked(msgpack.unpackb(response.content, raw=False)["out"]), EXPECTED)
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+def test_octet_stream_round_trip(dtype):
+    body = np.concatenate([QUERY, KEY]).astype(dtype).tobytes()
+    response = _post("/echo", body, f"application/octet-stream; dtype={dtype}",
+                     f"application/octet-stream; dtype={dtype}")
+    assert response.status_code == 200
+    assert response.headers["x-embedding-dtype"] == dtype
+    assert response.headers["x-embedding-shape"] == "6"
+    np.testing.assert_array_equal(np.frombuffer(response.content, dtype=dtype), EXPECTED.astype(dtype))
+
+
+def test_octet_stream_batch_round_trip():
+    queries = np.arange(12, dtype=np.float32).reshape(3, 4)
+    keys = -np.arange(6, dtype=np.float32).reshape(3, 2)
+    body = queries.tobytes() + keys.tobytes()
+    response = _post("/echo-batch", body, "application/octet-stream", "application/octet-stream")
+    assert response.status_code == 200
+    assert response.headers["x-embedding-shape"] == "3,6"
+    out = np.frombuffer(response.content, dtype=np.float32).reshape(3, 6)
+    np.testing.assert_array_equal(out, np.concatenate([queries, keys], axis=1))
+
+
+def test_accept_q_values_pick_the_preferred_format():
+    response = client.post("/echo", json={"query": QUERY.tolist(), "key": KEY.tolist()},
+                           headers={"Accept": "application/json;q=0.5, application/octet-stream"})
+    assert response.headers["content-type"] == "application/octet-stream"
+
+
+# -------------------------
+# Errors
+# -------------------------
+
+def test_unsupported_content_type_is_415():
+    response = _post("/echo", b"query=1", "text/plain")
+    assert response.status_code == 415
+
+
+@pytest.mark.parametrize("body", [
+    np.zeros(5, dtype=np.float32).tobytes(),    # wrong number of values
+    np.zeros(6, dtype=np.float32).tobytes()[:-1],  # not a whole number of float32 values
+])
+def test_octet_stream_bad_size_is_400(body):
+    assert _post("/echo", body, "application/octet-stream").status_code == 400
+
+
+def test_octet_stream_bad_dtype_is_400():
+    body = np.zeros(6, dtype=np.float64).tobytes()
+    assert _post("/echo", body, "application/octet-stream; dtype=float64").status_code == 400
+
+
+def test_packed_bad_dtype_is_400():
+    body = json.dumps({"query": _packed(QUERY, "float64"), "key": KEY.tolist()})
+    assert _post("/echo", body, "application/json").status_code == 400
+
+
+def test_packed_wrong_dim_is_400():
+    body = json.dumps({"query": _packed(QUERY[:3]), "key": KEY.tolist()})
+    assert _post("/echo", body, "application/json").status_code == 400
+
+
+def test_invalid_json_is_422():
+    assert _post("/echo", b'{"query": [1, 2', "application/json").status_code == 422
+    assert client.post("/echo", json={"query": "nope", "key": KEY.tolist()}).status_code == 422
+
+
+@pytest.mark.parametrize("bad", [np.nan, np.inf, -np.inf])
+def test_non_finite_values_are_400(bad):
+    query = QUERY.copy()
+    query[1] = bad
+    bodies = [
+        (json.dumps({"query": query.tolist(), "key": KEY.tolist()}), "application/json"),
+        (json.dumps({"query": _packed(query), "key": KEY.tolist()}), "application/json"),
+        (np.concatenate([query, KEY]).tobytes(), "application/octet-stream"),
+        (np.concatenate([query, KEY]).astype(np.float16).tobytes(), "application/octet-stream; dtype=float16"),
+    ]
+    for body, content_type in bodies:
+        response = _post("/echo", body, content_type)
+        assert response.status_code == 400, content_type
+        assert "finite" in response.json()["detail"]
+
+
+def test_float32_overflow_is_400():
+    assert client.post("/echo", json={"query": [1e39, 0, 0, 0], "key": KEY.tolist()}).status_code == 400